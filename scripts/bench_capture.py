@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from kinect_forge.capture import capture_frames
+from kinect_forge.config import CaptureConfig
+from kinect_forge.dataset import load_metadata
+from kinect_forge.presets import capture_preset
+from kinect_forge.sensors import ReplayConfig, ReplaySensor
+
+# (label, storage, color codec, depth codec)
+Target = Tuple[str, str, Optional[str], Optional[str]]
+
+TARGETS: List[Target] = [
+    ("png", "png", None, None),
+    ("png:1", "png", "png:1", "png:1"),
+    ("png:1+kfd", "png", "png:1", "kfd"),
+    ("container", "container", None, None),
+    ("container+kfd", "container", "raw", "kfd"),
+]
+
+
+def _config(preset: Optional[str], frames: int, fps: float, workers: int) -> CaptureConfig:
+    values = {"frames": frames, "fps": fps, "warmup": 0, "max_frames_total": frames}
+    if preset:
+        profile = capture_preset(preset)
+        for key in ("depth_min", "depth_max", "mask_background"):
+            values[key] = profile[key]
+    return CaptureConfig(writer_workers=workers, **values)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure sustainable capture fps per storage target by replaying a dataset."
+    )
+    parser.add_argument("--dataset", type=Path, required=True, help="Dataset to replay")
+    parser.add_argument("--frames", type=int, default=150, help="Frames per run")
+    parser.add_argument("--fps", type=float, default=30.0, help="Replay sensor rate (0 = fast)")
+    parser.add_argument("--preset", help="Capture preset for depth range and masking")
+    parser.add_argument(
+        "--workers", default="0,2", help="Comma-separated writer thread counts to try"
+    )
+    args = parser.parse_args()
+
+    intrinsics = load_metadata(args.dataset).intrinsics
+    workers = [int(part) for part in args.workers.split(",") if part.strip()]
+    replay = ReplayConfig(
+        pacing="fps" if args.fps > 0 else "fast", fps=args.fps, loop=True, preload=True
+    )
+    scratch = Path(tempfile.mkdtemp(prefix="kinect-forge-bench-"))
+    print(f"{'target':>14} {'workers':>7} {'read fps':>9} {'saved':>6} {'dropped':>8}")
+    try:
+        for label, storage, color_codec, depth_codec in TARGETS:
+            for count in workers:
+                output = scratch / f"{label}-{count}"
+                config = _config(args.preset, args.frames, args.fps, count)
+                config = CaptureConfig(
+                    **{
+                        **config.__dict__,
+                        "storage": storage,
+                        "color_codec": color_codec,
+                        "depth_codec": depth_codec,
+                    }
+                )
+                sensor = ReplaySensor(args.dataset, replay)
+                stats = capture_frames(sensor, output, config, intrinsics=intrinsics)
+                fps = stats.frames_read / stats.elapsed_seconds if stats.elapsed_seconds else 0.0
+                print(
+                    f"{label:>14} {count:>7} {fps:>9.1f} {stats.frames_saved:>6} "
+                    f"{stats.frames_dropped:>8}"
+                )
+                shutil.rmtree(output, ignore_errors=True)
+    except (RuntimeError, ValueError) as exc:
+        print(f"Benchmark failed: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
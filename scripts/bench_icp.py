@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from kinect_forge.dataset import load_metadata, open_frames
+from kinect_forge.odometry import chain_poses, odometry_pair, pinhole, rgbd_from_arrays
+from kinect_forge.presets import reconstruction_preset
+from kinect_forge.registration import CloudCache, ICPLevel, icp_levels, refine_pairs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare single-scale and scheduled ICP refinement on a dataset."
+    )
+    parser.add_argument("--dataset", type=Path, required=True, help="Recorded dataset")
+    parser.add_argument("--preset", default="small", help="Reconstruction preset")
+    parser.add_argument("--step", type=int, default=2, help="Use every Nth frame as a keyframe")
+    parser.add_argument("--workers", type=int, default=0, help="ICP processes")
+    args = parser.parse_args()
+
+    config = reconstruction_preset(args.preset)
+    meta = load_metadata(args.dataset)
+    frames = open_frames(args.dataset)
+    indices = list(range(0, len(frames), max(1, args.step)))
+    if len(indices) < 2:
+        print("Benchmark failed: need at least two keyframes", file=sys.stderr)
+        return 1
+    intrinsic = pinhole(meta.intrinsics)
+    images = [
+        rgbd_from_arrays(
+            frames.read_color(idx), frames.read_depth(idx), meta.depth_scale, config.depth_trunc
+        )
+        for idx in indices
+    ]
+    pairs = [
+        odometry_pair(indices[k - 1], indices[k], images[k - 1], images[k], intrinsic)
+        for k in range(1, len(indices))
+    ]
+    poses = chain_poses(pairs)
+    initials = [np.linalg.inv(poses[k]) @ poses[k - 1] for k in range(1, len(poses))]
+
+    single = [ICPLevel(config.icp_voxel, config.icp_distance, config.icp_iterations)]
+    schedules: List[Tuple[str, List[ICPLevel]]] = [("single", single)]
+    if config.icp_schedule:
+        schedules.append(("schedule", icp_levels(config)))
+    print(
+        f"{'levels':>9} {'cold s':>7} {'warm s':>7} {'aligned':>8} {'fitness':>8} "
+        f"{'rmse mm':>8}"
+    )
+    scratch = Path(tempfile.mkdtemp(prefix="kinect-forge-icp-"))
+    try:
+        for label, levels in schedules:
+            timings = []
+            results = []
+            # Cold builds the cloud cache; warm reuses it.
+            for _ in range(2):
+                cache = CloudCache(scratch, meta.intrinsics, meta.depth_scale, config.depth_trunc)
+                started = time.perf_counter()
+                results = refine_pairs(
+                    indices,
+                    initials,
+                    levels,
+                    cache,
+                    frames.read_depth,
+                    args.dataset,
+                    scratch,
+                    args.workers,
+                )
+                timings.append(time.perf_counter() - started)
+            aligned = [pair for pair in results if pair.success]
+            fitness = float(np.mean([pair.fitness for pair in aligned])) if aligned else 0.0
+            rmse = float(np.mean([pair.rmse for pair in aligned])) if aligned else 0.0
+            print(
+                f"{label:>9} {timings[0]:>7.2f} {timings[1]:>7.2f} "
+                f"{len(aligned):>4}/{len(results):<3} {fitness:>8.3f} {rmse * 1000:>8.2f}"
+            )
+            shutil.rmtree(scratch / "cache", ignore_errors=True)
+    except (RuntimeError, ValueError) as exc:
+        print(f"Benchmark failed: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
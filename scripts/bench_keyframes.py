@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from kinect_forge.dataset import load_metadata, open_frames
+from kinect_forge.keyframes import DepthChangeDetector, thumbnail_shape
+from kinect_forge.reconstruct import _depth_thumbnails, _select_keyframes
+
+
+def _full_resolution(root: Path, depth_scale: float, threshold: float) -> List[int]:
+    """Selection scored on every pixel of the decoded frames."""
+    frames = open_frames(root)
+    selected: List[int] = []
+    detector = DepthChangeDetector(depth_scale, stride=1)
+    for idx in range(len(frames)):
+        depth = frames.read_depth(idx)
+        if not detector.has_reference or detector.delta(depth) >= threshold:
+            selected.append(idx)
+            detector.set_reference(depth)
+    return selected
+
+
+def _previous_scorer(root: Path, depth_scale: float, threshold: float) -> Tuple[List[int], float]:
+    """Selection as scored before thumbnails: float32 mean change over every
+    pixel, holes included. Also returns the mean share of pixels that gain or
+    lose depth between consecutive frames, which that scorer counted as change."""
+    frames = open_frames(root)
+    selected: List[int] = []
+    last: Optional[np.ndarray] = None
+    previous_valid: Optional[np.ndarray] = None
+    flicker: List[float] = []
+    for idx in range(len(frames)):
+        raw = frames.read_depth(idx)
+        valid = raw != 0
+        if previous_valid is not None:
+            flicker.append(float(np.mean(valid != previous_valid)))
+        previous_valid = valid
+        depth = raw.astype(np.float32) / depth_scale
+        if last is None or float(np.mean(np.abs(depth - last))) >= threshold:
+            selected.append(idx)
+            last = depth
+    return selected, float(np.mean(flicker)) if flicker else 0.0
+
+
+def _near_matches(reference: List[int], other: Set[int], tolerance: int) -> int:
+    offsets = range(-tolerance, tolerance + 1)
+    return sum(1 for idx in reference if any(idx + off in other for off in offsets))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compare reduced-resolution keyframe scoring with full-resolution scoring "
+            "and with the previous float32 scorer."
+        )
+    )
+    parser.add_argument("--dataset", type=Path, required=True, help="Recorded dataset")
+    parser.add_argument("--threshold", type=float, default=0.003, help="Keyframe threshold (m)")
+    parser.add_argument("--strides", default="1,2,4,8", help="Comma-separated strides to try")
+    parser.add_argument("--io-workers", type=int, default=0, help="Decode threads")
+    args = parser.parse_args()
+
+    meta = load_metadata(args.dataset)
+    strides = [int(part) for part in args.strides.split(",") if part.strip()]
+    started = time.perf_counter()
+    reference = _full_resolution(args.dataset, meta.depth_scale, args.threshold)
+    baseline = time.perf_counter() - started
+    print(f"full resolution: {len(reference)} keyframes in {baseline:.2f}s")
+    previous, flicker = _previous_scorer(args.dataset, meta.depth_scale, args.threshold)
+    print(
+        f"previous float32 scorer: {len(previous)} keyframes "
+        f"({flicker:.1%} of pixels gain or lose depth per frame)"
+    )
+    print(
+        f"{'stride':>6} {'keyframes':>9} {'cold s':>7} {'warm s':>7} {'speedup':>8} "
+        f"{'exact':>6} {'+-1':>6} {'prev +-1':>8}"
+    )
+    scratch = Path(tempfile.mkdtemp(prefix="kinect-forge-keyframes-"))
+    try:
+        for stride in strides:
+            shape = thumbnail_shape(meta.intrinsics.width, meta.intrinsics.height, stride)
+            timings = []
+            selected: List[int] = []
+            # Cold builds the thumbnail cache from full decodes; warm reuses it.
+            for _ in range(2):
+                started = time.perf_counter()
+                thumbs = _depth_thumbnails(
+                    open_frames(args.dataset), scratch, stride, shape, "bench", args.io_workers
+                )
+                selected = _select_keyframes(
+                    thumbs.__getitem__,
+                    list(range(len(thumbs))),
+                    meta.depth_scale,
+                    args.threshold,
+                )
+                timings.append(time.perf_counter() - started)
+            chosen = set(selected)
+            exact = _near_matches(reference, chosen, 0) / max(len(reference), 1)
+            near = _near_matches(reference, chosen, 1) / max(len(reference), 1)
+            near_previous = _near_matches(previous, chosen, 1) / max(len(previous), 1)
+            print(
+                f"{stride:>6} {len(selected):>9} {timings[0]:>7.2f} {timings[1]:>7.2f} "
+                f"{baseline / max(timings[1], 1e-9):>7.1f}x {exact:>6.1%} {near:>6.1%} "
+                f"{near_previous:>8.1%}"
+            )
+    except (RuntimeError, ValueError) as exc:
+        print(f"Benchmark failed: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from kinect_forge.capture import (
+    FramePreprocessor,
+    _apply_color_mask,
+    _apply_depth_mask,
+    _apply_roi,
+)
+from kinect_forge.config import CaptureConfig
+
+Frame = Tuple[np.ndarray, np.ndarray]
+
+
+def _synthetic_frames(count: int, seed: int) -> List[Frame]:
+    rng = np.random.default_rng(seed)
+    _, xx = np.mgrid[0:480, 0:640]
+    frames: List[Frame] = []
+    for idx in range(count):
+        depth = 700 + 300 * np.sin(xx / 50.0 + idx * 0.2) + rng.integers(0, 8, (480, 640))
+        depth = depth.astype(np.uint16)
+        depth[rng.random((480, 640)) < 0.05] = 0
+        color = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+        frames.append((color, depth))
+    return frames
+
+
+def _dataset_frames(root: Path, count: int) -> List[Frame]:
+    from kinect_forge.dataset import open_frames
+
+    store = open_frames(root)
+    frames: List[Frame] = []
+    for idx in range(min(count, len(store))):
+        frames.append((np.array(store.read_color(idx)), np.array(store.read_depth(idx))))
+    if not frames:
+        print(f"No frames found in {root}", file=sys.stderr)
+        raise SystemExit(1)
+    return frames
+
+
+def _chain(config: CaptureConfig) -> Callable[[np.ndarray, np.ndarray], Frame]:
+    def run(color: np.ndarray, depth: np.ndarray) -> Frame:
+        color, depth = _apply_depth_mask(
+            color,
+            depth,
+            config.depth_min,
+            config.depth_max,
+            config.depth_scale,
+            config.mask_background,
+        )
+        color, depth = _apply_roi(
+            color, depth, config.roi_x, config.roi_y, config.roi_w, config.roi_h
+        )
+        if config.color_mask:
+            color, depth = _apply_color_mask(color, depth, config.hsv_lower, config.hsv_upper)
+        return color, depth
+
+    return run
+
+
+def _fused(config: CaptureConfig) -> Callable[[np.ndarray, np.ndarray], Frame]:
+    preprocessor = FramePreprocessor(config)
+
+    def run(color: np.ndarray, depth: np.ndarray) -> Frame:
+        masked = preprocessor.process(color, depth)
+        preprocessor.release(masked)
+        return masked.color, masked.depth
+
+    return run
+
+
+def _measure(
+    label: str, fn: Callable[[np.ndarray, np.ndarray], Frame], frames: List[Frame], repeat: int
+) -> None:
+    fn(*frames[0])
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for color, depth in frames:
+            fn(color, depth)
+    per_frame_ms = (time.perf_counter() - start) * 1000.0 / (repeat * len(frames))
+
+    tracemalloc.start()
+    transient: List[int] = []
+    for color, depth in frames:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn(color, depth)
+        _, peak = tracemalloc.get_traced_memory()
+        transient.append(peak - baseline)
+    tracemalloc.stop()
+    print(
+        f"{label:>6}: {per_frame_ms:7.3f} ms/frame, "
+        f"{np.mean(transient) / 1e6:6.2f} MB allocated/frame (peak)"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the capture masking chain against FramePreprocessor."
+    )
+    parser.add_argument("--dataset", type=Path, help="Dataset to read frames from")
+    parser.add_argument("--frames", type=int, default=30, help="Frames per pass")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes")
+    parser.add_argument("--roi", default="100,80,400,320", help="ROI x,y,w,h or empty")
+    parser.add_argument("--color-mask", action="store_true", help="Enable HSV masking")
+    parser.add_argument(
+        "--no-mask-background", action="store_true", help="Keep color outside the depth range"
+    )
+    args = parser.parse_args()
+
+    roi = [int(p) for p in args.roi.split(",")] if args.roi else [0, 0, 0, 0]
+    config = CaptureConfig(
+        depth_min=0.5,
+        depth_max=0.9,
+        mask_background=not args.no_mask_background,
+        roi_x=roi[0],
+        roi_y=roi[1],
+        roi_w=roi[2],
+        roi_h=roi[3],
+        color_mask=args.color_mask,
+        hsv_lower=(0, 40, 40),
+        hsv_upper=(120, 255, 255),
+    )
+    if args.dataset is not None:
+        frames = _dataset_frames(args.dataset, args.frames)
+    else:
+        frames = _synthetic_frames(args.frames, seed=0)
+
+    chain = _chain(config)
+    fused = _fused(config)
+    for color, depth in frames:
+        expected = chain(color, depth)
+        actual = fused(color, depth)
+        if not (np.array_equal(expected[0], actual[0]) and np.array_equal(expected[1], actual[1])):
+            print("Fused output differs from the masking chain.", file=sys.stderr)
+            return 1
+    print(f"Outputs identical on {len(frames)} frames.")
+    _measure("chain", chain, frames, args.repeat)
+    _measure("fused", fused, frames, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
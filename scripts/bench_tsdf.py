@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from kinect_forge.config import ReconstructionConfig
+from kinect_forge.dataset import load_metadata, open_frames
+from kinect_forge.integration import TSDF_BACKENDS, create_integrator
+from kinect_forge.odometry import chain_poses, odometry_pair, pinhole, rgbd_from_arrays
+from kinect_forge.presets import reconstruction_preset
+from kinect_forge.trajectory import read_trajectory_log
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    scale = 1 << 20 if sys.platform == "darwin" else 1 << 10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _integrate(
+    root: Path,
+    config: ReconstructionConfig,
+    indices: List[int],
+    poses: List[np.ndarray],
+    queue: "multiprocessing.Queue[Dict[str, Any]]",
+) -> None:
+    """Runs in a fresh process so peak RSS covers only one backend."""
+    meta = load_metadata(root)
+    frames = open_frames(root)
+    depth_trunc = config.depth_trunc if config.depth_trunc > 0 else meta.depth_trunc
+    baseline = _peak_rss_mb()
+    integrator = create_integrator(config, meta.intrinsics, meta.depth_scale, depth_trunc)
+    for idx, pose in zip(indices, poses):
+        integrator.integrate(frames.read_color(idx), frames.read_depth(idx), pose)
+    started = time.perf_counter()
+    mesh = integrator.extract_mesh()
+    stats = integrator.stats()
+    queue.put(
+        {
+            "seconds": stats.seconds,
+            "extract": time.perf_counter() - started,
+            "triangles": len(mesh.triangles),
+            "blocks": stats.blocks,
+            "capacity": stats.capacity,
+            "baseline": baseline,
+            "peak": _peak_rss_mb(),
+        }
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare integration time and peak RSS of the TSDF backends."
+    )
+    parser.add_argument("--dataset", type=Path, required=True, help="Recorded dataset")
+    parser.add_argument("--preset", default="small", help="Reconstruction preset")
+    parser.add_argument("--step", type=int, default=2, help="Integrate every Nth frame")
+    parser.add_argument(
+        "--trajectory", type=Path, default=None, help="Camera poses (.log); default: odometry"
+    )
+    parser.add_argument("--tsdf-blocks", type=int, default=0, help="Tensor block budget")
+    args = parser.parse_args()
+
+    try:
+        config = replace(reconstruction_preset(args.preset), tsdf_blocks=args.tsdf_blocks)
+        meta = load_metadata(args.dataset)
+        frames = open_frames(args.dataset)
+        if args.trajectory is not None:
+            indices, poses = read_trajectory_log(args.trajectory)
+        else:
+            indices = list(range(0, len(frames), max(1, args.step)))
+            intrinsic = pinhole(meta.intrinsics)
+            images = [
+                rgbd_from_arrays(
+                    frames.read_color(idx),
+                    frames.read_depth(idx),
+                    meta.depth_scale,
+                    config.depth_trunc,
+                )
+                for idx in indices
+            ]
+            pairs = [
+                odometry_pair(indices[k - 1], indices[k], images[k - 1], images[k], intrinsic)
+                for k in range(1, len(indices))
+            ]
+            poses = chain_poses(pairs)
+        print(f"{len(indices)} frames, preset {args.preset}")
+        print(
+            f"{'backend':>8} {'integrate s':>11} {'extract s':>9} {'triangles':>9} "
+            f"{'blocks':>13} {'peak MB':>8} {'+MB':>7}"
+        )
+        context = multiprocessing.get_context("spawn")
+        for backend in TSDF_BACKENDS:
+            queue: "multiprocessing.Queue[Dict[str, Any]]" = context.Queue()
+            worker = context.Process(
+                target=_integrate,
+                args=(
+                    args.dataset,
+                    replace(config, tsdf_backend=backend),
+                    indices,
+                    poses,
+                    queue,
+                ),
+            )
+            worker.start()
+            result = queue.get()
+            worker.join()
+            blocks = "-"
+            if result["blocks"] is not None:
+                blocks = f"{result['blocks']}/{result['capacity']}"
+            print(
+                f"{backend:>8} {result['seconds']:>11.2f} {result['extract']:>9.2f} "
+                f"{result['triangles']:>9} {blocks:>13} {result['peak']:>8.0f} "
+                f"{result['peak'] - result['baseline']:>7.0f}"
+            )
+    except (OSError, RuntimeError, ValueError) as exc:
+        print(f"Benchmark failed: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
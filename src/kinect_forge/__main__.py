@@ -1,4 +1,8 @@
+import multiprocessing
+
 from kinect_forge.cli import app
 
 if __name__ == "__main__":
+    # Reconstruction worker processes re-enter here in PyInstaller builds.
+    multiprocessing.freeze_support()
     app()
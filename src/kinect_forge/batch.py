@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from kinect_forge.config import ReconstructionConfig
+from kinect_forge.measure import MeshMeasurements, measure_mesh
+from kinect_forge.reconstruct import peak_rss_mb, reconstruct_mesh, reset_peak_rss
+
+# Assumed peak of one reconstruction when no memory budget bounds it.
+DEFAULT_JOB_MB = 1024
+_GLOB_CHARS = set("*?[")
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    dataset: Path
+    mesh: Path
+    ok: bool
+    seconds: float
+    frames: int = 0
+    keyframes: int = 0
+    # Peak RSS of the worker during this dataset (its lifetime peak where the
+    # platform cannot reset it, i.e. outside Linux).
+    peak_rss_mb: int = 0
+    measurements: Optional[MeshMeasurements] = None
+    error: Optional[str] = None
+
+
+def expand_datasets(patterns: Sequence[Path]) -> List[Path]:
+    """Datasets named by paths or glob patterns (`'scans/*'`), in order, without duplicates.
+
+    A pattern keeps only the directories it matches that hold a `metadata.json`;
+    plain paths are kept as given so missing datasets are reported per dataset.
+    """
+    datasets: List[Path] = []
+    for pattern in patterns:
+        if _GLOB_CHARS & set(str(pattern)):
+            matches = sorted(Path(path) for path in glob.glob(str(pattern)))
+            found = [path for path in matches if (path / "metadata.json").is_file()]
+        else:
+            found = [pattern]
+        datasets.extend(path for path in found if path not in datasets)
+    return datasets
+
+
+def is_batch(patterns: Sequence[Path]) -> bool:
+    return len(patterns) > 1 or any(_GLOB_CHARS & set(str(path)) for path in patterns)
+
+
+def available_memory_mb() -> Optional[int]:
+    """Memory the system can give new processes, where it is known (Linux)."""
+    try:
+        for line in Path("/proc/meminfo").read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) >> 10
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def batch_workers(
+    datasets: int, config: ReconstructionConfig, requested: int = 0
+) -> Tuple[int, str]:
+    """Concurrent reconstructions and what limited them.
+
+    `requested` > 0 is used as given (capped at the dataset count). Otherwise
+    one reconstruction runs per core, as long as every one fits in available
+    memory at `config.memory_budget_mb` (or `DEFAULT_JOB_MB`) each.
+    """
+    if requested > 0:
+        return max(1, min(requested, datasets)), "requested"
+    limits = [(os.cpu_count() or 1, "cores"), (max(1, datasets), "datasets")]
+    available = available_memory_mb()
+    if available is not None:
+        job_mb = config.memory_budget_mb or DEFAULT_JOB_MB
+        limits.append((max(1, available // job_mb), f"memory ({job_mb} MB per job)"))
+    return min(limits)
+
+
+def reconstruct_dataset(root: Path, mesh_name: str, config: ReconstructionConfig) -> BatchResult:
+    """Reconstruct and measure one dataset; failures are returned, not raised.
+
+    This is the job of both a batch worker and a `serve` job process.
+    """
+    started = time.perf_counter()
+    mesh_path = root / mesh_name
+    # Batch workers are reused; measure this dataset's peak, not the worker's.
+    reset_peak_rss()
+    try:
+        stats = reconstruct_mesh(root, mesh_path, config)
+        measurements = measure_mesh(mesh_path)
+    except Exception as exc:  # one bad dataset must not stop the batch or the server
+        return BatchResult(
+            root,
+            mesh_path,
+            False,
+            time.perf_counter() - started,
+            peak_rss_mb=peak_rss_mb(),
+            error=f"{type(exc).__name__}: {exc}",
+        )
+    return BatchResult(
+        root,
+        mesh_path,
+        True,
+        time.perf_counter() - started,
+        stats.frames,
+        stats.keyframes,
+        peak_rss_mb(),
+        measurements,
+    )
+
+
+_worker: Optional[Tuple[str, ReconstructionConfig]] = None
+
+
+def _init_worker(mesh_name: str, config: ReconstructionConfig) -> None:
+    global _worker
+    _worker = (mesh_name, config)
+
+
+def _batch_worker(root: Path) -> BatchResult:
+    assert _worker is not None, "worker not initialized"
+    return reconstruct_dataset(root, *_worker)
+
+
+def _run_pool(
+    datasets: Sequence[Path],
+    mesh_name: str,
+    config: ReconstructionConfig,
+    workers: int,
+    report: Callable[[BatchResult], None],
+) -> List[Path]:
+    """Reconstruct on a pool; returns the datasets left unfinished by a crashed worker."""
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(mesh_name, config),
+    ) as pool:
+        futures: Dict["Future[BatchResult]", Path] = {
+            pool.submit(_batch_worker, root): root for root in datasets
+        }
+        unfinished: List[Path] = []
+        for future in as_completed(futures):
+            try:
+                report(future.result())
+            except BrokenProcessPool:
+                unfinished.append(futures[future])
+    return [root for root in datasets if root in unfinished]
+
+
+def reconstruct_batch(
+    datasets: Sequence[Path],
+    mesh_name: str,
+    config: ReconstructionConfig,
+    workers: int,
+    report: Optional[Callable[[BatchResult], None]] = None,
+) -> List[BatchResult]:
+    """Reconstruct and measure every dataset, writing `<dataset>/<mesh_name>`.
+
+    Datasets run on `workers` spawned processes that each import Open3D once
+    and take datasets as they free up; `report` sees every result as it
+    completes. A failing dataset is recorded and the batch goes on. If a worker
+    process dies, the datasets it left unfinished are retried one per pool,
+    and one that kills its worker again is recorded as failed.
+    """
+    results: List[BatchResult] = []
+
+    def collect(result: BatchResult) -> None:
+        results.append(result)
+        if report is not None:
+            report(result)
+
+    crashed = _run_pool(datasets, mesh_name, config, workers, collect)
+    for root in crashed:
+        started = time.perf_counter()
+        if _run_pool([root], mesh_name, config, 1, collect):
+            collect(
+                BatchResult(
+                    root,
+                    root / mesh_name,
+                    False,
+                    time.perf_counter() - started,
+                    error="worker process crashed",
+                )
+            )
+    order = {root: pos for pos, root in enumerate(datasets)}
+    return sorted(results, key=lambda result: order[result.dataset])
+
+
+_CSV_FIELDS = [
+    "dataset",
+    "status",
+    "mesh",
+    "frames",
+    "keyframes",
+    "seconds",
+    "peak_rss_mb",
+    "aabb_x",
+    "aabb_y",
+    "aabb_z",
+    "obb_x",
+    "obb_y",
+    "obb_z",
+    "volume",
+    "error",
+]
+
+
+def write_batch_report(
+    path: Path, results: Sequence[BatchResult], config: ReconstructionConfig, workers: int
+) -> Tuple[Path, Path]:
+    """Write `path` with `.csv` and `.json` suffixes; returns both paths."""
+    csv_path, json_path = path.with_suffix(".csv"), path.with_suffix(".json")
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with csv_path.open("w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(_CSV_FIELDS)
+        for result in results:
+            dims = ["", "", "", "", "", "", ""]
+            if result.measurements is not None:
+                measured = result.measurements
+                volume = "" if measured.volume is None else f"{measured.volume:.9f}"
+                dims = [f"{value:.6f}" for value in measured.axis_aligned + measured.oriented]
+                dims.append(volume)
+            writer.writerow(
+                [
+                    str(result.dataset),
+                    "done" if result.ok else "failed",
+                    str(result.mesh),
+                    result.frames,
+                    result.keyframes,
+                    f"{result.seconds:.3f}",
+                    result.peak_rss_mb,
+                    *dims,
+                    result.error or "",
+                ]
+            )
+    payload = {
+        "preset": config.preset,
+        "workers": workers,
+        "datasets": [
+            {
+                "dataset": str(result.dataset),
+                "status": "done" if result.ok else "failed",
+                "mesh": str(result.mesh),
+                "frames": result.frames,
+                "keyframes": result.keyframes,
+                "seconds": result.seconds,
+                "peak_rss_mb": result.peak_rss_mb,
+                "measurements": None
+                if result.measurements is None
+                else asdict(result.measurements),
+                "error": result.error,
+            }
+            for result in results
+        ],
+    }
+    json_path.write_text(json.dumps(payload, indent=2))
+    return csv_path, json_path
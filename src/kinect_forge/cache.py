@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import open3d as o3d
+
+from kinect_forge.container import CONTAINER_FILE, INDEX_FILE
+from kinect_forge.dataset import MANIFEST_FILE, list_frame_pairs
+from kinect_forge.keyframes import THUMBNAIL_FILE, THUMBNAIL_KEY_FILE
+from kinect_forge.odometry import PairResult
+from kinect_forge.trajectory import read_trajectory_log, write_trajectory_log
+from kinect_forge.turntable import TurntableMotionModel
+
+CACHE_DIR = Path("cache")
+STAGE_CACHE_DIR = CACHE_DIR / "stages"
+VOLUME_DIR = CACHE_DIR / "volume"
+# Bump when a stage's output or the way keys are built changes.
+_STAGE_VERSION = 1
+
+
+def dataset_fingerprint(root: Path) -> str:
+    """Hash of what the frames hold: the metadata, the manifest if there is one
+    (it records every frame's timestamps and depth statistics) and each frame
+    file's name, size and modification time. Frames are stat'ed, not read, so
+    checking a fully cached dataset costs no frame I/O."""
+    digest = hashlib.sha1((root / "metadata.json").read_bytes())
+    if (root / CONTAINER_FILE).is_file():
+        paths = [root / INDEX_FILE, root / CONTAINER_FILE]
+    else:
+        paths = [path for pair in list_frame_pairs(root) for path in pair]
+    manifest = root / MANIFEST_FILE
+    if manifest.is_file():
+        digest.update(manifest.read_bytes())
+    for path in paths:
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def stage_key(stage: str, params: Dict[str, Any]) -> str:
+    payload = {"version": _STAGE_VERSION, "stage": stage, **params}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class StagePoses:
+    """Output of the pose stage: keyframe poses and the pairs behind them."""
+
+    indices: List[int]
+    poses: List[np.ndarray]
+    odometry: List[PairResult]
+    registration: List[PairResult]
+    fragments: List[PairResult]
+    turntable: Optional[TurntableMotionModel]
+
+
+@dataclass(frozen=True)
+class StageCacheStats:
+    hits: Tuple[str, ...] = ()
+    misses: Tuple[str, ...] = ()
+
+
+def _pair_to_dict(pair: PairResult) -> Dict[str, Any]:
+    return {
+        "source": pair.source,
+        "target": pair.target,
+        "success": pair.success,
+        "transformation": np.asarray(pair.transformation).tolist(),
+        "fitness": pair.fitness,
+        "rmse": pair.rmse,
+    }
+
+
+def _pair_from_dict(payload: Dict[str, Any]) -> PairResult:
+    return PairResult(
+        int(payload["source"]),
+        int(payload["target"]),
+        bool(payload["success"]),
+        np.array(payload["transformation"], dtype=np.float64),
+        float(payload["fitness"]),
+        float(payload["rmse"]),
+    )
+
+
+class StageCache:
+    """Outputs of the expensive reconstruction stages, kept in the dataset.
+
+    Entries live under `root/cache/stages/<stage>/<key>.json`, where the key
+    hashes every input of the stage, so changing any of them misses instead
+    of reusing a stale result. A disabled cache neither reads nor writes.
+    """
+
+    def __init__(self, root: Path, enabled: bool = True) -> None:
+        self.root = root
+        self.enabled = enabled
+        self._hits: List[str] = []
+        self._misses: List[str] = []
+
+    def load_keyframes(self, key: str) -> Optional[List[int]]:
+        payload = self._load("keyframes", key)
+        if payload is None:
+            return None
+        return [int(idx) for idx in payload["indices"]]
+
+    def save_keyframes(self, key: str, indices: List[int]) -> None:
+        self._save("keyframes", key, {"indices": indices})
+
+    def load_poses(self, key: str) -> Optional[StagePoses]:
+        payload = self._load("poses", key)
+        if payload is None:
+            return None
+        turntable = payload["turntable"]
+        return StagePoses(
+            indices=[int(idx) for idx in payload["indices"]],
+            poses=[np.array(pose, dtype=np.float64) for pose in payload["poses"]],
+            odometry=[_pair_from_dict(pair) for pair in payload["odometry"]],
+            registration=[_pair_from_dict(pair) for pair in payload["registration"]],
+            fragments=[_pair_from_dict(pair) for pair in payload["fragments"]],
+            turntable=None
+            if turntable is None
+            else TurntableMotionModel(
+                np.array(turntable["axis"]), np.array(turntable["center"]), turntable["rate"]
+            ),
+        )
+
+    def save_poses(self, key: str, result: StagePoses) -> None:
+        turntable = None
+        if result.turntable is not None:
+            turntable = {
+                "axis": result.turntable.axis.tolist(),
+                "center": result.turntable.center.tolist(),
+                "rate": result.turntable.rate,
+            }
+        self._save(
+            "poses",
+            key,
+            {
+                "indices": result.indices,
+                "poses": [np.asarray(pose).tolist() for pose in result.poses],
+                "odometry": [_pair_to_dict(pair) for pair in result.odometry],
+                "registration": [_pair_to_dict(pair) for pair in result.registration],
+                "fragments": [_pair_to_dict(pair) for pair in result.fragments],
+                "turntable": turntable,
+            },
+        )
+
+    def load_mesh(self, key: str) -> Optional[o3d.geometry.TriangleMesh]:
+        """The raw (uncleaned) TSDF mesh, so cleanup-only changes skip integration."""
+        path = self.mesh_path(key)
+        if path is None:
+            return None
+        try:
+            mesh = load_mesh(path)
+        except (OSError, ValueError, KeyError):
+            self._misses.append("mesh")
+            return None
+        self._hits.append("mesh")
+        return mesh
+
+    def save_mesh(self, key: str, mesh: o3d.geometry.TriangleMesh) -> None:
+        path = self.mesh_path(key)
+        if path is not None:
+            self._write(path, lambda tmp: save_mesh(tmp, mesh))
+
+    def mesh_path(self, key: str) -> Optional[Path]:
+        if not self.enabled:
+            return None
+        return self.root / STAGE_CACHE_DIR / "mesh" / f"{key}.npz"
+
+    def stats(self) -> StageCacheStats:
+        return StageCacheStats(tuple(self._hits), tuple(self._misses))
+
+    def _path(self, stage: str, key: str) -> Path:
+        return self.root / STAGE_CACHE_DIR / stage / f"{key}.json"
+
+    def _load(self, stage: str, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        try:
+            payload: Dict[str, Any] = json.loads(self._path(stage, key).read_text())
+        except (OSError, ValueError):
+            self._misses.append(stage)
+            return None
+        self._hits.append(stage)
+        return payload
+
+    def _save(self, stage: str, key: str, payload: Dict[str, Any]) -> None:
+        if self.enabled:
+            self._write(self._path(stage, key), lambda tmp: tmp.write_text(json.dumps(payload)))
+
+    def _write(self, path: Path, write: Callable[[Path], Any]) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write(tmp)
+            tmp.replace(path)
+        except OSError:
+            # Read-only datasets still reconstruct; they just recompute next time.
+            tmp.unlink(missing_ok=True)
+
+
+def save_mesh(path: Path, mesh: o3d.geometry.TriangleMesh) -> None:
+    """Store a mesh losslessly (float64 vertices and colors) as `.npz`."""
+    arrays: Dict[str, Any] = {
+        "vertices": np.asarray(mesh.vertices),
+        "triangles": np.asarray(mesh.triangles),
+    }
+    if mesh.has_vertex_colors():
+        arrays["colors"] = np.asarray(mesh.vertex_colors)
+    if mesh.has_vertex_normals():
+        arrays["normals"] = np.asarray(mesh.vertex_normals)
+    with path.open("wb") as handle:
+        np.savez(handle, **arrays)
+
+
+def load_mesh(path: Path) -> o3d.geometry.TriangleMesh:
+    with np.load(path) as data:
+        mesh = o3d.geometry.TriangleMesh(
+            o3d.utility.Vector3dVector(data["vertices"]),
+            o3d.utility.Vector3iVector(data["triangles"]),
+        )
+        if "colors" in data:
+            mesh.vertex_colors = o3d.utility.Vector3dVector(data["colors"])
+        if "normals" in data:
+            mesh.vertex_normals = o3d.utility.Vector3dVector(data["normals"])
+    return mesh
+
+
+@dataclass(frozen=True)
+class VolumeState:
+    """What the saved TSDF volume holds: the dataset frames it covers, its
+    keyframes and poses, and the settings it was integrated with.
+
+    `key` is the stage key of the mesh it was integrated for; appending
+    frames clears it, since no reconstruction produces that volume.
+    """
+
+    frames: int
+    indices: List[int]
+    poses: List[np.ndarray]
+    voxel_length: float
+    sdf_trunc: float
+    key: str = ""
+
+
+def volume_blocks_dir(root: Path) -> Path:
+    return root / VOLUME_DIR / "blocks"
+
+
+def load_volume_state(root: Path) -> Optional[VolumeState]:
+    try:
+        payload = json.loads((root / VOLUME_DIR / "volume.json").read_text())
+        indices, poses = read_trajectory_log(root / VOLUME_DIR / "trajectory.log")
+    except (OSError, ValueError, RuntimeError):
+        return None
+    return VolumeState(
+        int(payload["frames"]),
+        indices,
+        poses,
+        float(payload["voxel_length"]),
+        float(payload["sdf_trunc"]),
+        str(payload.get("key", "")),
+    )
+
+
+def save_volume_state(root: Path, state: VolumeState) -> None:
+    """Record the volume in `volume_blocks_dir` once its blocks are written."""
+    write_trajectory_log(root / VOLUME_DIR / "trajectory.log", state.indices, state.poses)
+    payload = {
+        "frames": state.frames,
+        "voxel_length": state.voxel_length,
+        "sdf_trunc": state.sdf_trunc,
+        "key": state.key,
+    }
+    path = root / VOLUME_DIR / "volume.json"
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(payload, indent=2))
+    tmp.replace(path)
+
+
+def clear_volume_state(root: Path) -> None:
+    """Mark the saved volume invalid while its blocks are rewritten."""
+    (root / VOLUME_DIR / "volume.json").unlink(missing_ok=True)
+
+
+@dataclass(frozen=True)
+class CacheUsage:
+    name: str
+    files: int
+    bytes: int
+
+
+def _cache_areas(root: Path) -> List[Tuple[str, List[Path]]]:
+    areas: List[Tuple[str, List[Path]]] = []
+    cache = root / CACHE_DIR
+    if cache.is_dir():
+        for area in sorted(path for path in cache.iterdir() if path.is_dir()):
+            if area.name == STAGE_CACHE_DIR.name:
+                for stage in sorted(path for path in area.iterdir() if path.is_dir()):
+                    areas.append((f"stages/{stage.name}", [stage]))
+            else:
+                areas.append((area.name, [area]))
+    thumbs = sorted(
+        path
+        for pattern in (THUMBNAIL_FILE, THUMBNAIL_KEY_FILE)
+        for path in root.glob(pattern.format(stride="*"))
+    )
+    if thumbs:
+        areas.append(("thumbnails", thumbs))
+    return areas
+
+
+def cache_usage(root: Path) -> List[CacheUsage]:
+    """Files and bytes of every cache a dataset holds."""
+    usage: List[CacheUsage] = []
+    for name, paths in _cache_areas(root):
+        files = [
+            path
+            for top in paths
+            for path in ([top] if top.is_file() else top.rglob("*"))
+            if path.is_file()
+        ]
+        usage.append(CacheUsage(name, len(files), sum(path.stat().st_size for path in files)))
+    return usage
+
+
+def clear_cache(root: Path, volume: bool = False) -> None:
+    """Delete the caches of a dataset; the next reconstruction rebuilds them.
+
+    The saved TSDF volume (`--keep-volume`) is kept unless `volume` is set:
+    `--append` needs it and no later reconstruction of the appended frames
+    brings it back.
+    """
+    cache = root / CACHE_DIR
+    if volume:
+        shutil.rmtree(cache, ignore_errors=True)
+    elif cache.is_dir():
+        for path in cache.iterdir():
+            if path.name == VOLUME_DIR.name:
+                continue
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+    for pattern in (THUMBNAIL_FILE, THUMBNAIL_KEY_FILE):
+        for path in root.glob(pattern.format(stride="*")):
+            path.unlink(missing_ok=True)
@@ -1,26 +1,48 @@
 from __future__ import annotations
 
+import functools
+import queue
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional, Tuple
 
 import cv2
-import imageio.v3 as iio
 import numpy as np
 
+from kinect_forge.codec import get_codec
 from kinect_forge.config import CaptureConfig, KinectIntrinsics
-from kinect_forge.dataset import DatasetMeta, ensure_dirs, write_metadata
-from kinect_forge.sensors.base import Sensor
+from kinect_forge.container import ContainerWriter
+from kinect_forge.dataset import (
+    DatasetMeta,
+    FrameRecord,
+    ManifestWriter,
+    ensure_dirs,
+    resolve_codecs,
+    write_frame_images,
+    write_metadata,
+)
+from kinect_forge.keyframes import DepthChangeDetector
+from kinect_forge.sensors.base import RGBDFrame, Sensor, SensorExhausted
 
+if TYPE_CHECKING:
+    # Live reconstruction pulls in Open3D; only `--live` captures load it.
+    from kinect_forge.live import LiveReconstructor, LiveResult
 
-def _write_color(path: Path, color: np.ndarray) -> None:
-    iio.imwrite(path, color, extension=".png")
 
+# (index among frames read, monotonic read time, frame)
+ReadFrame = Tuple[int, float, RGBDFrame]
 
-def _write_depth(path: Path, depth: np.ndarray) -> None:
-    if depth.dtype != np.uint16:
-        depth = depth.astype(np.uint16)
-    iio.imwrite(path, depth, extension=".png")
+
+@dataclass
+class CaptureStats:
+    frames_read: int = 0
+    frames_saved: int = 0
+    frames_dropped: int = 0
+    elapsed_seconds: float = 0.0
+    live: Optional[LiveResult] = None
 
 
 def _apply_depth_mask(
@@ -74,6 +96,350 @@ def _apply_color_mask(
     return color_masked, depth_masked
 
 
+@dataclass(frozen=True)
+class MaskedFrame:
+    color: np.ndarray
+    depth: np.ndarray
+    slot: int
+
+
+class FramePreprocessor:
+    """Fused depth/ROI/color masking into reusable output buffers.
+
+    Produces the same pixels as `_apply_depth_mask`, `_apply_roi` and
+    `_apply_color_mask` applied in sequence, but computes one keep-mask per
+    frame and writes into preallocated buffers. Output buffers come from a
+    pool of `slots`; callers hand them back with `release` once the frame
+    has been written or discarded.
+    """
+
+    def __init__(self, config: CaptureConfig, slots: int = 1) -> None:
+        self._config = config
+        self._slots = max(1, slots)
+        # Evaluate the float32 comparisons of _apply_depth_mask once for every uint16
+        # value; the accepted values form one contiguous range of raw depth units.
+        depth_m = np.arange(65536, dtype=np.uint32).astype(np.float32) / config.depth_scale
+        accepted = np.flatnonzero((depth_m >= config.depth_min) & (depth_m <= config.depth_max))
+        self._depth_range: Optional[tuple[int, int]] = None
+        if accepted.size:
+            self._depth_range = (int(accepted[0]), int(accepted[-1]))
+        self._hsv_lower = np.array(config.hsv_lower, dtype=np.uint8)
+        self._hsv_upper = np.array(config.hsv_upper, dtype=np.uint8)
+        self._shape: Optional[tuple[tuple[int, ...], tuple[int, ...]]] = None
+        self._free: "queue.Queue[int]" = queue.Queue()
+        self._colors: list[np.ndarray] = []
+        self._depths: list[np.ndarray] = []
+        self._roi_keep: Optional[np.ndarray] = None
+        self._depth_keep = np.empty(0, dtype=bool)
+        self._depth_upper = np.empty(0, dtype=bool)
+        self._color_keep = np.empty(0, dtype=bool)
+        self._hsv = np.empty(0, dtype=np.uint8)
+        self._hsv_keep = np.empty(0, dtype=np.uint8)
+
+    def process(self, color: np.ndarray, depth: np.ndarray) -> MaskedFrame:
+        self._ensure_buffers(color, depth)
+        config = self._config
+        has_color_keep = False
+        if self._roi_keep is not None:
+            np.copyto(self._color_keep, self._roi_keep)
+            has_color_keep = True
+        if config.color_mask:
+            cv2.cvtColor(color, cv2.COLOR_RGB2HSV, dst=self._hsv)
+            cv2.inRange(self._hsv, self._hsv_lower, self._hsv_upper, dst=self._hsv_keep)
+            if has_color_keep:
+                np.logical_and(self._color_keep, self._hsv_keep, out=self._color_keep)
+            else:
+                np.not_equal(self._hsv_keep, 0, out=self._color_keep)
+                has_color_keep = True
+
+        depth_keep = self._depth_keep
+        if depth.dtype != np.uint16:
+            depth_m = depth.astype(np.float32) / config.depth_scale
+            np.logical_and(
+                depth_m >= config.depth_min, depth_m <= config.depth_max, out=depth_keep
+            )
+        elif self._depth_range is None:
+            depth_keep.fill(False)
+        else:
+            np.greater_equal(depth, self._depth_range[0], out=depth_keep)
+            np.less_equal(depth, self._depth_range[1], out=self._depth_upper)
+            np.logical_and(depth_keep, self._depth_upper, out=depth_keep)
+        if has_color_keep:
+            np.logical_and(depth_keep, self._color_keep, out=depth_keep)
+
+        slot = self._free.get()
+        color_out = self._colors[slot]
+        depth_out = self._depths[slot]
+        if config.mask_background:
+            np.multiply(color, depth_keep[..., None], out=color_out)
+        elif has_color_keep:
+            np.multiply(color, self._color_keep[..., None], out=color_out)
+        else:
+            np.copyto(color_out, color)
+        np.multiply(depth, depth_keep, out=depth_out)
+        return MaskedFrame(color=color_out, depth=depth_out, slot=slot)
+
+    def release(self, frame: MaskedFrame) -> None:
+        self._free.put(frame.slot)
+
+    def _ensure_buffers(self, color: np.ndarray, depth: np.ndarray) -> None:
+        shape = (color.shape, depth.shape)
+        if shape == self._shape:
+            return
+        if self._shape is not None and self._free.qsize() != self._slots:
+            raise RuntimeError("Frame size changed while masked frames are still in use.")
+        self._shape = shape
+        self._colors = [np.empty_like(color) for _ in range(self._slots)]
+        self._depths = [np.empty_like(depth) for _ in range(self._slots)]
+        self._free = queue.Queue()
+        for slot in range(self._slots):
+            self._free.put(slot)
+        height, width = depth.shape[:2]
+        self._depth_keep = np.empty((height, width), dtype=bool)
+        self._depth_upper = np.empty((height, width), dtype=bool)
+        self._color_keep = np.empty((height, width), dtype=bool)
+        self._hsv = np.empty_like(color)
+        self._hsv_keep = np.empty((height, width), dtype=np.uint8)
+        self._roi_keep = None
+        config = self._config
+        if config.roi_w > 0 and config.roi_h > 0:
+            x0 = max(config.roi_x, 0)
+            y0 = max(config.roi_y, 0)
+            x1 = min(x0 + config.roi_w, color.shape[1])
+            y1 = min(y0 + config.roi_h, color.shape[0])
+            self._roi_keep = np.zeros((height, width), dtype=bool)
+            self._roi_keep[y0:y1, x0:x1] = True
+
+
+def _depth_stats(depth: np.ndarray, depth_scale: float) -> Tuple[float, float]:
+    """Return the valid-pixel ratio and mean valid depth in meters."""
+    valid = int(np.count_nonzero(depth))
+    if valid == 0:
+        return 0.0, 0.0
+    total = int(depth.sum(dtype=np.uint64))
+    return valid / depth.size, total / valid / depth_scale
+
+
+def _sensor_release(sensor: Sensor) -> Callable[[RGBDFrame], None]:
+    """Return the sensor's buffer release hook, or a no-op for sensors without a pool."""
+    release: Optional[Callable[[RGBDFrame], None]] = getattr(sensor, "release", None)
+    if callable(release):
+        return release
+    return lambda frame: None
+
+
+class _FrameReader:
+    """Pull frames from the sensor into a bounded queue on a dedicated thread."""
+
+    def __init__(
+        self,
+        sensor: Sensor,
+        queue_size: int,
+        frame_period: float,
+        max_frames: int,
+        release: Callable[[RGBDFrame], None],
+    ) -> None:
+        self._sensor = sensor
+        self._release = release
+        self._queue: "queue.Queue[Optional[ReadFrame]]" = queue.Queue(
+            maxsize=max(1, queue_size)
+        )
+        self._frame_period = frame_period
+        self._max_frames = max_frames
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="kinect-forge-reader", daemon=True)
+        self.read = 0
+        self.dropped = 0
+        self.error: Optional[BaseException] = None
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        while self._thread.is_alive():
+            self._drain()
+            self._thread.join(timeout=0.05)
+        self._drain()
+
+    def frames(self) -> Iterator[ReadFrame]:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                if self.error is not None:
+                    raise RuntimeError(f"Sensor read failed: {self.error}") from self.error
+                return
+            yield item
+
+    def _drain(self) -> None:
+        try:
+            while True:
+                item = self._queue.get_nowait()
+                if item is not None:
+                    self._release(item[2])
+        except queue.Empty:
+            pass
+
+    def _run(self) -> None:
+        # Wait at most one frame period for the consumer before dropping a frame;
+        # with no fps target the reader simply blocks (pure backpressure).
+        put_timeout = self._frame_period if self._frame_period > 0 else None
+        last_ts = time.monotonic()
+        try:
+            while not self._stop.is_set() and self.read < self._max_frames:
+                frame = self._sensor.get_frame()
+                item = (self.read, time.monotonic(), frame)
+                self.read += 1
+                try:
+                    self._queue.put(item, timeout=put_timeout)
+                except queue.Full:
+                    self._release(frame)
+                    self.dropped += 1
+                if self._frame_period > 0:
+                    elapsed = time.monotonic() - last_ts
+                    if elapsed < self._frame_period:
+                        time.sleep(self._frame_period - elapsed)
+                    last_ts = time.monotonic()
+        except SensorExhausted:
+            pass
+        except BaseException as exc:  # surfaced to the consumer via frames()
+            self.error = exc
+        finally:
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+
+class _FrameWriter:
+    """Write frame pairs inline or on a bounded pool of worker threads."""
+
+    def __init__(
+        self,
+        write_fn: Callable[[int, np.ndarray, np.ndarray], None],
+        workers: int,
+        max_pending: int,
+    ) -> None:
+        self._write_fn = write_fn
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+        if workers > 0:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="kinect-forge-writer"
+            )
+
+    def submit(
+        self,
+        index: int,
+        color: np.ndarray,
+        depth: np.ndarray,
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self._raise_pending()
+        if self._executor is None:
+            try:
+                self._write_fn(index, color, depth)
+            finally:
+                if on_done is not None:
+                    on_done()
+            return
+        # Blocks the capture loop once max_pending writes are in flight.
+        self._slots.acquire()
+        future = self._executor.submit(self._write_fn, index, color, depth)
+        future.add_done_callback(lambda f: self._done(f, on_done))
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._raise_pending()
+
+    def _done(self, future: "Future[None]", on_done: Optional[Callable[[], None]]) -> None:
+        self._slots.release()
+        if on_done is not None:
+            on_done()
+        exc = future.exception()
+        if exc is not None:
+            with self._lock:
+                if self._error is None:
+                    self._error = exc
+
+    def _raise_pending(self) -> None:
+        with self._lock:
+            exc = self._error
+        if exc is not None:
+            raise RuntimeError(f"Failed to write frame: {exc}") from exc
+
+
+class _FolderSink:
+    def __init__(self, root: Path, color_codec: str, depth_codec: str) -> None:
+        self._color_dir, self._depth_dir = ensure_dirs(root)
+        self._color_codec = get_codec(color_codec)
+        self._depth_codec = get_codec(depth_codec)
+
+    def write(self, index: int, color: np.ndarray, depth: np.ndarray) -> None:
+        write_frame_images(
+            self._color_dir,
+            self._depth_dir,
+            index,
+            color,
+            depth,
+            self._color_codec,
+            self._depth_codec,
+        )
+
+    def close(self) -> None:
+        return None
+
+
+class _ContainerSink:
+    """Append frames to a container; opened lazily once the frame size is known."""
+
+    def __init__(self, root: Path, color_codec: str, depth_codec: str) -> None:
+        self._root = root
+        self._codecs = (color_codec, depth_codec)
+        self._writer: Optional[ContainerWriter] = None
+
+    def write(self, index: int, color: np.ndarray, depth: np.ndarray) -> None:
+        if self._writer is None:
+            height, width = depth.shape[:2]
+            self._writer = ContainerWriter(
+                self._root, width, height, *self._codecs, channels=color.shape[2]
+            )
+            if len(self._writer):
+                raise RuntimeError(f"Output already holds a frame container: {self._root}")
+        if index != len(self._writer):
+            raise RuntimeError("Container frames must be appended in order.")
+        self._writer.append(color, depth)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _paced_frames(
+    sensor: Sensor, config: CaptureConfig, stats: CaptureStats
+) -> Iterator[ReadFrame]:
+    frame_period = 1.0 / config.fps if config.fps > 0 else 0.0
+    last_ts = time.monotonic()
+    while stats.frames_read < config.max_frames_total:
+        try:
+            frame = sensor.get_frame()
+        except SensorExhausted:
+            return
+        item = (stats.frames_read, time.monotonic(), frame)
+        stats.frames_read += 1
+        yield item
+        if frame_period > 0:
+            elapsed = time.monotonic() - last_ts
+            if elapsed < frame_period:
+                time.sleep(frame_period - elapsed)
+            last_ts = time.monotonic()
+
+
 def capture_frames(
     sensor: Sensor,
     output_dir: Path,
@@ -81,11 +447,18 @@ def capture_frames(
     intrinsics: Optional[KinectIntrinsics] = None,
     preview_cb: Optional[Callable[[np.ndarray, np.ndarray], None]] = None,
     tilt_cb: Optional[Callable[[float], None]] = None,
-) -> None:
+    live: Optional[LiveReconstructor] = None,
+) -> CaptureStats:
     if config.mode not in {"standard", "turntable"}:
         raise ValueError("mode must be 'standard' or 'turntable'")
+    if config.frames < 1:
+        raise ValueError("frames must be >= 1")
+    if config.writer_workers < 0:
+        raise ValueError("writer_workers must be >= 0")
+    color_codec, depth_codec = resolve_codecs(
+        config.storage, config.color_codec, config.depth_codec
+    )
     output_dir.mkdir(parents=True, exist_ok=True)
-    color_dir, depth_dir = ensure_dirs(output_dir)
     intrinsics = intrinsics or KinectIntrinsics()
     meta = DatasetMeta(
         intrinsics=intrinsics,
@@ -94,59 +467,107 @@ def capture_frames(
         turntable_model=config.turntable_model,
         turntable_diameter_mm=config.turntable_diameter_mm,
         turntable_rotation_seconds=config.turntable_rotation_seconds,
+        layout=config.storage,
+        color_codec=color_codec,
+        depth_codec=depth_codec,
     )
     write_metadata(output_dir, meta)
 
+    stats = CaptureStats()
+    sink: _FolderSink | _ContainerSink
+    writer_workers = config.writer_workers
+    if config.storage == "container":
+        sink = _ContainerSink(output_dir, color_codec, depth_codec)
+        # Container chunks are appended in capture order by a single writer.
+        writer_workers = min(writer_workers, 1)
+    else:
+        sink = _FolderSink(output_dir, color_codec, depth_codec)
+    manifest = ManifestWriter(output_dir)
+    records: Dict[int, FrameRecord] = {}
+
+    def write_frame(index: int, color: np.ndarray, depth: np.ndarray) -> None:
+        sink.write(index, color, depth)
+        # Recorded only once the frame is on disk.
+        manifest.append(records.pop(index))
+
+    writer = _FrameWriter(write_frame, writer_workers, config.queue_size)
+    # Writers hold at most queue_size masked frames; two more cover the frame
+    # being processed and the one waiting on a writer slot.
+    slots = config.queue_size + 2 if writer_workers > 0 else 1
+    preprocessor = FramePreprocessor(config, slots=slots)
+    reader: Optional[_FrameReader] = None
+    release = _sensor_release(sensor)
+    started = time.monotonic()
+    if live is not None:
+        live.start()
     sensor.start()
     try:
-        for _ in range(config.warmup):
-            _ = sensor.get_frame()
-            time.sleep(0.01)
+        try:
+            for _ in range(config.warmup):
+                release(sensor.get_frame())
+                time.sleep(0.01)
+        except SensorExhausted:
+            pass
+
+        frames: Iterator[ReadFrame]
+        if writer_workers > 0:
+            frame_period = 1.0 / config.fps if config.fps > 0 else 0.0
+            reader = _FrameReader(
+                sensor, config.queue_size, frame_period, config.max_frames_total, release
+            )
+            reader.start()
+            frames = reader.frames()
+        else:
+            frames = _paced_frames(sensor, config, stats)
 
-        frame_period = 1.0 / config.fps if config.fps > 0 else 0.0
-        last_ts = time.monotonic()
         saved = 0
-        total = 0
-        last_saved_depth: Optional[np.ndarray] = None
+        detector = DepthChangeDetector(
+            config.depth_scale,
+            stride=config.change_stride,
+            roi=(config.roi_x, config.roi_y, config.roi_w, config.roi_h),
+        )
         stagnant = 0
         tilt_angle = config.tilt_min
         tilt_dir = 1.0
         next_tilt_at = config.tilt_hold_frames
         if config.tilt_sweep and tilt_cb is not None:
             tilt_cb(tilt_angle)
-        while saved < config.frames and total < config.max_frames_total:
-            total += 1
-            frame = sensor.get_frame()
+        for frame_index, read_at, frame in frames:
             if preview_cb is not None:
                 preview_cb(frame.color, frame.depth)
-            color, depth = _apply_depth_mask(
-                frame.color,
-                frame.depth,
-                config.depth_min,
-                config.depth_max,
-                config.depth_scale,
-                config.mask_background,
-            )
-            color, depth = _apply_roi(
-                color, depth, config.roi_x, config.roi_y, config.roi_w, config.roi_h
-            )
-            if config.color_mask:
-                color, depth = _apply_color_mask(
-                    color, depth, config.hsv_lower, config.hsv_upper
-                )
+            masked = preprocessor.process(frame.color, frame.depth)
+            # Sensor buffers are not referenced past this point.
+            release(frame)
+            color, depth = masked.color, masked.depth
             save_frame = True
-            if config.mode == "turntable" and last_saved_depth is not None:
-                depth_m = depth.astype(np.float32) / config.depth_scale
-                last_m = last_saved_depth.astype(np.float32) / config.depth_scale
-                delta = np.mean(np.abs(depth_m - last_m))
-                save_frame = bool(delta >= config.change_threshold)
+            delta = 0.0
+            if detector.has_reference:
+                delta = detector.delta(depth)
+                if config.mode == "turntable":
+                    save_frame = bool(delta >= config.change_threshold)
 
             if save_frame:
-                color_path = color_dir / f"color_{saved:06d}.png"
-                depth_path = depth_dir / f"depth_{saved:06d}.png"
-                _write_color(color_path, color)
-                _write_depth(depth_path, depth)
-                last_saved_depth = depth
+                detector.set_reference(depth)
+                valid_ratio, mean_depth = _depth_stats(depth, config.depth_scale)
+                records[saved] = FrameRecord(
+                    index=saved,
+                    frame_index=frame_index,
+                    time=read_at - started,
+                    color_timestamp=frame.color_timestamp,
+                    depth_timestamp=frame.depth_timestamp,
+                    tilt=tilt_angle if config.tilt_sweep and tilt_cb is not None else None,
+                    valid_ratio=valid_ratio,
+                    mean_depth=mean_depth,
+                    delta=delta,
+                )
+                if live is not None:
+                    live.submit(saved, color, depth, delta)
+                writer.submit(
+                    saved,
+                    color,
+                    depth,
+                    on_done=functools.partial(preprocessor.release, masked),
+                )
                 saved += 1
                 stagnant = 0
                 if config.tilt_sweep and tilt_cb is not None and saved >= next_tilt_at:
@@ -159,22 +580,42 @@ def capture_frames(
                         tilt_dir = 1.0
                     tilt_cb(tilt_angle)
                     next_tilt_at = saved + max(1, config.tilt_hold_frames)
+                if saved >= config.frames:
+                    break
             elif config.auto_stop and config.mode == "turntable":
-                if last_saved_depth is not None:
-                    depth_m = depth.astype(np.float32) / config.depth_scale
-                    last_m = last_saved_depth.astype(np.float32) / config.depth_scale
-                    delta = np.mean(np.abs(depth_m - last_m))
-                    if delta < config.auto_stop_delta:
-                        stagnant += 1
-                    else:
-                        stagnant = 0
-                    if stagnant >= config.auto_stop_patience:
-                        break
-
-            if frame_period > 0:
-                elapsed = time.monotonic() - last_ts
-                if elapsed < frame_period:
-                    time.sleep(frame_period - elapsed)
-                last_ts = time.monotonic()
+                if delta < config.auto_stop_delta:
+                    stagnant += 1
+                else:
+                    stagnant = 0
+                if stagnant >= config.auto_stop_patience:
+                    break
+            if not save_frame:
+                preprocessor.release(masked)
+        stats.frames_saved = saved
+    except BaseException:
+        if live is not None:
+            live.close()
+        raise
+    finally:
+        if reader is not None:
+            reader.stop()
+            stats.frames_read = reader.read
+            stats.frames_dropped = reader.dropped
+        try:
+            writer.close()
+        finally:
+            sink.close()
+            manifest.close()
+            sensor.stop()
+            stats.elapsed_seconds = time.monotonic() - started
+    try:
+        # `frames_read` marks the capture finished (see `serve.dataset_ready`),
+        # so the live mesh is written first.
+        if live is not None:
+            stats.live = live.finish(output_dir)
     finally:
-        sensor.stop()
+        write_metadata(
+            output_dir,
+            replace(meta, frames_read=stats.frames_read, frames_dropped=stats.frames_dropped),
+        )
+    return stats
@@ -2,21 +2,57 @@ from __future__ import annotations
 
 import json
 import pathlib
-from typing import List, Optional, Tuple
+import signal
+import sys
+import time
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+import open3d as o3d
 import typer
 from rich.console import Console
+from rich.table import Table
 
+from kinect_forge.batch import (
+    BatchResult,
+    batch_workers,
+    expand_datasets,
+    is_batch,
+    reconstruct_batch,
+    write_batch_report,
+)
+from kinect_forge.cache import cache_usage, clear_cache, load_volume_state
 from kinect_forge.calibration import calibrate_intrinsics, save_intrinsics
 from kinect_forge.capture import capture_frames
-from kinect_forge.config import CaptureConfig, ReconstructionConfig
-from kinect_forge.config import KinectIntrinsics
+from kinect_forge.codec import benchmark_codec, get_codec
+from kinect_forge.config import CaptureConfig, KinectIntrinsics, ReconstructionConfig
+from kinect_forge.dataset import convert_dataset, load_metadata, open_frames
+from kinect_forge.export import (
+    GLTF_SUFFIXES,
+    LODLevel,
+    LODTarget,
+    parse_lod_targets,
+    write_lods,
+    write_mesh,
+)
+from kinect_forge.integration import TSDF_BACKENDS
 from kinect_forge.measure import measure_mesh
 from kinect_forge.presets import capture_preset, reconstruction_preset
-from kinect_forge.reconstruct import reconstruct_mesh
-from kinect_forge.sensors.freenect_v1 import FreenectV1Sensor, probe_device, set_tilt_degs
-from kinect_forge.viewer import view_dataset, view_mesh
+from kinect_forge.reconstruct import (
+    append_mesh,
+    cleanup_grid,
+    parse_sweep_values,
+    reconstruct_mesh,
+    reconstruct_sweep,
+)
+from kinect_forge.registration import parse_icp_schedule
+from kinect_forge.sensors import ReplayConfig, ReplaySensor, create_sensor
+from kinect_forge.sensors.freenect_v1 import probe_device, set_tilt_degs
+from kinect_forge.serve import ReconstructionServer, ServeConfig
+from kinect_forge.trajectory import write_trajectory_log
 from kinect_forge.turntable import get_turntable_preset
+from kinect_forge.viewer import view_dataset, view_mesh
 
 app = typer.Typer(add_completion=False)
 console = Console()
@@ -64,11 +100,16 @@ def capture(
     output: pathlib.Path = typer.Option("captures", help="Output directory"),
     frames: int = typer.Option(300, help="Number of RGB-D frames to capture"),
     fps: float = typer.Option(30.0, help="Target capture FPS"),
-    warmup: int = typer.Option(15, help="Warmup frames before recording"),
+    warmup: Optional[int] = typer.Option(
+        None, help="Warmup frames before recording (default 15; 0 with --sensor replay:)"
+    ),
     mode: str = typer.Option("standard", help="Capture mode: standard|turntable"),
     change_threshold: float = typer.Option(
         0.01, help="Turntable depth change threshold (meters)"
     ),
+    change_stride: int = typer.Option(
+        2, help="Pixel stride for turntable change detection (1 = full resolution)"
+    ),
     max_frames_total: int = typer.Option(
         3000, help="Hard stop for total frames read in turntable mode"
     ),
@@ -105,6 +146,45 @@ def capture(
     tilt_max: float = typer.Option(10.0, help="Tilt sweep max angle (deg)"),
     tilt_step: float = typer.Option(5.0, help="Tilt sweep step (deg)"),
     tilt_hold_frames: int = typer.Option(30, help="Frames to hold before next tilt"),
+    writer_workers: int = typer.Option(
+        0, help="Frame writer threads; 0 reads, masks and writes on one thread"
+    ),
+    queue_size: int = typer.Option(
+        16, help="Frames buffered between the sensor reader and the writers"
+    ),
+    storage: str = typer.Option(
+        "png", help="Dataset layout: png (color/ + depth/ folders) | container (frames.kfc)"
+    ),
+    sensor_name: str = typer.Option(
+        "freenect",
+        "--sensor",
+        help=(
+            "Sensor backend: freenect (sync calls) | freenect-async (event loop, buffer pool)"
+            " | replay:<dataset> (no hardware)"
+        ),
+    ),
+    replay_pacing: str = typer.Option(
+        "fps", help="Replay pacing: fast | fps | recorded (manifest timestamps)"
+    ),
+    replay_fps: float = typer.Option(30.0, help="Replay sensor rate for --replay-pacing fps"),
+    replay_loop: bool = typer.Option(False, help="Restart the replay when it ends"),
+    replay_preload: bool = typer.Option(
+        False, help="Decode all replay frames up front so decode time is not measured"
+    ),
+    replay_jitter_ms: float = typer.Option(0.0, help="Random extra delay per replay frame (ms)"),
+    replay_drop_rate: float = typer.Option(0.0, help="Fraction of replay frames to lose"),
+    live: bool = typer.Option(
+        False, help="Reconstruct while capturing; writes model.ply and trajectory.log"
+    ),
+    live_preset: str = typer.Option(
+        "small", help="Reconstruction preset for --live: small|medium|large|small-object|face-scan"
+    ),
+    color_codec: Optional[str] = typer.Option(
+        None, help="Color codec: png[:level]|jpeg[:quality]|zlib[:level]|raw (container only)"
+    ),
+    depth_codec: Optional[str] = typer.Option(
+        None, help="Depth codec: png[:level]|kfd[:level]|zlib[:level]|raw (container only)"
+    ),
 ) -> None:
     """Capture RGB-D frames using Kinect v1 (libfreenect)."""
     if capture_preset_name:
@@ -117,13 +197,36 @@ def capture(
         auto_stop = profile["auto_stop"]
         auto_stop_patience = profile["auto_stop_patience"]
         auto_stop_delta = profile["auto_stop_delta"]
-    sensor = FreenectV1Sensor()
+    try:
+        # The pool covers the reader queue plus frames in flight.
+        sensor = create_sensor(
+            sensor_name,
+            pool_size=queue_size + 4,
+            replay=ReplayConfig(
+                pacing=replay_pacing.lower(),
+                fps=replay_fps,
+                loop=replay_loop,
+                preload=replay_preload,
+                jitter_ms=replay_jitter_ms,
+                drop_rate=replay_drop_rate,
+            ),
+        )
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    replay_sensor = sensor if isinstance(sensor, ReplaySensor) else None
+    if replay_sensor is not None and replay_sensor.root.resolve() == output.resolve():
+        raise typer.BadParameter("Replay source and capture output must differ.")
+    if warmup is None:
+        # A replay has no sensor to settle; skipping its first frames would
+        # only drop recorded data.
+        warmup = 0 if replay_sensor is not None else 15
     config = CaptureConfig(
         frames=frames,
         fps=fps,
         warmup=warmup,
         mode=mode.lower(),
         change_threshold=change_threshold,
+        change_stride=change_stride,
         max_frames_total=max_frames_total,
         depth_min=depth_min,
         depth_max=depth_max,
@@ -175,20 +278,65 @@ def capture(
             "tilt_max": tilt_max,
             "tilt_step": tilt_step,
             "tilt_hold_frames": tilt_hold_frames,
+            "writer_workers": writer_workers,
+            "queue_size": queue_size,
+            "storage": storage.lower(),
+            "color_codec": color_codec,
+            "depth_codec": depth_codec,
         }
     )
 
     def tilt_cb(angle: float) -> None:
         set_tilt_degs(angle)
 
-    capture_frames(sensor, output, config, intrinsics=intrinsics, tilt_cb=tilt_cb if tilt_sweep else None)
-    console.print(f"Capture complete: {frames} frames saved to {output}")
+    if replay_sensor is not None and intrinsics is None:
+        intrinsics = load_metadata(replay_sensor.root).intrinsics
+    live_reconstructor = None
+    if live:
+        from kinect_forge.live import LiveReconstructor
+
+        live_config = replace(
+            reconstruction_preset(live_preset), depth_scale=config.depth_scale
+        )
+        live_reconstructor = LiveReconstructor(intrinsics or KinectIntrinsics(), live_config)
+    stats = capture_frames(
+        sensor,
+        output,
+        config,
+        intrinsics=intrinsics,
+        tilt_cb=tilt_cb if tilt_sweep and replay_sensor is None else None,
+        live=live_reconstructor,
+    )
+    console.print(f"Capture complete: {stats.frames_saved} frames saved to {output}")
+    fps_read = stats.frames_read / stats.elapsed_seconds if stats.elapsed_seconds > 0 else 0.0
+    console.print(
+        f"Frames read: {stats.frames_read} ({fps_read:.1f} fps), "
+        f"dropped: {stats.frames_dropped}"
+    )
+    if replay_sensor is not None and replay_sensor.dropped:
+        console.print(f"Replay frames lost by the drop model: {replay_sensor.dropped}")
+    if stats.live is not None:
+        if stats.live.error is not None:
+            console.print(f"Live reconstruction failed: {stats.live.error}")
+        else:
+            console.print(
+                f"Live mesh saved to {stats.live.mesh_path} "
+                f"({stats.live.frames_integrated} frames integrated, "
+                f"{stats.live.frames_skipped} skipped while busy, "
+                f"ready {stats.live.finish_seconds:.1f}s after capture)"
+            )
 
 
 @app.command()
 def reconstruct(
-    input_dir: pathlib.Path = typer.Option(..., help="Directory with captured frames"),
-    output_mesh: pathlib.Path = typer.Option("model.ply", help="Output mesh file"),
+    input_dir: List[pathlib.Path] = typer.Option(
+        ...,
+        help="Directory with captured frames; repeat it or pass a quoted glob ('scans/*') "
+        "to reconstruct a batch",
+    ),
+    output_mesh: pathlib.Path = typer.Option(
+        "model.ply", help="Output mesh file (in a batch, the file name inside each dataset)"
+    ),
     preset: str = typer.Option(
         "small",
         help="Reconstruction preset: small|medium|large|small-object|face-scan",
@@ -200,6 +348,9 @@ def reconstruct(
     keyframe_threshold: Optional[float] = typer.Option(
         None, help="Depth change threshold for keyframe selection (meters)"
     ),
+    keyframe_stride: int = typer.Option(
+        4, help="Score keyframes on every Nth depth pixel (1 = full resolution)"
+    ),
     icp: Optional[bool] = typer.Option(
         None, "--icp/--no-icp", help="Enable/disable ICP refinement"
     ),
@@ -208,34 +359,467 @@ def reconstruct(
     ),
     icp_voxel: Optional[float] = typer.Option(None, help="ICP voxel downsample size"),
     icp_iterations: Optional[int] = typer.Option(None, help="ICP max iterations"),
+    icp_schedule: Optional[str] = typer.Option(
+        None,
+        help=(
+            "Coarse-to-fine ICP levels 'voxel:distance:iterations,...' "
+            "(default: preset schedule; --icp-voxel/--icp-distance/--icp-iterations use one level)"
+        ),
+    ),
+    icp_workers: int = typer.Option(0, help="Processes for ICP refinement; 0 runs it here"),
+    icp_cache: bool = typer.Option(
+        True, "--icp-cache/--no-icp-cache", help="Reuse ICP clouds cached in the dataset"
+    ),
+    fragment_size: int = typer.Option(
+        0, help="Keyframes per fragment for long scans; 0 poses the whole scan as one chain"
+    ),
+    fragment_overlap: int = typer.Option(5, help="Keyframes shared by neighbouring fragments"),
+    fragment_workers: int = typer.Option(
+        0, help="Processes building fragments; 0 builds them here"
+    ),
+    turntable_prior: bool = typer.Option(
+        True,
+        "--turntable-prior/--no-turntable-prior",
+        help="Seed odometry with the turntable rotation for turntable datasets",
+    ),
+    turntable_fit_frames: int = typer.Option(
+        8, help="Keyframes used to fit the turntable rotation axis"
+    ),
+    tsdf_backend: str = typer.Option(
+        "legacy", help="TSDF integration backend: legacy|tensor"
+    ),
+    tsdf_blocks: int = typer.Option(
+        0, help="Voxel blocks preallocated by the tensor backend (0 = derive from preset)"
+    ),
+    memory_budget: int = typer.Option(
+        0,
+        help=(
+            "Peak memory target in MB for the whole process, of which Open3D alone holds "
+            "about 350 MB; streams frames and spills the TSDF volume to disk to stay under "
+            "it (0 = unbounded)"
+        ),
+    ),
     smooth: Optional[int] = typer.Option(None, help="Mesh smoothing iterations"),
     fill_hole_radius: Optional[float] = typer.Option(
         None, help="Fill holes radius (meters)"
     ),
+    cache_mb: int = typer.Option(512, help="Decoded frame cache size in MB (0 disables)"),
+    cache: bool = typer.Option(
+        True, "--cache/--no-cache", help="Reuse keyframes and poses cached in the dataset"
+    ),
+    import_trajectory: Optional[pathlib.Path] = typer.Option(
+        None, help="Integrate the frames and poses of a .log trajectory instead of estimating them"
+    ),
+    export_trajectory: Optional[pathlib.Path] = typer.Option(
+        None, help="Write the keyframe poses to a .log trajectory"
+    ),
+    keep_volume: bool = typer.Option(
+        False,
+        "--keep-volume",
+        help="Save the tensor TSDF volume in the dataset so later frames can be --append-ed",
+    ),
+    append: bool = typer.Option(
+        False,
+        "--append",
+        help="Integrate only the frames added since the last reconstruction into its saved volume",
+    ),
+    append_from: Optional[pathlib.Path] = typer.Option(
+        None, help="Copy this dataset's frames onto the end of --input-dir, then --append them"
+    ),
+    sweep: bool = typer.Option(
+        False, "--sweep", help="Integrate once and write one mesh per cleanup setting"
+    ),
+    sweep_smooth: Optional[str] = typer.Option(
+        None, help="Smoothing iterations to sweep, e.g. '0,5,10' (default: --smooth)"
+    ),
+    sweep_fill_hole_radius: Optional[str] = typer.Option(
+        None, help="Hole fill radii to sweep, e.g. '0,0.005,0.01' (default: --fill-hole-radius)"
+    ),
+    sweep_workers: int = typer.Option(
+        0, help="Processes cleaning sweep variants; 0 cleans them here"
+    ),
+    lod: Optional[str] = typer.Option(
+        None,
+        help="Extra levels of detail: triangle counts or RMS error bounds, e.g. '100000,1mm'",
+    ),
+    lod_workers: int = typer.Option(0, help="Processes decimating LODs; 0 decimates them here"),
+    lod_single_file: bool = typer.Option(
+        False, "--lod-single-file", help="Write all LODs into one glTF file as separate nodes"
+    ),
+    io_workers: int = typer.Option(
+        0, help="Frame decode threads; 0 decodes on the reconstruction thread"
+    ),
+    read_ahead: int = typer.Option(
+        0, help="Frames decoded ahead of use (default: twice --io-workers)"
+    ),
+    odometry_workers: int = typer.Option(
+        0, help="Processes for pairwise odometry; 0 runs it in this process"
+    ),
+    odometry_chunk: int = typer.Option(16, help="Frame pairs per odometry work unit"),
+    batch_workers: int = typer.Option(
+        0, help="Datasets reconstructed at once in a batch (0 = by cores and free memory)"
+    ),
+    report: pathlib.Path = typer.Option(
+        pathlib.Path("batch_report"), help="Batch report, written as .csv and .json"
+    ),
 ) -> None:
     """Reconstruct a mesh from captured frames."""
     config = reconstruction_preset(preset)
+    if icp_schedule is not None:
+        try:
+            schedule = parse_icp_schedule(icp_schedule)
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc)) from exc
+    elif icp_distance is None and icp_voxel is None and icp_iterations is None:
+        schedule = config.icp_schedule
+    else:
+        schedule = ()
     keyframe_threshold = (
         config.keyframe_threshold if keyframe_threshold is None else keyframe_threshold
     )
+    if tsdf_backend not in TSDF_BACKENDS:
+        raise typer.BadParameter(f"--tsdf-backend must be one of: {', '.join(TSDF_BACKENDS)}")
+    if keep_volume and tsdf_backend != "tensor" and memory_budget == 0:
+        raise typer.BadParameter("--keep-volume needs --tsdf-backend tensor or --memory-budget")
+    try:
+        lod_targets = parse_lod_targets(lod) if lod is not None else ()
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    if lod_targets and sweep:
+        raise typer.BadParameter("--lod cannot be combined with --sweep")
+    if lod_single_file and output_mesh.suffix.lower() not in GLTF_SUFFIXES:
+        raise typer.BadParameter("--lod-single-file needs a .glb or .gltf --output-mesh")
     config = ReconstructionConfig(
         voxel_length=config.voxel_length if voxel_length is None else voxel_length,
         sdf_trunc=config.sdf_trunc if sdf_trunc is None else sdf_trunc,
         depth_scale=config.depth_scale if depth_scale is None else depth_scale,
         depth_trunc=config.depth_trunc if depth_trunc is None else depth_trunc,
         keyframe_threshold=keyframe_threshold,
+        keyframe_stride=keyframe_stride,
         icp_refine=config.icp_refine if icp is None else icp,
         icp_distance=config.icp_distance if icp_distance is None else icp_distance,
         icp_voxel=config.icp_voxel if icp_voxel is None else icp_voxel,
         icp_iterations=config.icp_iterations if icp_iterations is None else icp_iterations,
+        icp_schedule=schedule,
+        icp_workers=icp_workers,
+        icp_cache=icp_cache,
+        fragment_size=fragment_size,
+        fragment_overlap=fragment_overlap,
+        fragment_workers=fragment_workers,
+        turntable_prior=turntable_prior,
+        turntable_fit_frames=turntable_fit_frames,
+        tsdf_backend=tsdf_backend,
+        tsdf_blocks=tsdf_blocks,
+        memory_budget_mb=memory_budget,
         smooth_iterations=config.smooth_iterations if smooth is None else smooth,
         fill_hole_radius=config.fill_hole_radius
         if fill_hole_radius is None
         else fill_hole_radius,
+        lod_targets=lod_targets,
+        lod_workers=lod_workers,
+        lod_single_file=lod_single_file,
         preset=config.preset,
+        stage_cache=cache,
+        keep_volume=keep_volume,
+        cache_mb=cache_mb,
+        io_workers=io_workers,
+        io_read_ahead=read_ahead,
+        odometry_workers=odometry_workers,
+        odometry_chunk=odometry_chunk,
+    )
+    append = append or append_from is not None
+    if append and (sweep or import_trajectory is not None):
+        raise typer.BadParameter("--append cannot be combined with --sweep or --import-trajectory")
+    if is_batch(input_dir):
+        if sweep or append or import_trajectory is not None or export_trajectory is not None:
+            raise typer.BadParameter(
+                "--sweep, --append, --import-trajectory and --export-trajectory "
+                "take one --input-dir"
+            )
+        _reconstruct_batch(input_dir, output_mesh.name, config, batch_workers, report)
+        return
+    dataset = input_dir[0]
+    if sweep:
+        try:
+            variants = cleanup_grid(
+                parse_sweep_values(sweep_smooth or str(config.smooth_iterations), int),
+                parse_sweep_values(
+                    sweep_fill_hole_radius or str(config.fill_hole_radius), float
+                ),
+            )
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc)) from exc
+        try:
+            stats, results = reconstruct_sweep(
+                dataset, output_mesh, config, variants, sweep_workers, import_trajectory
+            )
+        except ValueError as exc:
+            # Settings checked only once running, e.g. a budget below what is in use.
+            raise typer.BadParameter(str(exc)) from exc
+        table = Table(title=f"Cleanup sweep ({len(results)} variants)")
+        table.add_column("Smooth", justify="right")
+        table.add_column("Fill radius", justify="right")
+        table.add_column("Mesh")
+        table.add_column("Triangles", justify="right")
+        table.add_column("Watertight")
+        table.add_column("Seconds", justify="right")
+        for result in results:
+            table.add_row(
+                str(result.variant.smooth_iterations),
+                f"{result.variant.fill_hole_radius:g}",
+                result.path.name,
+                str(result.triangles),
+                "yes" if result.watertight else "no",
+                f"{result.seconds:.2f}",
+            )
+        console.print(table)
+    elif append:
+        try:
+            stats = append_mesh(dataset, output_mesh, config, append_from)
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc)) from exc
+        console.print(f"Mesh written to {output_mesh}")
+        console.print(f"Appended {stats.appended} keyframes to the saved volume")
+        _print_lods(stats.lods)
+    else:
+        try:
+            stats = reconstruct_mesh(dataset, output_mesh, config, import_trajectory)
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc)) from exc
+        console.print(f"Mesh written to {output_mesh}")
+        _print_lods(stats.lods)
+    frame_cache = stats.cache
+    if export_trajectory is not None:
+        write_trajectory_log(export_trajectory, stats.indices, stats.poses)
+        console.print(f"Trajectory written to {export_trajectory}")
+    console.print(
+        f"Keyframes: {stats.keyframes}/{stats.frames}  Frame cache: {frame_cache.hits} hits, "
+        f"{frame_cache.misses} misses, {frame_cache.evictions} evictions"
+    )
+    if stats.stage_cache.hits or stats.stage_cache.misses:
+        console.print(
+            f"Stage cache: reused {', '.join(stats.stage_cache.hits) or 'nothing'}, "
+            f"computed {', '.join(stats.stage_cache.misses) or 'nothing'}"
+        )
+    if stats.turntable is not None:
+        console.print(
+            f"Turntable prior: axis {np.round(stats.turntable.axis, 3).tolist()}, "
+            f"center {np.round(stats.turntable.center, 3).tolist()} m"
+        )
+    if stats.odometry:
+        succeeded = [pair for pair in stats.odometry if pair.success]
+        fitness = sum(pair.fitness for pair in succeeded) / len(succeeded) if succeeded else 0.0
+        console.print(
+            f"Odometry: {len(succeeded)}/{len(stats.odometry)} pairs aligned, "
+            f"mean fitness {fitness:.3f}"
+        )
+    if stats.registration:
+        aligned = [pair for pair in stats.registration if pair.success]
+        fitness = sum(pair.fitness for pair in aligned) / len(aligned) if aligned else 0.0
+        rmse = sum(pair.rmse for pair in aligned) / len(aligned) if aligned else 0.0
+        console.print(
+            f"ICP: {len(aligned)}/{len(stats.registration)} pairs aligned, "
+            f"mean fitness {fitness:.3f}, mean RMSE {rmse * 1000:.2f} mm"
+        )
+    integration = stats.integration
+    blocks = ""
+    if integration.blocks is not None:
+        blocks = f", {integration.blocks}/{integration.capacity} blocks"
+        if integration.capacity != integration.budget:
+            blocks += f" (budget {integration.budget} exceeded)"
+    if integration.spilled or integration.reloaded:
+        blocks += f", {integration.spilled} chunks spilled, {integration.reloaded} reloaded"
+    if "mesh" in stats.stage_cache.hits:
+        console.print(f"TSDF ({integration.backend}): reused the cached raw mesh")
+    else:
+        console.print(
+            f"TSDF ({integration.backend}): {integration.frames} frames in "
+            f"{integration.seconds:.2f}s{blocks}"
+        )
+    if stats.fragments:
+        joined = [pair for pair in stats.fragments if pair.success]
+        fitness = sum(pair.fitness for pair in joined) / len(joined) if joined else 0.0
+        console.print(
+            f"Fragments: {len(stats.fragments) + 1} built, "
+            f"{len(joined)}/{len(stats.fragments)} joins registered, mean fitness {fitness:.3f}"
+        )
+
+
+def _reconstruct_batch(
+    patterns: List[pathlib.Path],
+    mesh_name: str,
+    config: ReconstructionConfig,
+    requested: int,
+    report: pathlib.Path,
+) -> None:
+    datasets = expand_datasets(patterns)
+    if not datasets:
+        raise typer.BadParameter("No datasets match --input-dir")
+    workers, limit = batch_workers(len(datasets), config, requested)
+    console.print(f"Reconstructing {len(datasets)} datasets on {workers} workers ({limit})")
+    started = time.perf_counter()
+    finished = 0
+
+    def progress(result: BatchResult) -> None:
+        nonlocal finished
+        finished += 1
+        prefix = f"[{finished}/{len(datasets)}]"
+        if not result.ok:
+            console.print(f"{prefix} [red]failed[/red] {result.dataset}: {result.error}")
+            return
+        dims = ""
+        if result.measurements is not None:
+            values = ", ".join(f"{value:.4f}" for value in result.measurements.axis_aligned)
+            dims = f", dimensions (m) {values}"
+        console.print(
+            f"{prefix} [green]done[/green] {result.dataset} in {result.seconds:.1f}s, "
+            f"{result.keyframes}/{result.frames} keyframes, peak {result.peak_rss_mb} MB{dims}"
+        )
+
+    results = reconstruct_batch(datasets, mesh_name, config, workers, progress)
+    csv_path, json_path = write_batch_report(report, results, config, workers)
+    failed = sum(1 for result in results if not result.ok)
+    console.print(
+        f"{len(results) - failed}/{len(results)} datasets reconstructed in "
+        f"{time.perf_counter() - started:.1f}s; report written to {csv_path} and {json_path}"
     )
-    reconstruct_mesh(input_dir, output_mesh, config)
-    console.print(f"Mesh written to {output_mesh}")
+    if failed:
+        raise typer.Exit(code=1)
+
+
+def _print_lods(levels: List[LODLevel]) -> None:
+    for level in levels[1:]:
+        where = level.path.name if level.node is None else f"{level.path.name}#{level.node}"
+        console.print(
+            f"LOD {level.level}: {level.triangles} triangles, RMS error "
+            f"{level.error * 1000:.2f} mm, {level.seconds:.2f}s -> {where}"
+        )
+
+
+@app.command()
+def export(
+    mesh: pathlib.Path = typer.Option(..., help="Mesh to export"),
+    output: pathlib.Path = typer.Option(..., help="Output mesh file (.ply, .obj, .glb, ...)"),
+    lod: Optional[str] = typer.Option(
+        None,
+        help="Extra levels of detail: triangle counts or RMS error bounds, e.g. '100000,1mm'",
+    ),
+    lod_workers: int = typer.Option(0, help="Processes decimating LODs; 0 decimates them here"),
+    single_file: bool = typer.Option(
+        False, "--single-file", help="Write all LODs into one glTF file as separate nodes"
+    ),
+) -> None:
+    """Convert a mesh to another format, optionally with levels of detail."""
+    try:
+        targets = [LODTarget(*target) for target in parse_lod_targets(lod or "")]
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    source = o3d.io.read_triangle_mesh(str(mesh))
+    if source.is_empty():
+        raise typer.BadParameter(f"Could not read a mesh from {mesh}")
+    if not targets:
+        write_mesh(output, source)
+        console.print(f"Mesh written to {output}")
+        return
+    try:
+        levels = write_lods(output, source, targets, lod_workers, single_file)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    console.print(f"Mesh written to {output} ({levels[0].triangles} triangles)")
+    _print_lods(levels)
+
+
+@app.command()
+def convert(
+    input_dir: pathlib.Path = typer.Option(..., help="Dataset to convert"),
+    output_dir: pathlib.Path = typer.Option(..., help="Directory for the converted dataset"),
+    layout: str = typer.Option("container", help="Target layout: png|container"),
+    color_codec: Optional[str] = typer.Option(
+        None, help="Color codec (default: raw for container, png for folders)"
+    ),
+    depth_codec: Optional[str] = typer.Option(
+        None, help="Depth codec (default: raw for container, png for folders)"
+    ),
+) -> None:
+    """Convert a dataset between image folders and a frame container."""
+    count = convert_dataset(
+        input_dir, output_dir, layout.lower(), color_codec=color_codec, depth_codec=depth_codec
+    )
+    console.print(f"Converted {count} frames to {layout} layout in {output_dir}")
+
+
+@app.command("bench-codecs")
+def bench_codecs(
+    input_dir: pathlib.Path = typer.Option(..., help="Dataset to read frames from"),
+    frames: int = typer.Option(20, help="Frames to encode per codec"),
+    color_codecs: str = typer.Option(
+        "png:1,png:3,jpeg:95,zlib:1", help="Comma-separated color codecs"
+    ),
+    depth_codecs: str = typer.Option(
+        "png:1,png:3,kfd:0,kfd:1,zlib:1", help="Comma-separated depth codecs"
+    ),
+) -> None:
+    """Report codec encode/decode throughput and size ratios on a dataset."""
+    store = open_frames(input_dir)
+    count = min(frames, len(store))
+    if count == 0:
+        raise typer.BadParameter("No frames found in the dataset.")
+    samples = {
+        "color": [np.array(store.read_color(idx)) for idx in range(count)],
+        "depth": [np.array(store.read_depth(idx)) for idx in range(count)],
+    }
+    table = Table(title=f"Codecs on {count} frames")
+    table.add_column("Kind")
+    table.add_column("Codec")
+    table.add_column("Encode MB/s", justify="right")
+    table.add_column("Decode MB/s", justify="right")
+    table.add_column("Ratio", justify="right")
+    table.add_column("Max error", justify="right")
+    for kind, specs in (("color", color_codecs), ("depth", depth_codecs)):
+        for spec in filter(None, (part.strip() for part in specs.split(","))):
+            try:
+                codec = get_codec(spec, kind)
+            except ValueError as exc:
+                raise typer.BadParameter(str(exc)) from exc
+            result = benchmark_codec(codec, kind, samples[kind])
+            table.add_row(
+                kind,
+                result.codec,
+                f"{result.encode_mb_s:.0f}",
+                f"{result.decode_mb_s:.0f}",
+                f"{result.ratio:.1f}x",
+                str(result.max_error),
+            )
+    console.print(table)
+
+
+@app.command("cache-stats")
+def cache_stats(
+    input_dir: pathlib.Path = typer.Option(..., help="Dataset to inspect"),
+    clear: bool = typer.Option(
+        False, "--clear", help="Delete the caches after reporting, except the saved TSDF volume"
+    ),
+    clear_volume: bool = typer.Option(
+        False, "--clear-volume", help="With --clear, also delete the volume --append needs"
+    ),
+) -> None:
+    """Report the caches a dataset holds (stage outputs, ICP clouds, thumbnails)."""
+    usage = cache_usage(input_dir)
+    table = Table(title=f"Caches in {input_dir}")
+    table.add_column("Cache")
+    table.add_column("Files", justify="right")
+    table.add_column("MB", justify="right")
+    for entry in usage:
+        table.add_row(entry.name, str(entry.files), f"{entry.bytes / (1 << 20):.1f}")
+    total = sum(entry.bytes for entry in usage)
+    table.add_row("total", str(sum(entry.files for entry in usage)), f"{total / (1 << 20):.1f}")
+    console.print(table)
+    if clear:
+        clear_cache(input_dir, volume=clear_volume)
+        if not clear_volume and load_volume_state(input_dir) is not None:
+            console.print("Caches cleared; the saved TSDF volume was kept (--clear-volume).")
+        else:
+            console.print("Caches cleared.")
 
 
 @app.command()
@@ -260,6 +844,66 @@ def measure(
         console.print(f"Volume (m^3): {measurements.volume:.6f}")
 
 
+def _report_job(root: pathlib.Path, status: Dict[str, Any]) -> None:
+    state = status["state"]
+    if state == "done":
+        dims = ", ".join(f"{value:.4f}" for value in status["measurements"]["axis_aligned"])
+        console.print(
+            f"[green]done[/green] {root.name}: {status['mesh']} in {status['seconds']:.1f}s, "
+            f"{status['keyframes']}/{status['frames']} keyframes, dimensions (m) {dims}"
+        )
+    elif state == "failed":
+        console.print(f"[red]failed[/red] {root.name}: {status['error']}")
+    else:
+        console.print(f"{state} {root.name}")
+
+
+@app.command()
+def serve(
+    watch_dir: pathlib.Path = typer.Option(..., help="Directory that captures are dropped into"),
+    preset: str = typer.Option(
+        "small",
+        help="Reconstruction preset: small|medium|large|small-object|face-scan",
+    ),
+    workers: int = typer.Option(1, help="Datasets reconstructed at the same time"),
+    job_timeout: float = typer.Option(0.0, help="Seconds before a job is killed (0 = no limit)"),
+    job_memory: int = typer.Option(
+        0, help="MB of memory per job; it plans within 3/4 and is killed above (0 = no limit)"
+    ),
+    settle: float = typer.Option(5.0, help="Seconds a finished capture must stay unchanged"),
+    poll: float = typer.Option(2.0, help="Seconds between scans of the watch directory"),
+    mesh_name: str = typer.Option("model.ply", help="Mesh file written into each dataset"),
+    retry_failed: bool = typer.Option(
+        False, "--retry-failed", help="Run failed datasets again instead of skipping them"
+    ),
+    once: bool = typer.Option(
+        False, "--once", help="Exit once every ready dataset has been processed"
+    ),
+) -> None:
+    """Reconstruct and measure every finished capture dropped into a directory."""
+    config = ServeConfig(
+        watch_dir=watch_dir,
+        workers=workers,
+        poll_seconds=poll,
+        settle_seconds=settle,
+        job_timeout=job_timeout,
+        job_memory_mb=job_memory,
+        mesh_name=mesh_name,
+        retry_failed=retry_failed,
+    )
+    try:
+        server = ReconstructionServer(config, reconstruction_preset(preset), _report_job)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    # Stop jobs on SIGTERM too, so they rerun on the next start.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    console.print(f"Watching {watch_dir} with {workers} worker(s); Ctrl+C stops.")
+    try:
+        server.run(once)
+    except KeyboardInterrupt:
+        console.print("Stopped; interrupted jobs run again on the next start.")
+
+
 @app.command()
 def calibrate(
     images: List[pathlib.Path] = typer.Option(
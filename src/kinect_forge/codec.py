@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+COLOR = "color"
+DEPTH = "depth"
+
+
+class FrameCodec(Protocol):
+    @property
+    def name(self) -> str:
+        ...
+
+    @property
+    def extension(self) -> str:
+        ...
+
+    @property
+    def kinds(self) -> Tuple[str, ...]:
+        ...
+
+    @property
+    def lossless(self) -> bool:
+        ...
+
+    def encode(self, array: np.ndarray) -> bytes:
+        ...
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        ...
+
+
+@dataclass(frozen=True)
+class PngCodec:
+    level: int = 3
+    extension: str = ".png"
+    kinds: Tuple[str, ...] = (COLOR, DEPTH)
+    lossless: bool = True
+
+    @property
+    def name(self) -> str:
+        return f"png:{self.level}"
+
+    def encode(self, array: np.ndarray) -> bytes:
+        if array.ndim == 3:
+            array = cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
+        elif array.dtype != np.uint16:
+            array = array.astype(np.uint16)
+        ok, buf = cv2.imencode(".png", array, [cv2.IMWRITE_PNG_COMPRESSION, self.level])
+        if not ok:
+            raise RuntimeError("PNG encode failed.")
+        return buf.tobytes()
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        return _imdecode(payload)
+
+
+@dataclass(frozen=True)
+class JpegCodec:
+    quality: int = 95
+    extension: str = ".jpg"
+    kinds: Tuple[str, ...] = (COLOR,)
+    lossless: bool = False
+
+    @property
+    def name(self) -> str:
+        return f"jpeg:{self.quality}"
+
+    def encode(self, array: np.ndarray) -> bytes:
+        bgr = cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
+        ok, buf = cv2.imencode(".jpg", bgr, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise RuntimeError("JPEG encode failed.")
+        return buf.tobytes()
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        return _imdecode(payload)
+
+
+_ARRAY_HEADER = struct.Struct("<4s2sBIII")
+
+
+def _pack_array_header(magic: bytes, array: np.ndarray) -> bytes:
+    shape = tuple(array.shape) + (1,) * (3 - array.ndim)
+    return _ARRAY_HEADER.pack(magic, array.dtype.str[1:].encode("ascii"), array.ndim, *shape)
+
+
+def _unpack_array_header(magic: bytes, payload: bytes) -> Tuple[np.dtype, Tuple[int, ...]]:
+    tag, dtype, ndim, *dims = _ARRAY_HEADER.unpack_from(payload)
+    if tag != magic:
+        raise RuntimeError("Frame payload does not match its codec.")
+    return np.dtype("<" + dtype.decode("ascii")), tuple(dims[:ndim])
+
+
+@dataclass(frozen=True)
+class ZlibCodec:
+    level: int = 1
+    extension: str = ".kfz"
+    kinds: Tuple[str, ...] = (COLOR, DEPTH)
+    lossless: bool = True
+
+    @property
+    def name(self) -> str:
+        return f"zlib:{self.level}"
+
+    def encode(self, array: np.ndarray) -> bytes:
+        array = np.ascontiguousarray(array)
+        return _pack_array_header(b"KFZ1", array) + zlib.compress(array.data, self.level)
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        dtype, shape = _unpack_array_header(b"KFZ1", payload)
+        raw = zlib.decompress(memoryview(payload)[_ARRAY_HEADER.size :])
+        return np.frombuffer(raw, dtype=dtype).reshape(shape)
+
+
+@dataclass(frozen=True)
+class KfdDepthCodec:
+    """Lossless codec for masked 16-bit depth.
+
+    Zero (masked or missing) pixels are stored as alternating zero/valid run
+    lengths; valid pixels are stored as zigzag deltas from the previous valid
+    pixel. Both streams are LEB128 varints, so smooth surfaces cost about one
+    byte per valid pixel and masked background costs almost nothing. A
+    non-zero `level` runs zlib over the varint streams. Encode and decode are
+    vectorized numpy.
+    """
+
+    level: int = 1
+    extension: str = ".kfd"
+    kinds: Tuple[str, ...] = (DEPTH,)
+    lossless: bool = True
+
+    @property
+    def name(self) -> str:
+        return f"kfd:{self.level}"
+
+    def encode(self, array: np.ndarray) -> bytes:
+        if array.ndim != 2:
+            raise ValueError("kfd encodes single-channel depth frames only.")
+        flat = np.ascontiguousarray(array, dtype=np.uint16).ravel()
+        valid = flat != 0
+        edges = np.flatnonzero(valid[1:] != valid[:-1]) + 1
+        bounds = np.concatenate(([0], edges, [flat.size]))
+        runs = np.diff(bounds)
+        if flat.size and valid[0]:
+            runs = np.concatenate(([0], runs))
+        values = flat[valid].astype(np.int32)
+        deltas = np.diff(values, prepend=np.int32(0))
+        zigzag = ((deltas << 1) ^ (deltas >> 31)).astype(np.uint32)
+        run_bytes = _varint_encode(runs.astype(np.uint32))
+        body = run_bytes + _varint_encode(zigzag)
+        if self.level > 0:
+            body = zlib.compress(body, self.level)
+        header = _pack_array_header(b"KFD1", array) + struct.pack(
+            "<IIIB", runs.size, values.size, len(run_bytes), self.level > 0
+        )
+        return header + body
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        _, shape = _unpack_array_header(b"KFD1", payload)
+        offset = _ARRAY_HEADER.size
+        n_runs, n_values, run_len, compressed = struct.unpack_from("<IIIB", payload, offset)
+        body_bytes = memoryview(payload)[offset + 13 :]
+        if compressed:
+            body_bytes = memoryview(zlib.decompress(body_bytes))
+        body = np.frombuffer(body_bytes, dtype=np.uint8)
+        runs = _varint_decode(body[:run_len], n_runs)
+        zigzag = _varint_decode(body[run_len:], n_values).astype(np.int64)
+        deltas = (zigzag >> 1) ^ -(zigzag & 1)
+        out = np.zeros(int(np.prod(shape)), dtype=np.uint16)
+        if n_values:
+            pattern = np.arange(n_runs) % 2 == 1
+            valid = np.repeat(pattern, runs.astype(np.int64))
+            out[valid] = np.cumsum(deltas).astype(np.uint16)
+        return out.reshape(shape)
+
+
+def _varint_encode(values: np.ndarray) -> bytes:
+    if values.size == 0:
+        return b""
+    values = values.astype(np.uint64)
+    nbytes = np.ones(values.size, dtype=np.int64)
+    for shift in (7, 14, 21, 28):
+        nbytes += values >= (1 << shift)
+    ends = np.cumsum(nbytes)
+    starts = ends - nbytes
+    out = np.empty(int(ends[-1]), dtype=np.uint8)
+    for k in range(int(nbytes.max())):
+        sel = nbytes > k
+        chunk = (values[sel] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (nbytes[sel] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[sel] + k] = chunk | more
+    return out.tobytes()
+
+
+def _varint_decode(buf: np.ndarray, count: int) -> np.ndarray:
+    if count == 0:
+        return np.zeros(0, dtype=np.uint64)
+    ends = np.flatnonzero((buf & 0x80) == 0)[:count]
+    if ends.size != count:
+        raise RuntimeError("Truncated varint stream.")
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts + 1
+    values = np.zeros(count, dtype=np.uint64)
+    for k in range(int(lengths.max())):
+        sel = lengths > k
+        chunk = (buf[starts[sel] + k] & 0x7F).astype(np.uint64)
+        values[sel] |= chunk << np.uint64(7 * k)
+    return values
+
+
+def _imdecode(payload: bytes) -> np.ndarray:
+    array = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if array is None:
+        raise RuntimeError("Image decode failed.")
+    if array.ndim == 3 and array.shape[2] == 4:
+        return cv2.cvtColor(array, cv2.COLOR_BGRA2RGB)
+    if array.ndim == 3:
+        return cv2.cvtColor(array, cv2.COLOR_BGR2RGB)
+    return array
+
+
+def _with_int(
+    factory: Callable[[int], FrameCodec], default: int, low: int, high: int
+) -> Callable[[Optional[str]], FrameCodec]:
+    def build(arg: Optional[str]) -> FrameCodec:
+        try:
+            value = default if arg is None else int(arg)
+        except ValueError:
+            raise ValueError(f"codec parameter must be an integer, got '{arg}'") from None
+        if not low <= value <= high:
+            raise ValueError(f"codec parameter must be between {low} and {high}")
+        return factory(value)
+
+    return build
+
+
+_CODECS: Dict[str, Callable[[Optional[str]], FrameCodec]] = {
+    "png": _with_int(lambda level: PngCodec(level=level), 3, 0, 9),
+    "jpeg": _with_int(lambda quality: JpegCodec(quality=quality), 95, 1, 100),
+    "zlib": _with_int(lambda level: ZlibCodec(level=level), 1, 0, 9),
+    "kfd": _with_int(lambda level: KfdDepthCodec(level=level), 1, 0, 9),
+}
+
+
+def register_codec(name: str, factory: Callable[[Optional[str]], FrameCodec]) -> None:
+    _CODECS[name.lower()] = factory
+
+
+def available_codecs() -> List[str]:
+    return sorted(_CODECS)
+
+
+def get_codec(spec: str, kind: Optional[str] = None) -> FrameCodec:
+    """Resolve a codec spec such as `png`, `png:1`, `jpeg:90` or `kfd`."""
+    name, _, arg = spec.strip().lower().partition(":")
+    if name not in _CODECS:
+        raise ValueError(f"codec must be one of: {', '.join(available_codecs())}")
+    codec = _CODECS[name](arg or None)
+    if kind is not None and kind not in codec.kinds:
+        raise ValueError(f"codec '{codec.name}' cannot encode {kind} frames")
+    return codec
+
+
+@dataclass(frozen=True)
+class CodecBenchmark:
+    codec: str
+    kind: str
+    encode_mb_s: float
+    decode_mb_s: float
+    ratio: float
+    max_error: int
+
+
+def benchmark_codec(codec: FrameCodec, kind: str, frames: Sequence[np.ndarray]) -> CodecBenchmark:
+    raw_bytes = sum(frame.nbytes for frame in frames)
+    start = time.perf_counter()
+    payloads = [codec.encode(frame) for frame in frames]
+    encode_s = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = [codec.decode(payload) for payload in payloads]
+    decode_s = time.perf_counter() - start
+    max_error = 0
+    for frame, restored in zip(frames, decoded):
+        diff = np.abs(frame.astype(np.int32) - restored.astype(np.int32))
+        max_error = max(max_error, int(diff.max()) if diff.size else 0)
+    encoded_bytes = sum(len(payload) for payload in payloads)
+    return CodecBenchmark(
+        codec=codec.name,
+        kind=kind,
+        encode_mb_s=raw_bytes / 1e6 / max(encode_s, 1e-9),
+        decode_mb_s=raw_bytes / 1e6 / max(decode_s, 1e-9),
+        ratio=raw_bytes / max(encoded_bytes, 1),
+        max_error=max_error,
+    )
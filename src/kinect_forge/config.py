@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import asdict, dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 
 @dataclass(frozen=True)
@@ -37,6 +37,7 @@ class CaptureConfig:
     depth_trunc: float = 3.0
     mode: str = "standard"
     change_threshold: float = 0.01
+    change_stride: int = 2
     max_frames_total: int = 3000
     depth_min: float = 0.1
     depth_max: float = 4.0
@@ -59,6 +60,11 @@ class CaptureConfig:
     turntable_model: Optional[str] = None
     turntable_diameter_mm: Optional[int] = None
     turntable_rotation_seconds: Optional[float] = None
+    writer_workers: int = 0
+    queue_size: int = 16
+    storage: str = "png"
+    color_codec: Optional[str] = None
+    depth_codec: Optional[str] = None
 
 
 @dataclass(frozen=True)
@@ -68,10 +74,38 @@ class ReconstructionConfig:
     depth_scale: float = 1000.0
     depth_trunc: float = 3.0
     keyframe_threshold: float = 0.0
+    keyframe_stride: int = 4
     icp_refine: bool = False
     icp_distance: float = 0.02
     icp_voxel: float = 0.01
     icp_iterations: int = 30
+    # Coarse-to-fine (voxel, distance, iterations) levels; empty uses the icp_* values.
+    icp_schedule: Tuple[Tuple[float, float, int], ...] = ()
+    icp_workers: int = 0
+    icp_cache: bool = True
+    fragment_size: int = 0
+    fragment_overlap: int = 5
+    fragment_workers: int = 0
+    turntable_prior: bool = True
+    turntable_fit_frames: int = 8
+    tsdf_backend: str = "legacy"
+    # Voxel blocks preallocated by the tensor backend; 0 derives it from the preset.
+    tsdf_blocks: int = 0
+    # Peak RSS target in MB; spills the TSDF volume to disk to stay under it. 0 = off.
+    memory_budget_mb: int = 0
     smooth_iterations: int = 0
     fill_hole_radius: float = 0.0
+    # Levels of detail as (triangles, max_error) pairs; one of the two is 0 (see export).
+    lod_targets: Tuple[Tuple[int, float], ...] = ()
+    lod_workers: int = 0
+    lod_single_file: bool = False
     preset: str = "small"
+    # Reuse keyframes and poses cached in the dataset (see kinect_forge.cache).
+    stage_cache: bool = True
+    # Save the tensor TSDF volume in the dataset for `append_mesh`.
+    keep_volume: bool = False
+    cache_mb: int = 512
+    io_workers: int = 0
+    io_read_ahead: int = 0
+    odometry_workers: int = 0
+    odometry_chunk: int = 16
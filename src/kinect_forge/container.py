@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import mmap
+import struct
+from pathlib import Path
+from types import TracebackType
+from typing import BinaryIO, Optional, Tuple, Type
+
+import numpy as np
+
+from kinect_forge.codec import FrameCodec, get_codec
+
+CONTAINER_FILE = "frames.kfc"
+INDEX_FILE = "frames.kfi"
+RAW = "raw"
+
+_MAGIC = b"KFRGBD01"
+_HEADER = struct.Struct("<8sIIII16s16s")
+_HEADER_SIZE = 64
+_ALIGN = 64
+_INDEX_DTYPE = np.dtype([("offset", "<u8"), ("color_size", "<u4"), ("depth_size", "<u4")])
+
+
+def _pack_header(width: int, height: int, channels: int, codecs: Tuple[str, str]) -> bytes:
+    color_name, depth_name = (name.encode("ascii") for name in codecs)
+    header = _HEADER.pack(_MAGIC, 1, width, height, channels, color_name, depth_name)
+    return header.ljust(_HEADER_SIZE, b"\0")
+
+
+def _unpack_header(payload: bytes) -> Tuple[int, int, int, Tuple[str, str]]:
+    if len(payload) < _HEADER.size:
+        raise RuntimeError("Frame container header is truncated.")
+    magic, version, width, height, channels, color_name, depth_name = _HEADER.unpack_from(
+        payload
+    )
+    if magic != _MAGIC:
+        raise RuntimeError("Not a kinect-forge frame container.")
+    if version != 1:
+        raise RuntimeError(f"Unsupported frame container version: {version}")
+    codecs = (
+        color_name.rstrip(b"\0").decode("ascii"),
+        depth_name.rstrip(b"\0").decode("ascii"),
+    )
+    return width, height, channels, codecs
+
+
+def _resolve(name: str, kind: str) -> Optional[FrameCodec]:
+    return None if name == RAW else get_codec(name, kind)
+
+
+class ContainerWriter:
+    """Append RGB-D frames to a single chunk file plus an offset index.
+
+    Each frame is one chunk (color bytes, then depth bytes) aligned to 64
+    bytes. The index entry is written only after its chunk is flushed, so an
+    interrupted capture never indexes a partial frame. Opening an existing
+    container appends to it. Chunks are stored `raw` or encoded with a codec
+    from `kinect_forge.codec`; the codec names are kept in the header.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        width: int,
+        height: int,
+        color_codec: str = RAW,
+        depth_codec: str = RAW,
+        channels: int = 3,
+    ) -> None:
+        self._color_codec = _resolve(color_codec, "color")
+        self._depth_codec = _resolve(depth_codec, "depth")
+        codecs = (
+            self._color_codec.name if self._color_codec else RAW,
+            self._depth_codec.name if self._depth_codec else RAW,
+        )
+        self._width = width
+        self._height = height
+        self._channels = channels
+        data_path = root / CONTAINER_FILE
+        index_path = root / INDEX_FILE
+        if data_path.exists() and data_path.stat().st_size >= _HEADER_SIZE:
+            self._data: BinaryIO = data_path.open("r+b")
+            existing = _unpack_header(self._data.read(_HEADER_SIZE))
+            if existing != (width, height, channels, codecs):
+                self._data.close()
+                raise RuntimeError("Existing frame container has a different frame layout.")
+            self._data.seek(0, 2)
+            index_size = index_path.stat().st_size if index_path.exists() else 0
+            self._count = index_size // _INDEX_DTYPE.itemsize
+            # Discard a torn trailing index entry so new entries stay aligned.
+            with index_path.open("ab") as handle:
+                handle.truncate(self._count * _INDEX_DTYPE.itemsize)
+        else:
+            self._count = 0
+            self._data = data_path.open("wb")
+            self._data.write(_pack_header(width, height, channels, codecs))
+            # A capture killed before its first frame still leaves a readable header.
+            self._data.flush()
+            index_path.write_bytes(b"")
+        self._index: BinaryIO = index_path.open("ab")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> "ContainerWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def append(self, color: np.ndarray, depth: np.ndarray) -> int:
+        if color.shape != (self._height, self._width, self._channels) or color.dtype != np.uint8:
+            raise ValueError("Color frame does not match the container layout.")
+        if depth.shape != (self._height, self._width):
+            raise ValueError("Depth frame does not match the container layout.")
+        if depth.dtype != np.uint16:
+            depth = depth.astype(np.uint16)
+        color_bytes = _encode(self._color_codec, color)
+        depth_bytes = _encode(self._depth_codec, depth)
+        offset = self._data.tell()
+        pad = -offset % _ALIGN
+        if pad:
+            self._data.write(b"\0" * pad)
+            offset += pad
+        self._data.write(color_bytes)
+        self._data.write(depth_bytes)
+        self._data.flush()
+        entry = np.array([(offset, len(color_bytes), len(depth_bytes))], dtype=_INDEX_DTYPE)
+        self._index.write(entry.tobytes())
+        self._index.flush()
+        self._count += 1
+        return self._count - 1
+
+    def close(self) -> None:
+        self._data.close()
+        self._index.close()
+
+
+def _encode(codec: Optional[FrameCodec], array: np.ndarray) -> bytes:
+    if codec is None:
+        return np.ascontiguousarray(array).tobytes()
+    return codec.encode(array)
+
+
+class ContainerReader:
+    """Memory-mapped reader for a frame container.
+
+    Raw frames are returned as read-only numpy views into the mapping (no
+    copy); encoded frames are decoded by their codec on read.
+    """
+
+    def __init__(self, root: Path) -> None:
+        data_path = root / CONTAINER_FILE
+        index_path = root / INDEX_FILE
+        with data_path.open("rb") as handle:
+            if data_path.stat().st_size < _HEADER_SIZE:
+                raise RuntimeError("Frame container header is truncated.")
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._width, self._height, self._channels, self._codecs = _unpack_header(
+            self._map[:_HEADER_SIZE]
+        )
+        self._color_codec = _resolve(self._codecs[0], "color")
+        self._depth_codec = _resolve(self._codecs[1], "depth")
+        raw_index = index_path.read_bytes() if index_path.exists() else b""
+        usable = len(raw_index) - len(raw_index) % _INDEX_DTYPE.itemsize
+        index = np.frombuffer(raw_index[:usable], dtype=_INDEX_DTYPE)
+        # Drop entries whose chunk lies past the end of the data file.
+        ends = index["offset"] + index["color_size"] + index["depth_size"]
+        self._index = index[ends <= len(self._map)]
+
+    def __len__(self) -> int:
+        return int(self._index.shape[0])
+
+    @property
+    def frame_size(self) -> Tuple[int, int]:
+        return self._width, self._height
+
+    @property
+    def codecs(self) -> Tuple[str, str]:
+        return self._codecs
+
+    def read_color(self, index: int) -> np.ndarray:
+        entry = self._index[index]
+        shape = (self._height, self._width, self._channels)
+        return self._decode(
+            self._color_codec, int(entry["offset"]), int(entry["color_size"]), shape, np.uint8
+        )
+
+    def read_depth(self, index: int) -> np.ndarray:
+        entry = self._index[index]
+        offset = int(entry["offset"]) + int(entry["color_size"])
+        shape = (self._height, self._width)
+        return self._decode(
+            self._depth_codec, offset, int(entry["depth_size"]), shape, np.uint16
+        )
+
+    def close(self) -> None:
+        try:
+            self._map.close()
+        except BufferError:
+            # Frames handed out as views still reference the mapping; it is
+            # released once they are garbage collected.
+            pass
+
+    def _decode(
+        self,
+        codec: Optional[FrameCodec],
+        offset: int,
+        size: int,
+        shape: Tuple[int, ...],
+        dtype: "type[np.generic]",
+    ) -> np.ndarray:
+        if codec is not None:
+            return codec.decode(self._map[offset : offset + size])
+        count = int(np.prod(shape))
+        return np.frombuffer(self._map, dtype=dtype, count=count, offset=offset).reshape(shape)
@@ -1,11 +1,39 @@
 from __future__ import annotations
 
+import csv
 import json
-from dataclasses import dataclass
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, fields, replace
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
+import numpy as np
+
+from kinect_forge.codec import FrameCodec, get_codec
 from kinect_forge.config import KinectIntrinsics
+from kinect_forge.container import CONTAINER_FILE, RAW, ContainerReader, ContainerWriter
+
+LAYOUTS = ("png", "container")
+MANIFEST_FILE = "manifest.csv"
+DEFAULT_CACHE_MB = 512
+
+T = TypeVar("T")
 
 
 @dataclass(frozen=True)
@@ -18,6 +46,11 @@ class DatasetMeta:
     turntable_model: Optional[str] = None
     turntable_diameter_mm: Optional[int] = None
     turntable_rotation_seconds: Optional[float] = None
+    layout: str = "png"
+    color_codec: str = "png"
+    depth_codec: str = "png"
+    frames_read: Optional[int] = None
+    frames_dropped: Optional[int] = None
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -29,6 +62,11 @@ class DatasetMeta:
             "turntable_model": self.turntable_model,
             "turntable_diameter_mm": self.turntable_diameter_mm,
             "turntable_rotation_seconds": self.turntable_rotation_seconds,
+            "layout": self.layout,
+            "color_codec": self.color_codec,
+            "depth_codec": self.depth_codec,
+            "frames_read": self.frames_read,
+            "frames_dropped": self.frames_dropped,
         }
 
 
@@ -57,17 +95,452 @@ def load_metadata(root: Path) -> DatasetMeta:
         turntable_model=payload.get("turntable_model"),
         turntable_diameter_mm=payload.get("turntable_diameter_mm"),
         turntable_rotation_seconds=payload.get("turntable_rotation_seconds"),
+        layout=payload.get("layout", "png"),
+        color_codec=payload.get("color_codec", "png"),
+        depth_codec=payload.get("depth_codec", "png"),
+        frames_read=payload.get("frames_read"),
+        frames_dropped=payload.get("frames_dropped"),
     )
 
 
+@dataclass(frozen=True)
+class FrameRecord:
+    """One saved frame: `frame_index` counts every frame read from the sensor,
+    so gaps show skipped and dropped frames. `delta` is the mean depth change
+    (meters) against the previously saved frame."""
+
+    index: int
+    frame_index: int
+    time: float
+    color_timestamp: Optional[int]
+    depth_timestamp: Optional[int]
+    tilt: Optional[float]
+    valid_ratio: float
+    mean_depth: float
+    delta: float
+
+
+_RECORD_FIELDS = [f.name for f in fields(FrameRecord)]
+
+
+def _format_field(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.6f}"
+    return str(value)
+
+
+class ManifestWriter:
+    """Append frame records to `manifest.csv`; safe to call from writer threads."""
+
+    def __init__(self, root: Path) -> None:
+        self._handle = (root / MANIFEST_FILE).open("w", newline="")
+        self._writer = csv.writer(self._handle)
+        self._writer.writerow(_RECORD_FIELDS)
+        self._lock = threading.Lock()
+
+    def append(self, record: FrameRecord) -> None:
+        row = [_format_field(getattr(record, name)) for name in _RECORD_FIELDS]
+        with self._lock:
+            self._writer.writerow(row)
+            self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def _optional(value: Optional[str], cast: Callable[[str], Any]) -> Any:
+    return cast(value) if value else None
+
+
+def load_manifest(root: Path) -> Optional[List[FrameRecord]]:
+    path = root / MANIFEST_FILE
+    if not path.is_file():
+        return None
+    records: Dict[int, FrameRecord] = {}
+    with path.open(newline="") as handle:
+        for row in csv.DictReader(handle):
+            try:
+                record = FrameRecord(
+                    index=int(row["index"]),
+                    frame_index=int(row["frame_index"]),
+                    time=float(row["time"]),
+                    color_timestamp=_optional(row["color_timestamp"], int),
+                    depth_timestamp=_optional(row["depth_timestamp"], int),
+                    tilt=_optional(row["tilt"], float),
+                    valid_ratio=float(row["valid_ratio"]),
+                    mean_depth=float(row["mean_depth"]),
+                    delta=float(row["delta"]),
+                )
+            except (KeyError, TypeError, ValueError):
+                # A capture interrupted mid-row leaves a partial last line.
+                continue
+            records[record.index] = record
+    # Writer threads may finish frames out of order.
+    return [records[idx] for idx in sorted(records)]
+
+
+def write_manifest(root: Path, records: List[FrameRecord]) -> None:
+    writer = ManifestWriter(root)
+    try:
+        for record in records:
+            writer.append(record)
+    finally:
+        writer.close()
+
+
+def resolve_codecs(
+    layout: str, color_codec: Optional[str] = None, depth_codec: Optional[str] = None
+) -> Tuple[str, str]:
+    """Return canonical codec names for a layout (`raw` only in containers)."""
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout must be one of: {', '.join(LAYOUTS)}")
+    default = RAW if layout == "container" else "png"
+    names = []
+    for spec, kind in ((color_codec, "color"), (depth_codec, "depth")):
+        spec = (spec or default).lower()
+        if spec == RAW:
+            if layout != "container":
+                raise ValueError("raw frames are only supported in the container layout")
+            names.append(RAW)
+        else:
+            names.append(get_codec(spec, kind).name)
+    return names[0], names[1]
+
+
+def _dataset_codecs(root: Path) -> Tuple[FrameCodec, FrameCodec]:
+    color_codec, depth_codec = "png", "png"
+    if (root / "metadata.json").is_file():
+        meta = load_metadata(root)
+        if meta.layout == "png":
+            color_codec, depth_codec = meta.color_codec, meta.depth_codec
+    return get_codec(color_codec, "color"), get_codec(depth_codec, "depth")
+
+
+def _file_names(directory: Path) -> Set[str]:
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name for entry in entries}
+    except FileNotFoundError:
+        return set()
+
+
 def list_frame_pairs(root: Path) -> List[Tuple[Path, Path]]:
+    color_codec, depth_codec = _dataset_codecs(root)
     color_dir = root / "color"
     depth_dir = root / "depth"
-    color_files = sorted(color_dir.glob("color_*.png"))
+    # One listing per directory, rather than a stat per frame.
+    color_names = _file_names(color_dir)
+    depth_names = _file_names(depth_dir)
+    records = load_manifest(root)
+    if records is not None:
+        listed = [
+            (
+                f"color_{record.index:06d}{color_codec.extension}",
+                f"depth_{record.index:06d}{depth_codec.extension}",
+            )
+            for record in records
+        ]
+        # Manifest rows are written only after both images are on disk, but
+        # frames deleted since then leave the directory as the only truth.
+        if all(color in color_names and depth in depth_names for color, depth in listed):
+            return [(color_dir / color, depth_dir / depth) for color, depth in listed]
     pairs: List[Tuple[Path, Path]] = []
-    for color in color_files:
-        idx = color.stem.split("_")[-1]
-        depth = depth_dir / f"depth_{idx}.png"
-        if depth.exists():
-            pairs.append((color, depth))
+    suffix = color_codec.extension
+    for color in sorted(name for name in color_names if name.startswith("color_")):
+        if not color.endswith(suffix):
+            continue
+        depth = f"depth_{color[len('color_') : -len(suffix)]}{depth_codec.extension}"
+        if depth in depth_names:
+            pairs.append((color_dir / color, depth_dir / depth))
     return pairs
+
+
+def write_frame_images(
+    color_dir: Path,
+    depth_dir: Path,
+    index: int,
+    color: np.ndarray,
+    depth: np.ndarray,
+    color_codec: FrameCodec,
+    depth_codec: FrameCodec,
+) -> None:
+    if depth.dtype != np.uint16:
+        depth = depth.astype(np.uint16)
+    color_path = color_dir / f"color_{index:06d}{color_codec.extension}"
+    depth_path = depth_dir / f"depth_{index:06d}{depth_codec.extension}"
+    color_path.write_bytes(color_codec.encode(color))
+    depth_path.write_bytes(depth_codec.encode(depth))
+
+
+class FrameStore(Protocol):
+    def __len__(self) -> int:
+        ...
+
+    def read_color(self, index: int) -> np.ndarray:
+        ...
+
+    def read_depth(self, index: int) -> np.ndarray:
+        ...
+
+
+class FolderFrameStore:
+    def __init__(self, root: Path) -> None:
+        self._pairs = list_frame_pairs(root)
+        self._color_codec, self._depth_codec = _dataset_codecs(root)
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    @property
+    def pairs(self) -> List[Tuple[Path, Path]]:
+        return self._pairs
+
+    def read_color(self, index: int) -> np.ndarray:
+        return self._color_codec.decode(self._pairs[index][0].read_bytes())
+
+    def read_depth(self, index: int) -> np.ndarray:
+        return self._depth_codec.decode(self._pairs[index][1].read_bytes())
+
+
+def open_frames(root: Path) -> FrameStore:
+    """Open the frames of a dataset in either layout."""
+    if (root / CONTAINER_FILE).is_file():
+        return ContainerReader(root)
+    return FolderFrameStore(root)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    cached_bytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class FrameSource:
+    """Lazy, cached access to the frames of a `FrameStore`.
+
+    Decoded color and depth arrays are kept in an LRU cache bounded by
+    `max_bytes` (0 disables caching), so stages that revisit a frame do not
+    decode it again. Cached arrays are shared and read-only.
+    """
+
+    def __init__(self, frames: FrameStore, max_bytes: int = DEFAULT_CACHE_MB << 20) -> None:
+        self._frames = frames
+        self._max_bytes = max(0, max_bytes)
+        self._cache: "OrderedDict[Tuple[str, int], np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def frames(self) -> FrameStore:
+        return self._frames
+
+    def read_color(self, index: int) -> np.ndarray:
+        return self._get("color", index, self._frames.read_color)
+
+    def read_depth(self, index: int) -> np.ndarray:
+        return self._get("depth", index, self._frames.read_depth)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, self._bytes, self._max_bytes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._bytes = 0
+
+    def _get(self, kind: str, index: int, read: Callable[[int], np.ndarray]) -> np.ndarray:
+        key = (kind, index)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        array = read(index)
+        if array.nbytes > self._max_bytes:
+            return array
+        array.flags.writeable = False
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = array
+                self._bytes += array.nbytes
+            while self._bytes > self._max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+        return array
+
+
+def open_frame_source(root: Path, max_bytes: int = DEFAULT_CACHE_MB << 20) -> FrameSource:
+    """Open the frames of a dataset behind a decoded-frame cache."""
+    return FrameSource(open_frames(root), max_bytes)
+
+
+def prefetch_frames(
+    load: Callable[[int], T],
+    indices: Sequence[int],
+    workers: int = 0,
+    read_ahead: int = 0,
+) -> Generator[Tuple[int, T], None, None]:
+    """Yield `(index, load(index))` in order, loading ahead on a thread pool.
+
+    With `workers` 0 frames are loaded inline. Otherwise up to `read_ahead`
+    frames (default: twice the worker count) are decoded while the caller
+    works on earlier ones.
+    """
+    if workers <= 0 or len(indices) < 2:
+        for idx in indices:
+            yield idx, load(idx)
+        return
+    read_ahead = max(read_ahead if read_ahead > 0 else 2 * workers, 1)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kinect-forge-io") as pool:
+        pending: Deque[Tuple[int, "Future[T]"]] = deque()
+        position = 0
+        try:
+            while pending or position < len(indices):
+                while position < len(indices) and len(pending) < read_ahead:
+                    idx = indices[position]
+                    pending.append((idx, pool.submit(load, idx)))
+                    position += 1
+                idx, future = pending.popleft()
+                yield idx, future.result()
+        finally:
+            # The caller may stop early (or fail); do not decode the rest.
+            for _, future in pending:
+                future.cancel()
+
+
+def convert_dataset(
+    source: Path,
+    target: Path,
+    layout: str,
+    color_codec: Optional[str] = None,
+    depth_codec: Optional[str] = None,
+) -> int:
+    """Copy a dataset into `target` using the given frame layout and codecs."""
+    codecs = resolve_codecs(layout, color_codec, depth_codec)
+    if source.resolve() == target.resolve():
+        raise ValueError("Source and target datasets must differ.")
+    meta = load_metadata(source)
+    frames = open_frames(source)
+    if len(frames) == 0:
+        raise RuntimeError("No frames found in the dataset.")
+    target.mkdir(parents=True, exist_ok=True)
+    if layout == "png":
+        write_metadata(
+            target, replace(meta, layout=layout, color_codec=codecs[0], depth_codec=codecs[1])
+        )
+        color_dir, depth_dir = ensure_dirs(target)
+        color_enc, depth_enc = get_codec(codecs[0]), get_codec(codecs[1])
+        for idx in range(len(frames)):
+            write_frame_images(
+                color_dir,
+                depth_dir,
+                idx,
+                frames.read_color(idx),
+                frames.read_depth(idx),
+                color_enc,
+                depth_enc,
+            )
+        _copy_manifest(source, target, len(frames))
+        return len(frames)
+
+    first = frames.read_depth(0)
+    width, height = first.shape[1], first.shape[0]
+    with ContainerWriter(target, width, height, codecs[0], codecs[1]) as writer:
+        if len(writer):
+            raise RuntimeError(f"Target already holds a frame container: {target}")
+        write_metadata(
+            target, replace(meta, layout=layout, color_codec=codecs[0], depth_codec=codecs[1])
+        )
+        for idx in range(len(frames)):
+            writer.append(frames.read_color(idx), frames.read_depth(idx))
+    _copy_manifest(source, target, len(frames))
+    return len(frames)
+
+
+def append_frames(source: Path, target: Path) -> int:
+    """Copy every frame of `source` onto the end of `target`, in the target's
+    layout and codecs. Returns the number of frames copied."""
+    if source.resolve() == target.resolve():
+        raise ValueError("Source and target datasets must differ.")
+    meta = load_metadata(target)
+    added = load_metadata(source)
+    frames = open_frames(source)
+    existing = open_frames(target)
+    if len(frames) == 0:
+        raise RuntimeError(f"No frames found in {source}.")
+    if (added.intrinsics.width, added.intrinsics.height) != (
+        meta.intrinsics.width,
+        meta.intrinsics.height,
+    ):
+        raise RuntimeError("Appended frames must have the dataset's frame size.")
+    count = len(existing)
+    if isinstance(existing, FolderFrameStore):
+        start = 0
+        if existing.pairs:
+            start = int(existing.pairs[-1][0].stem.split("_")[-1]) + 1
+        color_dir, depth_dir = ensure_dirs(target)
+        color_enc, depth_enc = _dataset_codecs(target)
+        for idx in range(len(frames)):
+            write_frame_images(
+                color_dir,
+                depth_dir,
+                start + idx,
+                frames.read_color(idx),
+                frames.read_depth(idx),
+                color_enc,
+                depth_enc,
+            )
+    else:
+        start = count
+        first = frames.read_color(0)
+        with ContainerWriter(
+            target,
+            meta.intrinsics.width,
+            meta.intrinsics.height,
+            meta.color_codec,
+            meta.depth_codec,
+            channels=first.shape[2],
+        ) as writer:
+            for idx in range(len(frames)):
+                writer.append(frames.read_color(idx), frames.read_depth(idx))
+    records, extra = load_manifest(target), load_manifest(source)
+    if records and extra and len(records) == count and len(extra) == len(frames):
+        records.extend(replace(rec, index=start + pos) for pos, rec in enumerate(extra))
+        write_manifest(target, records)
+    else:
+        # A manifest that misses the new frames would list (and fingerprint) only the old ones.
+        (target / MANIFEST_FILE).unlink(missing_ok=True)
+    if meta.frames_read is not None and added.frames_read is not None:
+        meta = replace(
+            meta,
+            frames_read=meta.frames_read + added.frames_read,
+            frames_dropped=(meta.frames_dropped or 0) + (added.frames_dropped or 0),
+        )
+    write_metadata(target, meta)
+    return len(frames)
+
+
+def _copy_manifest(source: Path, target: Path, count: int) -> None:
+    records = load_manifest(source)
+    if records is not None and len(records) == count:
+        write_manifest(target, [replace(rec, index=idx) for idx, rec in enumerate(records)])
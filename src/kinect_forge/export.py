@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+import json
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 import open3d as o3d
 import trimesh
 
+GLTF_SUFFIXES = {".glb", ".gltf"}
+# Error-bound targets stop searching once the triangle count is within this ratio.
+_SEARCH_RATIO = 1.05
+
 
 def _to_trimesh(mesh: o3d.geometry.TriangleMesh) -> trimesh.Trimesh:
     vertices = np.asarray(mesh.vertices)
@@ -30,10 +40,216 @@ def write_mesh(path: Path, mesh: o3d.geometry.TriangleMesh) -> None:
     if mesh.is_empty():
         raise RuntimeError("Mesh is empty or could not be generated.")
     suffix = path.suffix.lower()
-    if suffix in {".glb", ".gltf"}:
+    if suffix in GLTF_SUFFIXES:
         tm = _to_trimesh(mesh)
         tm.export(str(path))
         return
 
     if not o3d.io.write_triangle_mesh(str(path), mesh):
         raise RuntimeError("Failed to write mesh output.")
+
+
+@dataclass(frozen=True)
+class LODTarget:
+    """A triangle count, or (with `triangles` 0) an RMS error bound in meters."""
+
+    triangles: int = 0
+    max_error: float = 0.0
+
+
+@dataclass(frozen=True)
+class LODLevel:
+    level: int
+    triangles: int
+    # RMS distance of the full mesh's vertices from this level's surface (m).
+    error: float
+    path: Path
+    seconds: float
+    # Node holding the level when all levels share one glTF file.
+    node: Optional[str] = None
+
+
+def parse_lod_targets(text: str) -> Tuple[Tuple[int, float], ...]:
+    """Parse comma-separated targets: triangle counts (`50000`) or error bounds
+    (`0.5mm`, `0.002m`), as `(triangles, max_error)` pairs."""
+    targets: List[Tuple[int, float]] = []
+    for part in text.split(","):
+        value = part.strip().lower()
+        if not value:
+            continue
+        try:
+            if value.endswith("mm"):
+                targets.append((0, float(value[:-2]) / 1000.0))
+            elif value.endswith("m"):
+                targets.append((0, float(value[:-1])))
+            else:
+                targets.append((int(value), 0.0))
+        except ValueError as exc:
+            raise ValueError(
+                f"LOD target must be a triangle count or an error like 1mm: '{part}'"
+            ) from exc
+        if targets[-1][0] < 0 or targets[-1][1] < 0 or targets[-1] == (0, 0.0):
+            raise ValueError(f"Invalid LOD target: '{part}'")
+    return tuple(targets)
+
+
+def lod_error(reference: o3d.core.Tensor, mesh: o3d.geometry.TriangleMesh) -> float:
+    """RMS distance of `reference` points (float32, N x 3) from `mesh`."""
+    scene = o3d.t.geometry.RaycastingScene()
+    scene.add_triangles(o3d.t.geometry.TriangleMesh.from_legacy(mesh))
+    distance = scene.compute_distance(reference).numpy()
+    return float(np.sqrt(np.mean(np.square(distance)))) if distance.size else 0.0
+
+
+def decimate(
+    mesh: o3d.geometry.TriangleMesh, target: LODTarget
+) -> Tuple[o3d.geometry.TriangleMesh, float]:
+    """Quadric decimation (vertex colors are carried along) and its error.
+
+    An error bound searches the triangle count on a log scale for the
+    coarsest level within the bound, since Open3D's own `maximum_error` is a
+    quadric cost rather than a distance.
+    """
+    reference = o3d.core.Tensor(np.asarray(mesh.vertices, dtype=np.float32))
+    if target.triangles > 0:
+        lod = mesh.simplify_quadric_decimation(min(target.triangles, len(mesh.triangles)))
+        return lod, lod_error(reference, lod)
+    best: Tuple[o3d.geometry.TriangleMesh, float] = (mesh, 0.0)
+    low, high = 4, len(mesh.triangles)
+    while high > low * _SEARCH_RATIO:
+        middle = int(round(np.sqrt(low * high)))
+        lod = mesh.simplify_quadric_decimation(middle)
+        error = lod_error(reference, lod)
+        if error <= target.max_error:
+            best, high = (lod, error), middle
+        else:
+            low = middle
+    return best
+
+
+_source: Optional[o3d.geometry.TriangleMesh] = None
+
+
+def _mesh_arrays(mesh: o3d.geometry.TriangleMesh) -> Dict[str, np.ndarray]:
+    arrays = {"vertices": np.asarray(mesh.vertices), "triangles": np.asarray(mesh.triangles)}
+    if mesh.has_vertex_colors():
+        arrays["colors"] = np.asarray(mesh.vertex_colors)
+    return arrays
+
+
+def _arrays_mesh(arrays: Dict[str, np.ndarray]) -> o3d.geometry.TriangleMesh:
+    mesh = o3d.geometry.TriangleMesh(
+        o3d.utility.Vector3dVector(arrays["vertices"]),
+        o3d.utility.Vector3iVector(arrays["triangles"]),
+    )
+    if "colors" in arrays:
+        mesh.vertex_colors = o3d.utility.Vector3dVector(arrays["colors"])
+    return mesh
+
+
+def _init_worker(arrays: Dict[str, np.ndarray]) -> None:
+    global _source
+    _source = _arrays_mesh(arrays)
+
+
+def _lod_worker(target: LODTarget) -> Tuple[Dict[str, np.ndarray], float, float]:
+    assert _source is not None, "worker not initialized"
+    started = time.perf_counter()
+    lod, error = decimate(_source, target)
+    return _mesh_arrays(lod), error, time.perf_counter() - started
+
+
+def build_lods(
+    mesh: o3d.geometry.TriangleMesh, targets: Sequence[LODTarget], workers: int = 0
+) -> List[Tuple[o3d.geometry.TriangleMesh, float, float]]:
+    """`(mesh, error, seconds)` per target, each decimated from the full mesh.
+
+    Levels are independent, so with `workers` they run on spawned processes
+    that receive the full mesh once each; 0 decimates them here.
+    """
+    if workers <= 0 or len(targets) < 2:
+        levels = []
+        for target in targets:
+            started = time.perf_counter()
+            lod, error = decimate(mesh, target)
+            levels.append((lod, error, time.perf_counter() - started))
+        return levels
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(targets)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(_mesh_arrays(mesh),),
+    ) as pool:
+        futures: List["Future[Tuple[Dict[str, np.ndarray], float, float]]"] = [
+            pool.submit(_lod_worker, target) for target in targets
+        ]
+        results = [future.result() for future in futures]
+    return [(_arrays_mesh(arrays), error, seconds) for arrays, error, seconds in results]
+
+
+def lod_path(path: Path, level: int) -> Path:
+    """`model.glb` -> `model_lod1.glb`; level 0 is `path` itself."""
+    return path if level == 0 else path.with_name(f"{path.stem}_lod{level}{path.suffix}")
+
+
+def write_lods(
+    path: Path,
+    mesh: o3d.geometry.TriangleMesh,
+    targets: Sequence[LODTarget],
+    workers: int = 0,
+    single_file: bool = False,
+) -> List[LODLevel]:
+    """Write the full mesh and one decimated level per target, plus a manifest.
+
+    Levels are ordered finest first. By default each level is its own file
+    (`model_lod1.glb`, ...); `single_file` puts every level in one glTF file
+    as nodes `lod0`, `lod1`, ... with the manifest in the file's `extras`.
+    The manifest is also written to `<stem>_lods.json`.
+    """
+    if mesh.is_empty():
+        raise RuntimeError("Mesh is empty or could not be generated.")
+    if single_file and path.suffix.lower() not in GLTF_SUFFIXES:
+        raise ValueError("A single-file LOD export needs a .glb or .gltf output")
+    built = build_lods(mesh, targets, workers)
+    built.sort(key=lambda item: len(item[0].triangles), reverse=True)
+    meshes = [mesh] + [lod for lod, _, _ in built]
+    levels = [LODLevel(0, len(mesh.triangles), 0.0, path, 0.0, "lod0" if single_file else None)]
+    for index, (lod, error, seconds) in enumerate(built, start=1):
+        levels.append(
+            LODLevel(
+                index,
+                len(lod.triangles),
+                error,
+                path if single_file else lod_path(path, index),
+                seconds,
+                f"lod{index}" if single_file else None,
+            )
+        )
+    manifest = {
+        "levels": [
+            {
+                "level": level.level,
+                "file": level.path.name,
+                "node": level.node,
+                "triangles": level.triangles,
+                "error": level.error,
+            }
+            for level in levels
+        ]
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if single_file:
+        scene = trimesh.Scene()
+        for level, lod in zip(levels, meshes):
+            scene.add_geometry(_to_trimesh(lod), node_name=level.node, geom_name=level.node)
+
+        def add_manifest(tree: Dict[str, Any]) -> None:
+            tree["extras"] = {"lods": manifest["levels"]}
+
+        scene.export(str(path), tree_postprocessor=add_manifest)  # type: ignore[no-untyped-call]
+    else:
+        for level, lod in zip(levels, meshes):
+            write_mesh(level.path, lod)
+    manifest_path = path.with_name(f"{path.stem}_lods.json")
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return levels
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import open3d as o3d
+
+from kinect_forge.config import KinectIntrinsics, ReconstructionConfig
+from kinect_forge.dataset import FrameStore, open_frames
+from kinect_forge.odometry import (
+    PairResult,
+    chain_poses,
+    odometry_pair,
+    pinhole,
+    rgbd_from_arrays,
+)
+from kinect_forge.registration import CloudCache, ICPLevel, icp_levels, icp_pair, refine_chunk
+
+
+@dataclass(frozen=True)
+class FragmentSetup:
+    root: Path
+    intrinsics: KinectIntrinsics
+    depth_scale: float
+    depth_trunc: float
+    config: ReconstructionConfig
+    # Predicted motion into each keyframe from its predecessor (turntable prior).
+    initials: Optional[Dict[int, np.ndarray]] = None
+    # Dataset fingerprint keying the on-disk ICP clouds.
+    fingerprint: str = ""
+    # Odometry already run for the turntable fit, by (source, target); reused as is.
+    aligned: Optional[Dict[Tuple[int, int], PairResult]] = None
+
+
+@dataclass
+class Fragment:
+    """Poses of a run of keyframes relative to its first frame, and its surface.
+
+    `points`/`normals` are sampled from the fragment's own TSDF volume, in the
+    coordinates of its first frame.
+    """
+
+    indices: List[int]
+    poses: List[np.ndarray]
+    odometry: List[PairResult]
+    registration: List[PairResult]
+    points: np.ndarray
+    normals: np.ndarray
+
+
+def split_fragments(indices: Sequence[int], size: int, overlap: int) -> List[List[int]]:
+    """Runs of `size` keyframes, each sharing its first `overlap` frames with the previous."""
+    if size < 2:
+        raise ValueError("fragment size must be >= 2")
+    overlap = min(max(1, overlap), size - 1)
+    step = size - overlap
+    runs: List[List[int]] = []
+    start = 0
+    while True:
+        runs.append(list(indices[start : start + size]))
+        if start + size >= len(indices):
+            break
+        start += step
+    # Fold a short tail into its predecessor rather than registering a sliver.
+    if len(runs) > 1 and len(runs[-1]) <= overlap + 1:
+        tail = runs.pop()
+        runs[-1].extend(idx for idx in tail if idx not in runs[-1])
+    return runs
+
+
+def build_fragment(frames: FrameStore, indices: Sequence[int], setup: FragmentSetup) -> Fragment:
+    config = setup.config
+    intrinsic = pinhole(setup.intrinsics)
+    images = [
+        rgbd_from_arrays(
+            frames.read_color(idx), frames.read_depth(idx), setup.depth_scale, setup.depth_trunc
+        )
+        for idx in indices
+    ]
+    predicted = None
+    if setup.initials is not None:
+        predicted = [setup.initials[idx] for idx in indices[1:]]
+    aligned = setup.aligned or {}
+    odometry = [
+        aligned.get((indices[k - 1], indices[k]))
+        or odometry_pair(
+            indices[k - 1],
+            indices[k],
+            images[k - 1],
+            images[k],
+            intrinsic,
+            None if predicted is None else predicted[k - 1],
+        )
+        for k in range(1, len(indices))
+    ]
+    poses = chain_poses(odometry, predicted)
+    registration: List[PairResult] = []
+    if config.icp_refine:
+        cache_root = setup.root if config.icp_cache else None
+        cache = CloudCache(
+            cache_root, setup.intrinsics, setup.depth_scale, setup.depth_trunc, setup.fingerprint
+        )
+        initials = [np.linalg.inv(poses[k]) @ poses[k - 1] for k in range(1, len(poses))]
+        registration = refine_chunk(indices, initials, icp_levels(config), cache, frames.read_depth)
+        poses = chain_poses(registration, initials)
+    volume = o3d.pipelines.integration.ScalableTSDFVolume(
+        voxel_length=config.voxel_length,
+        sdf_trunc=config.sdf_trunc,
+        color_type=o3d.pipelines.integration.TSDFVolumeColorType.NoColor,
+    )
+    for rgbd, pose in zip(images, poses):
+        volume.integrate(rgbd, intrinsic, np.linalg.inv(pose))
+    pcd = volume.extract_point_cloud()
+    if not pcd.has_normals():
+        pcd.estimate_normals()
+    return Fragment(
+        list(indices),
+        poses,
+        odometry,
+        registration,
+        np.asarray(pcd.points).copy(),
+        np.asarray(pcd.normals).copy(),
+    )
+
+
+_worker: Optional[Tuple[FrameStore, FragmentSetup]] = None
+
+
+def _init_worker(setup: FragmentSetup) -> None:
+    global _worker
+    _worker = (open_frames(setup.root), setup)
+
+
+def _fragment_worker(indices: List[int]) -> Fragment:
+    assert _worker is not None, "worker not initialized"
+    frames, setup = _worker
+    return build_fragment(frames, indices, setup)
+
+
+class FragmentBuilder:
+    """Build fragments in this process or on a pool of spawned processes.
+
+    Like `ParallelOdometry`, `start` submits the work and `results` collects
+    it in order, so the caller can load frames for final integration between.
+    """
+
+    def __init__(self, setup: FragmentSetup, workers: int) -> None:
+        self._setup = setup
+        self._workers = workers
+        self._runs: List[List[int]] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._futures: List["Future[Fragment]"] = []
+
+    def start(self, runs: List[List[int]]) -> None:
+        self._runs = runs
+        if self._workers <= 0 or len(runs) < 2:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=min(self._workers, len(runs)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._setup,),
+        )
+        self._futures = [self._pool.submit(_fragment_worker, run) for run in runs]
+
+    def results(self, frames: FrameStore) -> List[Fragment]:
+        try:
+            if self._pool is None:
+                return [build_fragment(frames, run, self._setup) for run in self._runs]
+            return [future.result() for future in self._futures]
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        self._futures = []
+
+
+def _fragment_clouds(
+    fragment: Fragment, levels: Sequence[ICPLevel]
+) -> List[o3d.geometry.PointCloud]:
+    pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(fragment.points))
+    pcd.normals = o3d.utility.Vector3dVector(fragment.normals)
+    return [pcd.voxel_down_sample(level.voxel) for level in levels]
+
+
+def register_fragments(
+    fragments: List[Fragment], levels: Sequence[ICPLevel]
+) -> Tuple[List[np.ndarray], List[PairResult]]:
+    """Align each fragment to the previous one, seeded by their shared frames.
+
+    Returns every fragment's origin in the first fragment's coordinates and
+    the pair results (indexed by fragment). A failed pair keeps the seed.
+    """
+    pairs: List[PairResult] = []
+    seeds: List[np.ndarray] = []
+    clouds = [_fragment_clouds(fragment, levels) for fragment in fragments]
+    for k in range(1, len(fragments)):
+        previous, current = fragments[k - 1], fragments[k]
+        # The current fragment's origin is a frame the previous one also posed.
+        origin = previous.poses[previous.indices.index(current.indices[0])]
+        seed = np.linalg.inv(origin)
+        seeds.append(seed)
+        pairs.append(icp_pair(k - 1, k, clouds[k - 1], clouds[k], levels, seed))
+    return chain_poses(pairs, seeds), pairs
+
+
+def keyframe_poses(
+    fragments: List[Fragment], origins: List[np.ndarray]
+) -> Tuple[List[int], List[np.ndarray]]:
+    """Camera-to-world pose of every keyframe; shared frames keep the earlier fragment's pose."""
+    indices: List[int] = []
+    poses: List[np.ndarray] = []
+    seen = set()
+    for fragment, origin in zip(fragments, origins):
+        for idx, pose in zip(fragment.indices, fragment.poses):
+            if idx in seen:
+                continue
+            seen.add(idx)
+            indices.append(idx)
+            poses.append(origin @ pose)
+    return indices, poses
@@ -10,13 +10,12 @@ from typing import Callable, Optional
 import tkinter as tk
 from tkinter import filedialog, ttk
 
-import numpy as np
-
 from kinect_forge.calibration import calibrate_intrinsics, save_intrinsics
 from kinect_forge.capture import capture_frames
 from kinect_forge.config import CaptureConfig, KinectIntrinsics, ReconstructionConfig
 from kinect_forge.measure import measure_mesh
 from kinect_forge.presets import capture_preset, reconstruction_preset
+from kinect_forge.preview import PreviewConfig, PreviewMailbox
 from kinect_forge.reconstruct import reconstruct_mesh
 from kinect_forge.sensors.freenect_v1 import FreenectV1Sensor, probe_device, set_tilt_degs
 from kinect_forge.turntable import get_turntable_preset
@@ -28,6 +27,7 @@ class App:
         self.root = root
         self.root.title("Kinect Forge")
         self._preview_image: Optional[tk.PhotoImage] = None
+        self._preview_mailbox: Optional[PreviewMailbox] = None
         self._build_ui()
 
     def _build_ui(self) -> None:
@@ -44,6 +44,7 @@ class App:
         self._build_view_tab()
         self._build_calibrate_tab()
         self.root.after(500, self._refresh_dataset_state)
+        self.root.after(100, self._poll_preview)
 
     def _log(self, message: str) -> None:
         self.log_text.insert(tk.END, message + "\n")
@@ -144,6 +145,8 @@ class App:
         self.capture_turntable_preset = tk.StringVar(value="")
         self.capture_intrinsics = tk.StringVar(value="")
         self.capture_preview = tk.BooleanVar(value=True)
+        self.capture_preview_fps = tk.DoubleVar(value=10.0)
+        self.capture_preview_mode = tk.StringVar(value="color")
         self.capture_profile = tk.StringVar(value="")
         self.capture_tilt = tk.DoubleVar(value=0.0)
         self.capture_tilt_sweep = tk.BooleanVar(value=False)
@@ -254,21 +257,28 @@ class App:
                 payload = json.loads(Path(self.capture_intrinsics.get()).read_text())
                 intrinsics = KinectIntrinsics.from_dict(payload)
 
-            def preview_cb(color: np.ndarray, depth: np.ndarray) -> None:
-                if not self.capture_preview.get():
-                    return
-                ppm = self._to_ppm_bytes(color)
-                if not ppm:
-                    return
-                self.root.after(0, self._update_preview, ppm)
-
-            capture_frames(
-                sensor,
-                Path(self.capture_output.get()),
-                config,
-                intrinsics=intrinsics,
-                preview_cb=preview_cb,
+            mailbox = PreviewMailbox(
+                PreviewConfig(
+                    fps=self.capture_preview_fps.get(),
+                    mode=self.capture_preview_mode.get().lower(),
+                    depth_min=config.depth_min,
+                    depth_max=config.depth_max,
+                    depth_scale=config.depth_scale,
+                    roi=(config.roi_x, config.roi_y, config.roi_w, config.roi_h),
+                )
             )
+            mailbox.enabled = self.capture_preview.get()
+            self._preview_mailbox = mailbox
+            try:
+                capture_frames(
+                    sensor,
+                    Path(self.capture_output.get()),
+                    config,
+                    intrinsics=intrinsics,
+                    preview_cb=mailbox.post,
+                )
+            finally:
+                self._preview_mailbox = None
             self._log("Capture dataset ready.")
 
         self.capture_button = ttk.Button(
@@ -358,32 +368,40 @@ class App:
         preview_frame = ttk.Frame(frame)
         preview_frame.grid(row=23, column=0, columnspan=3, sticky=tk.W, padx=8, pady=4)
         ttk.Checkbutton(
-            preview_frame, text="Live Preview (Kinect)", variable=self.capture_preview
+            preview_frame,
+            text="Live Preview (Kinect)",
+            variable=self.capture_preview,
+            command=self._toggle_preview,
         ).pack(anchor=tk.W)
+        preview_opts = ttk.Frame(preview_frame)
+        preview_opts.pack(anchor=tk.W)
+        ttk.Label(preview_opts, text="Preview FPS").pack(side=tk.LEFT)
+        ttk.Entry(preview_opts, textvariable=self.capture_preview_fps, width=5).pack(
+            side=tk.LEFT, padx=4
+        )
+        ttk.Label(preview_opts, text="View (color|depth)").pack(side=tk.LEFT, padx=4)
+        ttk.Entry(preview_opts, textvariable=self.capture_preview_mode, width=6).pack(
+            side=tk.LEFT
+        )
         self.capture_preview_label = ttk.Label(preview_frame)
         self.capture_preview_label.pack(anchor=tk.W, pady=4)
 
-    @staticmethod
-    def _to_ppm_bytes(color: np.ndarray, max_width: int = 480) -> bytes:
-        if color.ndim != 3 or color.shape[2] != 3:
-            return b""
-        height, width, _ = color.shape
-        step = 1
-        if width > max_width:
-            step = max(1, width // max_width)
-        if step > 1:
-            color = color[::step, ::step]
-            height, width, _ = color.shape
-        color = np.ascontiguousarray(color)
-        header = f"P6 {width} {height} 255\n".encode("ascii")
-        return header + color.tobytes()
-
-    def _update_preview(self, ppm: bytes) -> None:
-        if not self.capture_preview.get():
-            return
-        image = tk.PhotoImage(data=ppm)
-        self._preview_image = image
-        self.capture_preview_label.configure(image=image)
+    def _toggle_preview(self) -> None:
+        mailbox = self._preview_mailbox
+        if mailbox is not None:
+            mailbox.enabled = self.capture_preview.get()
+
+    def _poll_preview(self) -> None:
+        mailbox = self._preview_mailbox
+        delay_ms = 100
+        if mailbox is not None:
+            delay_ms = max(10, int(mailbox.period * 1000))
+            ppm = mailbox.take()
+            if ppm is not None and self.capture_preview.get():
+                image = tk.PhotoImage(data=ppm)
+                self._preview_image = image
+                self.capture_preview_label.configure(image=image)
+        self.root.after(delay_ms, self._poll_preview)
 
     def _refresh_dataset_state(self) -> None:
         capture_root = self.capture_output.get()
@@ -0,0 +1,519 @@
+from __future__ import annotations
+
+import itertools
+import math
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Protocol, Set, Tuple
+
+import numpy as np
+import open3d as o3d
+import open3d.core as o3c
+
+from kinect_forge.config import KinectIntrinsics, ReconstructionConfig
+from kinect_forge.odometry import pinhole, rgbd_from_arrays
+
+TSDF_BACKENDS = ("legacy", "tensor")
+BLOCK_RESOLUTION = 16
+# tsdf float32 + weight uint16 + color 3x uint16 per voxel.
+BLOCK_BYTES = 12 * BLOCK_RESOLUTION**3
+# Edge of a spill chunk, in blocks.
+CHUNK_BLOCKS = 4
+_ATTRIBUTES = ("tsdf", "weight", "color")
+
+_Frame = Tuple[o3d.t.geometry.Image, o3d.t.geometry.Image, o3c.Tensor]
+
+
+@dataclass(frozen=True)
+class IntegrationStats:
+    """`blocks` and `capacity` are voxel blocks; the legacy volume does not report them."""
+
+    backend: str
+    frames: int
+    seconds: float
+    blocks: Optional[int] = None
+    capacity: Optional[int] = None
+    budget: Optional[int] = None
+    # Chunks evicted to disk while integrating and read back (out-of-core only).
+    spilled: int = 0
+    reloaded: int = 0
+
+
+class TSDFIntegrator(Protocol):
+    def integrate(self, color: np.ndarray, depth: np.ndarray, pose: np.ndarray) -> None:
+        ...
+
+    def extract_mesh(self) -> o3d.geometry.TriangleMesh:
+        ...
+
+    def stats(self) -> IntegrationStats:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+def block_budget(config: ReconstructionConfig, intrinsics: KinectIntrinsics) -> int:
+    """Voxel blocks to preallocate: `tsdf_blocks`, or enough to cover the far
+    plane of the view frustum twice over (the truncation band spans blocks)."""
+    if config.tsdf_blocks > 0:
+        return config.tsdf_blocks
+    edge = config.voxel_length * BLOCK_RESOLUTION
+    width = intrinsics.width * config.depth_trunc / intrinsics.fx
+    height = intrinsics.height * config.depth_trunc / intrinsics.fy
+    return max(256, 2 * math.ceil(width * height / (edge * edge)))
+
+
+class LegacyIntegrator:
+    """`ScalableTSDFVolume`, one `integrate` call per frame."""
+
+    def __init__(
+        self,
+        config: ReconstructionConfig,
+        intrinsics: KinectIntrinsics,
+        depth_scale: float,
+        depth_trunc: float,
+    ) -> None:
+        self._volume = o3d.pipelines.integration.ScalableTSDFVolume(
+            voxel_length=config.voxel_length,
+            sdf_trunc=config.sdf_trunc,
+            color_type=o3d.pipelines.integration.TSDFVolumeColorType.RGB8,
+        )
+        self._intrinsic = pinhole(intrinsics)
+        self._depth_scale = depth_scale
+        self._depth_trunc = depth_trunc
+        self._frames = 0
+        self._seconds = 0.0
+
+    def integrate(self, color: np.ndarray, depth: np.ndarray, pose: np.ndarray) -> None:
+        started = time.perf_counter()
+        rgbd = rgbd_from_arrays(color, depth, self._depth_scale, self._depth_trunc)
+        self._volume.integrate(rgbd, self._intrinsic, np.linalg.inv(pose))
+        self._seconds += time.perf_counter() - started
+        self._frames += 1
+
+    def extract_mesh(self) -> o3d.geometry.TriangleMesh:
+        return self._volume.extract_triangle_mesh()
+
+    def stats(self) -> IntegrationStats:
+        return IntegrationStats("legacy", self._frames, self._seconds)
+
+    def close(self) -> None:
+        pass
+
+
+class TensorIntegrator:
+    """Open3D tensor `VoxelBlockGrid` on the CPU with a preallocated block budget.
+
+    Raw uint16 depth and uint8 color arrays are integrated directly. Weights
+    and colors are stored as uint16, 12 bytes per voxel. The hash map grows if
+    the scene needs more blocks than the budget, at the cost of a rehash.
+    """
+
+    def __init__(
+        self,
+        config: ReconstructionConfig,
+        intrinsics: KinectIntrinsics,
+        depth_scale: float,
+        depth_trunc: float,
+        block_count: Optional[int] = None,
+    ) -> None:
+        self._budget = block_budget(config, intrinsics) if block_count is None else block_count
+        self._voxel_length = config.voxel_length
+        self._grid = _block_grid(config.voxel_length, self._budget)
+        self._intrinsic = o3c.Tensor(
+            [
+                [intrinsics.fx, 0.0, intrinsics.cx],
+                [0.0, intrinsics.fy, intrinsics.cy],
+                [0.0, 0.0, 1.0],
+            ],
+            o3c.float64,
+        )
+        self._depth_scale = depth_scale
+        self._depth_trunc = depth_trunc
+        self._trunc_voxels = config.sdf_trunc / config.voxel_length
+        self._frames = 0
+        self._seconds = 0.0
+        # Where `load` read the volume from, and the chunks integrated since.
+        self._source: Optional[Path] = None
+        self._touched: Set[_Chunk] = set()
+
+    def integrate(self, color: np.ndarray, depth: np.ndarray, pose: np.ndarray) -> None:
+        started = time.perf_counter()
+        frame = self._frame(color, depth, pose)
+        blocks = self._frame_blocks(frame)
+        self._touched.update(_chunks_of(blocks.numpy()))
+        self._integrate_blocks(frame, blocks)
+        self._seconds += time.perf_counter() - started
+        self._frames += 1
+
+    def load(self, directory: Path) -> None:
+        """Continue integrating into a volume written by `save`."""
+        for chunk in saved_chunks(directory):
+            keys, values = _read_chunk(directory, chunk)
+            self._grid.hashmap().insert(
+                o3c.Tensor(keys), [o3c.Tensor(np.ascontiguousarray(value)) for value in values]
+            )
+        self._source = directory
+
+    def save(self, directory: Path) -> None:
+        """Write the volume as one set of `.npy` files per chunk.
+
+        Saving back to the directory it was loaded from rewrites only the
+        chunks integrated since, so an append costs what its frames touched.
+        """
+        incremental = _prepare_volume_dir(directory, self._source)
+        keys, active = self._resident_keys()
+        for chunk, rows in _group_chunks(keys):
+            if incremental and chunk not in self._touched:
+                continue
+            slots = active[o3c.Tensor(rows)]
+            values = [self._grid.attribute(name)[slots].numpy() for name in _ATTRIBUTES]
+            _write_chunk(directory, chunk, keys[rows], values)
+
+    def _resident_keys(self) -> Tuple[np.ndarray, o3c.Tensor]:
+        hashmap = self._grid.hashmap()
+        active = hashmap.active_buf_indices().to(o3c.int64)
+        return hashmap.key_tensor()[active].numpy(), active
+
+    def _frame(self, color: np.ndarray, depth: np.ndarray, pose: np.ndarray) -> _Frame:
+        if depth.dtype != np.uint16:
+            depth = depth.astype(np.uint16)
+        return (
+            o3d.t.geometry.Image(o3c.Tensor(np.ascontiguousarray(depth))),
+            o3d.t.geometry.Image(o3c.Tensor(np.ascontiguousarray(color))),
+            o3c.Tensor(np.linalg.inv(pose)),
+        )
+
+    def _frame_blocks(self, frame: _Frame) -> o3c.Tensor:
+        depth_image, _, extrinsic = frame
+        return self._grid.compute_unique_block_coordinates(
+            depth_image,
+            self._intrinsic,
+            extrinsic,
+            self._depth_scale,
+            self._depth_trunc,
+            self._trunc_voxels,
+        )
+
+    def _integrate_blocks(self, frame: _Frame, blocks: o3c.Tensor) -> None:
+        depth_image, color_image, extrinsic = frame
+        self._grid.integrate(
+            blocks,
+            depth_image,
+            color_image,
+            self._intrinsic,
+            self._intrinsic,
+            extrinsic,
+            self._depth_scale,
+            self._depth_trunc,
+            self._trunc_voxels,
+        )
+
+    def extract_mesh(self) -> o3d.geometry.TriangleMesh:
+        return _grid_mesh(self._grid)
+
+    def stats(self) -> IntegrationStats:
+        hashmap = self._grid.hashmap()
+        return IntegrationStats(
+            "tensor",
+            self._frames,
+            self._seconds,
+            blocks=int(hashmap.size()),
+            capacity=int(hashmap.capacity()),
+            budget=self._budget,
+        )
+
+    def close(self) -> None:
+        pass
+
+
+class OutOfCoreIntegrator(TensorIntegrator):
+    """Tensor TSDF that never holds more than `block_count` blocks in memory.
+
+    Space is split into chunks of `CHUNK_BLOCKS`³ blocks. When a frame needs
+    more blocks than are free, the chunks touched least recently are written
+    to `spill_dir` and dropped; a spilled chunk a later frame sees is read
+    back first. `extract_mesh` spills everything and meshes one chunk at a
+    time (with a one-block margin from its neighbours), then welds the pieces.
+    """
+
+    def __init__(
+        self,
+        config: ReconstructionConfig,
+        intrinsics: KinectIntrinsics,
+        depth_scale: float,
+        depth_trunc: float,
+        block_count: int,
+        spill_dir: Path,
+    ) -> None:
+        super().__init__(config, intrinsics, depth_scale, depth_trunc, block_count)
+        self._spill_dir = spill_dir
+        spill_dir.mkdir(parents=True, exist_ok=True)
+        # Resident chunks and the frame that last touched them.
+        self._resident: Dict[_Chunk, int] = {}
+        self._spilled: Set[_Chunk] = set()
+        self._peak_blocks = 0
+        self._evictions = 0
+        self._reloads = 0
+
+    def integrate(self, color: np.ndarray, depth: np.ndarray, pose: np.ndarray) -> None:
+        started = time.perf_counter()
+        frame = self._frame(color, depth, pose)
+        blocks = self._frame_blocks(frame)
+        keys = blocks.numpy()
+        chunks = _chunks_of(keys)
+        self._touched.update(chunks)
+        reload = [chunk for chunk in chunks if chunk in self._spilled]
+        self._make_room(sum(self._chunk_size(chunk) for chunk in reload), chunks)
+        for chunk in reload:
+            self._reload(chunk)
+        hashmap = self._grid.hashmap()
+        _, found = hashmap.find(blocks)
+        self._make_room(len(keys) - int(found.numpy().sum()), chunks)
+        for chunk in chunks:
+            self._resident[chunk] = self._frames
+        self._integrate_blocks(frame, blocks)
+        self._peak_blocks = max(self._peak_blocks, int(hashmap.size()))
+        self._seconds += time.perf_counter() - started
+        self._frames += 1
+
+    def extract_mesh(self) -> o3d.geometry.TriangleMesh:
+        self._spill(list(self._resident))
+        # Release the full-size grid before meshing chunk by chunk.
+        self._grid = _block_grid(self._voxel_length, 1)
+        mesh = o3d.geometry.TriangleMesh()
+        edge = self._voxel_length * BLOCK_RESOLUTION * CHUNK_BLOCKS
+        for chunk in sorted(self._spilled):
+            part = self._chunk_mesh(chunk)
+            if part.is_empty():
+                continue
+            # Marching cubes cells lie inside the block of their first voxel,
+            # so triangle centroids assign each triangle to exactly one chunk.
+            vertices = np.asarray(part.vertices)
+            centroids = vertices[np.asarray(part.triangles)].mean(axis=1)
+            lo = np.asarray(chunk) * edge
+            inside = np.all((centroids >= lo) & (centroids < lo + edge), axis=1)
+            part.remove_triangles_by_mask(~inside)
+            part.remove_unreferenced_vertices()
+            mesh += part
+        # Pieces share their boundary vertices exactly.
+        return mesh.merge_close_vertices(self._voxel_length * 1e-6)
+
+    def stats(self) -> IntegrationStats:
+        return IntegrationStats(
+            "tensor",
+            self._frames,
+            self._seconds,
+            blocks=self._peak_blocks,
+            capacity=self._budget,
+            budget=self._budget,
+            spilled=self._evictions,
+            reloaded=self._reloads,
+        )
+
+    def close(self) -> None:
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+    def load(self, directory: Path) -> None:
+        # Saved chunks become spilled ones, read only when a new frame reaches them.
+        for chunk in saved_chunks(directory):
+            for name in ("keys",) + _ATTRIBUTES:
+                shutil.copyfile(_chunk_file(directory, chunk, name), self._chunk_path(chunk, name))
+            self._spilled.add(chunk)
+        self._source = directory
+
+    def save(self, directory: Path) -> None:
+        incremental = _prepare_volume_dir(directory, self._source)
+        self._spill(list(self._resident))
+        for chunk in self._spilled:
+            if incremental and chunk not in self._touched:
+                continue
+            for name in ("keys",) + _ATTRIBUTES:
+                shutil.copyfile(self._chunk_path(chunk, name), _chunk_file(directory, chunk, name))
+
+    def _make_room(self, needed: int, keep: Set[_Chunk]) -> None:
+        free = self._budget - int(self._grid.hashmap().size())
+        if needed <= free:
+            return
+        keys, _ = self._resident_keys()
+        owners, counts = np.unique(keys // CHUNK_BLOCKS, axis=0, return_counts=True)
+        sizes = {tuple(owner): int(count) for owner, count in zip(owners.tolist(), counts)}
+        victims: List[_Chunk] = []
+        for chunk in sorted(self._resident, key=self._resident.__getitem__):
+            if free >= needed:
+                break
+            if chunk in keep:
+                continue
+            victims.append(chunk)
+            free += sizes.get(chunk, 0)
+        if free < needed:
+            touched = needed + sum(sizes.get(chunk, 0) for chunk in keep)
+            raise RuntimeError(
+                f"Memory budget too small: one frame touches {touched} voxel blocks, "
+                f"the budget holds {self._budget}."
+            )
+        self._spill(victims)
+        self._evictions += len(victims)
+
+    def _spill(self, chunks: List[_Chunk]) -> None:
+        if not chunks:
+            return
+        keys, active = self._resident_keys()
+        owners = keys // CHUNK_BLOCKS
+        for chunk in chunks:
+            mask = np.all(owners == chunk, axis=1)
+            if mask.any():
+                slots = active[o3c.Tensor(np.flatnonzero(mask))]
+                values = [self._grid.attribute(name)[slots].numpy() for name in _ATTRIBUTES]
+                self._write(chunk, keys[mask], values)
+                # Freed slots are reused as-is for new blocks, which must start empty.
+                for name in _ATTRIBUTES:
+                    self._grid.attribute(name)[slots] = 0
+                self._grid.hashmap().erase(o3c.Tensor(keys[mask]))
+            del self._resident[chunk]
+
+    def _reload(self, chunk: _Chunk) -> None:
+        keys, values = self._read(chunk)
+        self._grid.hashmap().insert(
+            o3c.Tensor(keys), [o3c.Tensor(np.ascontiguousarray(value)) for value in values]
+        )
+        for name in ("keys",) + _ATTRIBUTES:
+            self._chunk_path(chunk, name).unlink(missing_ok=True)
+        self._spilled.discard(chunk)
+        self._reloads += 1
+
+    def _chunk_path(self, chunk: _Chunk, name: str) -> Path:
+        return _chunk_file(self._spill_dir, chunk, name)
+
+    def _chunk_size(self, chunk: _Chunk) -> int:
+        return len(np.load(self._chunk_path(chunk, "keys"), mmap_mode="r"))
+
+    def _write(self, chunk: _Chunk, keys: np.ndarray, values: List[np.ndarray]) -> None:
+        _write_chunk(self._spill_dir, chunk, keys, values)
+        self._spilled.add(chunk)
+
+    def _read(
+        self, chunk: _Chunk, lo: Optional[np.ndarray] = None, hi: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, List[np.ndarray]]:
+        return _read_chunk(self._spill_dir, chunk, lo, hi)
+
+    def _chunk_mesh(self, chunk: _Chunk) -> o3d.geometry.TriangleMesh:
+        lo = np.asarray(chunk) * CHUNK_BLOCKS - 1
+        hi = lo + CHUNK_BLOCKS + 1
+        keys: List[np.ndarray] = []
+        values: List[List[np.ndarray]] = [[] for _ in _ATTRIBUTES]
+        for offset in itertools.product((-1, 0, 1), repeat=3):
+            neighbour = (chunk[0] + offset[0], chunk[1] + offset[1], chunk[2] + offset[2])
+            if neighbour not in self._spilled:
+                continue
+            block_keys, block_values = self._read(neighbour, lo, hi)
+            keys.append(block_keys)
+            for store, value in zip(values, block_values):
+                store.append(value)
+        grid = _block_grid(self._voxel_length, sum(len(part) for part in keys))
+        grid.hashmap().insert(
+            o3c.Tensor(np.concatenate(keys)),
+            [o3c.Tensor(np.concatenate(parts)) for parts in values],
+        )
+        return _grid_mesh(grid)
+
+
+_Chunk = Tuple[int, int, int]
+
+
+def _chunks_of(keys: np.ndarray) -> Set[_Chunk]:
+    return {tuple(chunk) for chunk in np.unique(keys // CHUNK_BLOCKS, axis=0).tolist()}
+
+
+def _group_chunks(keys: np.ndarray) -> Iterator[Tuple[_Chunk, np.ndarray]]:
+    """Each chunk holding some of `keys`, with the rows of its keys."""
+    owners, inverse = np.unique(keys // CHUNK_BLOCKS, axis=0, return_inverse=True)
+    order = np.argsort(inverse.reshape(-1), kind="stable")
+    bounds = np.cumsum(np.bincount(inverse.reshape(-1), minlength=len(owners)))
+    for owner, rows in zip(owners.tolist(), np.split(order, bounds[:-1])):
+        yield tuple(owner), rows
+
+
+def _chunk_file(directory: Path, chunk: _Chunk, name: str) -> Path:
+    return directory / f"{chunk[0]}_{chunk[1]}_{chunk[2]}_{name}.npy"
+
+
+def _write_chunk(
+    directory: Path, chunk: _Chunk, keys: np.ndarray, values: List[np.ndarray]
+) -> None:
+    np.save(_chunk_file(directory, chunk, "keys"), keys)
+    for name, value in zip(_ATTRIBUTES, values):
+        np.save(_chunk_file(directory, chunk, name), value)
+
+
+def _read_chunk(
+    directory: Path,
+    chunk: _Chunk,
+    lo: Optional[np.ndarray] = None,
+    hi: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """Blocks of a chunk on disk, optionally only those inside [lo, hi]."""
+    keys = np.load(_chunk_file(directory, chunk, "keys"))
+    rows = slice(None) if lo is None else np.all((keys >= lo) & (keys <= hi), axis=1)
+    values = [
+        np.load(_chunk_file(directory, chunk, name), mmap_mode="r")[rows] for name in _ATTRIBUTES
+    ]
+    return keys[rows], values
+
+
+def saved_chunks(directory: Path) -> List[_Chunk]:
+    chunks: List[_Chunk] = []
+    for path in sorted(directory.glob("*_keys.npy")):
+        x, y, z = path.name[: -len("_keys.npy")].split("_")
+        chunks.append((int(x), int(y), int(z)))
+    return chunks
+
+
+def _prepare_volume_dir(directory: Path, source: Optional[Path]) -> bool:
+    """Whether a save can rewrite only touched chunks; otherwise start `directory` empty."""
+    if source is not None and source.resolve() == directory.resolve():
+        return True
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True)
+    return False
+
+
+def _block_grid(voxel_length: float, block_count: int) -> o3d.t.geometry.VoxelBlockGrid:
+    return o3d.t.geometry.VoxelBlockGrid(
+        attr_names=_ATTRIBUTES,
+        attr_dtypes=(o3c.float32, o3c.uint16, o3c.uint16),
+        attr_channels=((1), (1), (3)),
+        voxel_size=voxel_length,
+        block_resolution=BLOCK_RESOLUTION,
+        block_count=max(1, block_count),
+        device=o3c.Device("CPU:0"),
+    )
+
+
+def _grid_mesh(grid: o3d.t.geometry.VoxelBlockGrid) -> o3d.geometry.TriangleMesh:
+    # Keep every observed voxel, as the legacy volume does; the threshold is
+    # exclusive and weights are whole observations.
+    return grid.extract_triangle_mesh(weight_threshold=0.5).to_legacy()
+
+
+def create_integrator(
+    config: ReconstructionConfig,
+    intrinsics: KinectIntrinsics,
+    depth_scale: float,
+    depth_trunc: float,
+    spill: Optional[Tuple[int, Path]] = None,
+) -> TSDFIntegrator:
+    """`spill` (block count, directory) selects the out-of-core tensor grid."""
+    if spill is not None:
+        block_count, spill_dir = spill
+        return OutOfCoreIntegrator(
+            config, intrinsics, depth_scale, depth_trunc, block_count, spill_dir
+        )
+    if config.tsdf_backend == "legacy":
+        return LegacyIntegrator(config, intrinsics, depth_scale, depth_trunc)
+    if config.tsdf_backend == "tensor":
+        return TensorIntegrator(config, intrinsics, depth_scale, depth_trunc)
+    raise ValueError(f"tsdf_backend must be one of: {', '.join(TSDF_BACKENDS)}")
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+THUMBNAIL_FILE = "depth_thumbs_{stride}.npy"
+# Fingerprint of the dataset the thumbnails were built from.
+THUMBNAIL_KEY_FILE = "depth_thumbs_{stride}.key"
+
+
+class DepthChangeDetector:
+    """Mean absolute depth change against a cached, downsampled reference frame.
+
+    Only every `stride`-th pixel inside the ROI is compared, in integer depth
+    units. Pixels with no depth (0) in either frame are skipped, so dropouts
+    and masked background count as neither change nor stillness: the delta
+    is the mean over the samples valid in both frames.
+    """
+
+    def __init__(
+        self,
+        depth_scale: float,
+        stride: int = 2,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+    ) -> None:
+        if stride < 1:
+            raise ValueError("stride must be >= 1")
+        self._depth_scale = depth_scale
+        self._stride = stride
+        self._roi = roi
+        self._shape: Optional[Tuple[int, ...]] = None
+        self._window: Tuple[slice, slice] = (slice(None), slice(None))
+        self._reference = np.empty(0, dtype=np.int32)
+        self._reference_valid = np.empty(0, dtype=bool)
+        self._diff = np.empty(0, dtype=np.int32)
+        self._valid = np.empty(0, dtype=bool)
+        self._has_reference = False
+
+    @property
+    def has_reference(self) -> bool:
+        return self._has_reference
+
+    def reset(self) -> None:
+        self._has_reference = False
+
+    def set_reference(self, depth: np.ndarray) -> None:
+        self._ensure_window(depth)
+        np.copyto(self._reference, depth[self._window])
+        np.not_equal(self._reference, 0, out=self._reference_valid)
+        self._has_reference = True
+
+    def delta(self, depth: np.ndarray) -> float:
+        """Return the mean absolute change in meters (0.0 without a reference
+        or without samples valid in both frames)."""
+        if not self._has_reference:
+            return 0.0
+        if depth.shape != self._shape:
+            raise ValueError("Depth frame size changed since the reference was set.")
+        sample = depth[self._window]
+        np.not_equal(sample, 0, out=self._valid)
+        np.logical_and(self._valid, self._reference_valid, out=self._valid)
+        count = int(np.count_nonzero(self._valid))
+        if count == 0:
+            return 0.0
+        np.subtract(sample, self._reference, out=self._diff)
+        np.abs(self._diff, out=self._diff)
+        total = int(self._diff.sum(dtype=np.int64, where=self._valid))
+        return total / count / self._depth_scale
+
+    def _ensure_window(self, depth: np.ndarray) -> None:
+        if depth.shape == self._shape:
+            return
+        height, width = depth.shape[:2]
+        step = self._stride
+        y0, y1, x0, x1 = 0, height, 0, width
+        if self._roi is not None and self._roi[2] > 0 and self._roi[3] > 0:
+            roi_x, roi_y, roi_w, roi_h = self._roi
+            x0 = max(roi_x, 0)
+            y0 = max(roi_y, 0)
+            x1 = min(x0 + roi_w, width)
+            y1 = min(y0 + roi_h, height)
+            # Snap the window onto the full-frame sampling grid.
+            x0 -= x0 % step
+            y0 -= y0 % step
+        self._shape = depth.shape
+        self._window = (slice(y0, y1, step), slice(x0, x1, step))
+        sample_shape = (len(range(y0, y1, step)), len(range(x0, x1, step)))
+        self._reference = np.zeros(sample_shape, dtype=np.int32)
+        self._reference_valid = np.zeros(sample_shape, dtype=bool)
+        self._diff = np.empty(sample_shape, dtype=np.int32)
+        self._valid = np.empty(sample_shape, dtype=bool)
+        self._has_reference = False
+
+
+def depth_thumbnail(depth: np.ndarray, stride: int) -> np.ndarray:
+    """Every `stride`-th depth pixel, the same grid `DepthChangeDetector` samples."""
+    return np.ascontiguousarray(depth[::stride, ::stride])
+
+
+def thumbnail_shape(width: int, height: int, stride: int) -> Tuple[int, int]:
+    return -(-height // stride), -(-width // stride)
+
+
+def load_depth_thumbnails(
+    root: Path, stride: int, count: int, shape: Tuple[int, int], fingerprint: str
+) -> Optional[np.ndarray]:
+    """Memory-map cached depth thumbnails, or None if missing or built from
+    other frames than those `fingerprint` describes."""
+    path = root / THUMBNAIL_FILE.format(stride=stride)
+    if not path.is_file():
+        return None
+    try:
+        if (root / THUMBNAIL_KEY_FILE.format(stride=stride)).read_text() != fingerprint:
+            return None
+        thumbs: np.ndarray = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if thumbs.dtype != np.uint16 or thumbs.shape != (count, *shape):
+        return None
+    return thumbs
+
+
+def save_depth_thumbnails(
+    root: Path, stride: int, thumbs: np.ndarray, fingerprint: str
+) -> bool:
+    """Store thumbnails next to the dataset; read-only datasets are left alone."""
+    path = root / THUMBNAIL_FILE.format(stride=stride)
+    key = root / THUMBNAIL_KEY_FILE.format(stride=stride)
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        # The key goes first and comes back last, so torn writes never match.
+        key.unlink(missing_ok=True)
+        with tmp.open("wb") as handle:
+            np.save(handle, thumbs)
+        tmp.replace(path)
+        key.write_text(fingerprint)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        return False
+    return True
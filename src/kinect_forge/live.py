@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import queue
+import time
+from dataclasses import dataclass
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from kinect_forge.config import KinectIntrinsics, ReconstructionConfig
+
+LIVE_MESH_FILE = "model.ply"
+LIVE_TRAJECTORY_FILE = "trajectory.log"
+# The worker gives the CPU to the capture threads whenever cores are short.
+_WORKER_NICENESS = 19
+
+
+@dataclass
+class LiveResult:
+    frames_integrated: int
+    frames_skipped: int
+    odometry_failures: int
+    finish_seconds: float
+    mesh_path: Optional[Path] = None
+    trajectory_path: Optional[Path] = None
+    error: Optional[str] = None
+
+
+class _FrameSlots:
+    """A ring of color/depth frame slots in shared memory."""
+
+    def __init__(
+        self,
+        slots: int,
+        color_shape: Tuple[int, ...],
+        color_dtype: str,
+        depth_shape: Tuple[int, ...],
+        depth_dtype: str,
+        names: Optional[Tuple[str, str]] = None,
+    ) -> None:
+        self.spec = (slots, color_shape, color_dtype, depth_shape, depth_dtype)
+        color_layout = (slots, *color_shape)
+        depth_layout = (slots, *depth_shape)
+        if names is None:
+            color_bytes = int(np.prod(color_layout)) * np.dtype(color_dtype).itemsize
+            depth_bytes = int(np.prod(depth_layout)) * np.dtype(depth_dtype).itemsize
+            self._color_shm = SharedMemory(create=True, size=max(1, color_bytes))
+            self._depth_shm = SharedMemory(create=True, size=max(1, depth_bytes))
+        else:
+            self._color_shm = SharedMemory(name=names[0])
+            self._depth_shm = SharedMemory(name=names[1])
+        self.colors: np.ndarray = np.ndarray(
+            color_layout, dtype=color_dtype, buffer=self._color_shm.buf
+        )
+        self.depths: np.ndarray = np.ndarray(
+            depth_layout, dtype=depth_dtype, buffer=self._depth_shm.buf
+        )
+
+    @property
+    def names(self) -> Tuple[str, str]:
+        return self._color_shm.name, self._depth_shm.name
+
+    def fits(self, color: np.ndarray, depth: np.ndarray) -> bool:
+        return (
+            color.shape == self.colors.shape[1:]
+            and depth.shape == self.depths.shape[1:]
+            and color.dtype == self.colors.dtype
+            and depth.dtype == self.depths.dtype
+        )
+
+    def close(self, unlink: bool = False) -> None:
+        # Views into the buffers must go before the mappings can close.
+        del self.colors
+        del self.depths
+        for shm in (self._color_shm, self._depth_shm):
+            shm.close()
+            if unlink:
+                shm.unlink()
+
+
+class LiveReconstructor:
+    """Integrate saved capture frames into a TSDF volume in a spawned process.
+
+    Open3D integration holds the GIL for the whole call, so the worker runs in
+    its own process; frames reach it through a ring of `queue_size` shared
+    memory slots. `submit` copies the frame into a free slot and never waits:
+    when no slot is free the frame is skipped (and counted), so capture keeps
+    its rate. Frames whose accumulated capture delta since the last integrated
+    frame is below `config.keyframe_threshold` are skipped before copying. Poses
+    come from frame-to-frame RGB-D odometry, as in `reconstruct_mesh` without ICP.
+    """
+
+    def __init__(
+        self,
+        intrinsics: KinectIntrinsics,
+        config: ReconstructionConfig,
+        queue_size: int = 8,
+    ) -> None:
+        self._intrinsics = intrinsics
+        self._config = config
+        self._slot_count = max(1, queue_size)
+        self._context = multiprocessing.get_context("spawn")
+        self._work: "Queue[Any]" = self._context.Queue()
+        self._free: "Queue[int]" = self._context.Queue()
+        self._results: "Queue[LiveResult]" = self._context.Queue()
+        self._process: Optional[BaseProcess] = None
+        self._slots: Optional[_FrameSlots] = None
+        self._free_count = 0
+        self._change = 0.0
+        self._submitted = 0
+        self._skipped = 0
+        self._error: Optional[str] = None
+        self._finished = False
+
+    def start(self) -> None:
+        self._process = self._context.Process(
+            target=_live_worker,
+            args=(self._intrinsics, self._config, self._work, self._free, self._results),
+            name="kinect-forge-live",
+            daemon=True,
+        )
+        self._process.start()
+        if hasattr(os, "setpriority") and self._process.pid is not None:
+            # Lowered from here so the worker's own start-up imports already yield to capture.
+            os.setpriority(os.PRIO_PROCESS, self._process.pid, _WORKER_NICENESS)
+
+    def submit(self, index: int, color: np.ndarray, depth: np.ndarray, delta: float = 0.0) -> bool:
+        threshold = self._config.keyframe_threshold
+        self._change += delta
+        if self._submitted and threshold > 0 and self._change < threshold:
+            return False
+        if self._error is not None:
+            self._skipped += 1
+            return False
+        if self._slots is None:
+            self._open_slots(color, depth)
+        assert self._slots is not None
+        if not self._slots.fits(color, depth):
+            self._error = "Frame size changed during live reconstruction."
+            self._skipped += 1
+            return False
+        slot = self._take_slot()
+        if slot is None:
+            self._skipped += 1
+            return False
+        np.copyto(self._slots.colors[slot], color)
+        np.copyto(self._slots.depths[slot], depth)
+        self._work.put(("frame", index, slot))
+        self._submitted += 1
+        self._change = 0.0
+        return True
+
+    def finish(self, output_dir: Path) -> LiveResult:
+        """Integrate the remaining frames, then write the mesh and trajectory."""
+        started = time.monotonic()
+        assert self._process is not None, "start() was not called"
+        self._work.put(("finish", output_dir))
+        result: Optional[LiveResult] = None
+        while result is None:
+            try:
+                result = self._results.get(timeout=0.2)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    result = LiveResult(
+                        0,
+                        0,
+                        0,
+                        0.0,
+                        error=f"Live worker exited with code {self._process.exitcode}",
+                    )
+        self._finished = True
+        self.close()
+        result.frames_skipped = self._skipped
+        if self._error is not None:
+            result.error = self._error
+        result.finish_seconds = time.monotonic() - started
+        return result
+
+    def close(self) -> None:
+        """Stop the worker (if still running) and release the shared memory."""
+        if self._process is not None:
+            if not self._finished:
+                self._process.kill()
+            self._process.join()
+        if self._slots is not None:
+            self._slots.close(unlink=True)
+            self._slots = None
+
+    def _open_slots(self, color: np.ndarray, depth: np.ndarray) -> None:
+        self._slots = _FrameSlots(
+            self._slot_count, color.shape, color.dtype.str, depth.shape, depth.dtype.str
+        )
+        self._work.put(("slots", self._slots.names, self._slots.spec))
+        self._free_count = self._slot_count
+
+    def _take_slot(self) -> Optional[int]:
+        # Slots never handed out yet are taken first; the rest come back from the worker.
+        if self._free_count > 0:
+            self._free_count -= 1
+            return self._slot_count - self._free_count - 1
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            return None
+
+
+def _live_worker(
+    intrinsics: KinectIntrinsics,
+    config: ReconstructionConfig,
+    work: "Queue[Any]",
+    free: "Queue[int]",
+    results: "Queue[LiveResult]",
+) -> None:
+    # Open3D loads only here: the capture process never imports it.
+    import open3d as o3d
+
+    from kinect_forge.export import write_mesh
+    from kinect_forge.odometry import rgbd_from_arrays
+    from kinect_forge.reconstruct import _clean_mesh
+    from kinect_forge.trajectory import write_trajectory_log
+
+    intrinsic = o3d.camera.PinholeCameraIntrinsic(
+        intrinsics.width,
+        intrinsics.height,
+        intrinsics.fx,
+        intrinsics.fy,
+        intrinsics.cx,
+        intrinsics.cy,
+    )
+    volume = o3d.pipelines.integration.ScalableTSDFVolume(
+        voxel_length=config.voxel_length,
+        sdf_trunc=config.sdf_trunc,
+        color_type=o3d.pipelines.integration.TSDFVolumeColorType.RGB8,
+    )
+    odom_jacobian = o3d.pipelines.odometry.RGBDOdometryJacobianFromHybridTerm()
+    slots: Optional[_FrameSlots] = None
+    frame_ids: List[int] = []
+    poses: List[np.ndarray] = []
+    odometry_failures = 0
+    error: Optional[str] = None
+    previous: Optional[o3d.geometry.RGBDImage] = None
+    pose = np.eye(4)
+    while True:
+        message = work.get()
+        if message[0] == "finish":
+            output_dir: Path = message[1]
+            break
+        if message[0] == "slots":
+            _, names, (count, color_shape, color_dtype, depth_shape, depth_dtype) = message
+            slots = _FrameSlots(count, color_shape, color_dtype, depth_shape, depth_dtype, names)
+            continue
+        _, index, slot = message
+        assert slots is not None
+        color = slots.colors[slot].copy()
+        depth = slots.depths[slot].copy()
+        free.put(slot)
+        if error is not None:
+            continue
+        try:
+            rgbd = rgbd_from_arrays(color, depth, config.depth_scale, config.depth_trunc)
+            if previous is not None:
+                success, trans, _ = o3d.pipelines.odometry.compute_rgbd_odometry(
+                    previous, rgbd, intrinsic, np.eye(4), odom_jacobian
+                )
+                if not success:
+                    odometry_failures += 1
+                    trans = np.eye(4)
+                # Camera-to-world, as in `chain_poses`.
+                pose = pose @ np.linalg.inv(trans)
+            volume.integrate(rgbd, intrinsic, np.linalg.inv(pose))
+            frame_ids.append(index)
+            poses.append(pose)
+            previous = rgbd
+        except Exception as exc:  # reported by finish(); capture continues
+            error = str(exc)
+    if slots is not None:
+        slots.close()
+
+    result = LiveResult(
+        frames_integrated=len(poses),
+        frames_skipped=0,
+        odometry_failures=odometry_failures,
+        finish_seconds=0.0,
+        error=error,
+    )
+    if error is None and not poses:
+        result.error = "No frames were integrated."
+    elif error is None:
+        try:
+            mesh = _clean_mesh(volume.extract_triangle_mesh(), config)
+            if mesh.is_empty():
+                result.error = "Live reconstruction produced an empty mesh."
+            else:
+                result.mesh_path = output_dir / LIVE_MESH_FILE
+                result.trajectory_path = output_dir / LIVE_TRAJECTORY_FILE
+                write_mesh(result.mesh_path, mesh)
+                write_trajectory_log(result.trajectory_path, frame_ids, poses)
+        except Exception as exc:
+            result.error = str(exc)
+    results.put(result)
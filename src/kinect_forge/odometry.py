@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import open3d as o3d
+
+from kinect_forge.config import KinectIntrinsics
+from kinect_forge.dataset import FrameStore, open_frames
+
+
+@dataclass(frozen=True)
+class PairResult:
+    """Alignment of consecutive keyframes (odometry or ICP).
+
+    `transformation` maps points from the `source` camera into the `target`
+    camera, as returned by Open3D. For odometry `fitness` is the share of the
+    source's valid depth pixels that found a correspondence; for ICP it is
+    Open3D's inlier ratio.
+    """
+
+    source: int
+    target: int
+    success: bool
+    transformation: np.ndarray
+    fitness: float
+    # Inlier RMSE in meters; only ICP refinement measures it.
+    rmse: float = 0.0
+
+
+def pinhole(intrinsics: KinectIntrinsics) -> o3d.camera.PinholeCameraIntrinsic:
+    return o3d.camera.PinholeCameraIntrinsic(
+        intrinsics.width,
+        intrinsics.height,
+        intrinsics.fx,
+        intrinsics.fy,
+        intrinsics.cx,
+        intrinsics.cy,
+    )
+
+
+def rgbd_from_arrays(
+    color: np.ndarray,
+    depth: np.ndarray,
+    depth_scale: float,
+    depth_trunc: float,
+) -> o3d.geometry.RGBDImage:
+    return o3d.geometry.RGBDImage.create_from_color_and_depth(
+        o3d.geometry.Image(np.ascontiguousarray(color)),
+        o3d.geometry.Image(np.ascontiguousarray(depth)),
+        depth_scale=depth_scale,
+        depth_trunc=depth_trunc,
+        convert_rgb_to_intensity=False,
+    )
+
+
+def odometry_pair(
+    source: int,
+    target: int,
+    source_rgbd: o3d.geometry.RGBDImage,
+    target_rgbd: o3d.geometry.RGBDImage,
+    intrinsic: o3d.camera.PinholeCameraIntrinsic,
+    initial: Optional[np.ndarray] = None,
+) -> PairResult:
+    success, trans, info = o3d.pipelines.odometry.compute_rgbd_odometry(
+        source_rgbd,
+        target_rgbd,
+        intrinsic,
+        np.eye(4) if initial is None else initial,
+        o3d.pipelines.odometry.RGBDOdometryJacobianFromHybridTerm(),
+    )
+    # The last diagonal entry of the information matrix counts correspondences.
+    valid = np.count_nonzero(np.asarray(source_rgbd.depth))
+    fitness = min(1.0, float(info[5, 5]) / valid) if success and valid else 0.0
+    return PairResult(source, target, bool(success), np.asarray(trans), fitness)
+
+
+def chain_poses(
+    pairs: Sequence[PairResult], fallback: Optional[Sequence[np.ndarray]] = None
+) -> List[np.ndarray]:
+    """Camera-to-world poses from consecutive pair results, the first at the origin.
+
+    A failed pair uses `fallback[k]` (same convention as `transformation`) when
+    given, and no motion otherwise.
+    """
+    poses: List[np.ndarray] = [np.eye(4)]
+    for pos, pair in enumerate(pairs):
+        if pair.success:
+            trans = pair.transformation
+        elif fallback is not None:
+            trans = fallback[pos]
+        else:
+            trans = np.eye(4)
+        poses.append(poses[-1] @ np.linalg.inv(trans))
+    return poses
+
+
+def chunk_pairs(indices: Sequence[int], chunk_size: int) -> List[List[int]]:
+    """Split frames into runs of `chunk_size` pairs that share their boundary frame."""
+    step = max(1, chunk_size)
+    return [list(indices[start : start + step + 1]) for start in range(0, len(indices) - 1, step)]
+
+
+@dataclass(frozen=True)
+class _WorkerSetup:
+    root: Path
+    intrinsics: KinectIntrinsics
+    depth_scale: float
+    depth_trunc: float
+
+
+_worker: Optional[Tuple[FrameStore, _WorkerSetup]] = None
+
+
+def _init_worker(setup: _WorkerSetup) -> None:
+    global _worker
+    _worker = (open_frames(setup.root), setup)
+
+
+def _odometry_chunk(
+    chunk: List[int], initials: Optional[List[np.ndarray]] = None
+) -> List[PairResult]:
+    assert _worker is not None, "worker not initialized"
+    frames, setup = _worker
+    intrinsic = pinhole(setup.intrinsics)
+    results: List[PairResult] = []
+    previous: Optional[o3d.geometry.RGBDImage] = None
+    for pos, idx in enumerate(chunk):
+        rgbd = rgbd_from_arrays(
+            frames.read_color(idx), frames.read_depth(idx), setup.depth_scale, setup.depth_trunc
+        )
+        if previous is not None:
+            initial = None if initials is None else initials[pos - 1]
+            results.append(odometry_pair(chunk[pos - 1], idx, previous, rgbd, intrinsic, initial))
+        previous = rgbd
+    return results
+
+
+class ParallelOdometry:
+    """Pairwise odometry over consecutive keyframes on a process pool.
+
+    Open3D images cannot be pickled, so each worker opens the dataset itself
+    and decodes the frames of its chunk (one boundary frame is decoded twice).
+    Chunks are submitted by `start` and collected in order by `results`, so the
+    caller can load frames for later stages in between. Every pair runs the same
+    `odometry_pair` call as the serial path, so results are identical.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        intrinsics: KinectIntrinsics,
+        depth_scale: float,
+        depth_trunc: float,
+        workers: int,
+        chunk_size: int = 16,
+    ) -> None:
+        self._setup = _WorkerSetup(root, intrinsics, depth_scale, depth_trunc)
+        self._workers = max(1, workers)
+        self._chunk_size = max(1, chunk_size)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._futures: List["Future[List[PairResult]]"] = []
+
+    def start(
+        self, indices: Sequence[int], initials: Optional[Sequence[np.ndarray]] = None
+    ) -> None:
+        """Submit all pairs; `initials[k]` (optional) seeds pair k."""
+        chunks = chunk_pairs(indices, self._chunk_size)
+        if not chunks:
+            return
+        # spawn: forked children would inherit Open3D/OpenMP thread state.
+        self._pool = ProcessPoolExecutor(
+            max_workers=min(self._workers, len(chunks)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._setup,),
+        )
+        self._futures = []
+        start = 0
+        for chunk in chunks:
+            seeds = None if initials is None else list(initials[start : start + len(chunk) - 1])
+            self._futures.append(self._pool.submit(_odometry_chunk, chunk, seeds))
+            start += len(chunk) - 1
+
+    def results(self) -> List[PairResult]:
+        try:
+            return [pair for future in self._futures for pair in future.result()]
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        self._futures = []
@@ -44,6 +44,10 @@ def reconstruction_preset(name: str) -> ReconstructionConfig:
         icp_distance=float(data.get("icp_distance", 0.015)),
         icp_voxel=float(data.get("icp_voxel", 0.008)),
         icp_iterations=int(data.get("icp_iterations", 40)),
+        icp_schedule=tuple(
+            (float(voxel), float(distance), int(iterations))
+            for voxel, distance, iterations in data.get("icp_schedule", [])
+        ),
         smooth_iterations=int(data.get("smooth_iterations", 5)),
         fill_hole_radius=float(data.get("fill_hole_radius", 0.008)),
         preset=preset,
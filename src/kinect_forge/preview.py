@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+PREVIEW_MODES = ("color", "depth")
+
+
+@dataclass(frozen=True)
+class PreviewConfig:
+    fps: float = 10.0
+    max_width: int = 320
+    mode: str = "color"
+    depth_min: float = 0.3
+    depth_max: float = 2.5
+    depth_scale: float = 1000.0
+    roi: Optional[Tuple[int, int, int, int]] = None
+    show_mask: bool = True
+
+
+def _depth_lut(lo: int, hi: int) -> np.ndarray:
+    """Color for every raw uint16 depth value: turbo ramp over [lo, hi], black for 0."""
+    ramp = np.arange(256, dtype=np.uint8).reshape(256, 1)
+    colors = cv2.cvtColor(cv2.applyColorMap(ramp, cv2.COLORMAP_TURBO), cv2.COLOR_BGR2RGB)
+    values = np.clip(np.arange(65536, dtype=np.float32), lo, hi)
+    index = ((values - lo) * (255.0 / max(hi - lo, 1))).astype(np.uint8)
+    lut = colors.reshape(256, 3)[index]
+    lut[0] = 0
+    return lut
+
+
+class PreviewMailbox:
+    """Latest-frame-wins hand-off between capture and a UI thread.
+
+    `post` is called from the capture loop. It returns immediately unless a
+    preview frame is due (at most `fps` per second), in which case the frame is
+    downscaled into a reused buffer, rendered, and replaces any frame the UI has
+    not taken yet. The UI polls `take`, so a slow UI never backs up capture.
+    """
+
+    def __init__(self, config: PreviewConfig) -> None:
+        if config.mode not in PREVIEW_MODES:
+            raise ValueError(f"mode must be one of: {', '.join(PREVIEW_MODES)}")
+        self._config = config
+        self._period = 1.0 / config.fps if config.fps > 0 else 0.0
+        self._lock = threading.Lock()
+        self._latest: Optional[bytes] = None
+        self._last_post = 0.0
+        self._size: Optional[Tuple[int, int]] = None
+        self._scale = 1.0
+        self._out_size = (1, 1)
+        self._color = np.empty(0, dtype=np.uint8)
+        self._depth = np.empty(0, dtype=np.uint16)
+        self._keep = np.empty(0, dtype=bool)
+        self._depth_range = (
+            int(round(config.depth_min * config.depth_scale)),
+            int(round(config.depth_max * config.depth_scale)),
+        )
+        self._lut = _depth_lut(*self._depth_range) if config.mode == "depth" else None
+        self.enabled = True
+        self.rendered = 0
+        self.replaced = 0
+
+    @property
+    def period(self) -> float:
+        return self._period
+
+    def post(self, color: np.ndarray, depth: np.ndarray) -> None:
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._last_post < self._period:
+            return
+        self._last_post = now
+        payload = self._render(color, depth)
+        with self._lock:
+            if self._latest is not None:
+                self.replaced += 1
+            self._latest = payload
+        self.rendered += 1
+
+    def take(self) -> Optional[bytes]:
+        """Return the newest preview as PPM bytes, or None if nothing new arrived."""
+        with self._lock:
+            payload, self._latest = self._latest, None
+        return payload
+
+    def _ensure_buffers(self, height: int, width: int) -> None:
+        if self._size == (height, width):
+            return
+        self._size = (height, width)
+        self._scale = min(1.0, self._config.max_width / width)
+        out_w = max(1, int(round(width * self._scale)))
+        out_h = max(1, int(round(height * self._scale)))
+        self._out_size = (out_h, out_w)
+        self._color = np.empty((out_h, out_w, 3), dtype=np.uint8)
+        self._depth = np.empty((out_h, out_w), dtype=np.uint16)
+        self._keep = np.empty((out_h, out_w), dtype=bool)
+
+    def _render(self, color: np.ndarray, depth: np.ndarray) -> bytes:
+        config = self._config
+        if depth.dtype != np.uint16:
+            depth = depth.astype(np.uint16)
+        height, width = depth.shape[:2]
+        self._ensure_buffers(height, width)
+        out_h, out_w = self._out_size
+        # Nearest sampling keeps depth values real (no blending with holes).
+        cv2.resize(depth, (out_w, out_h), dst=self._depth, interpolation=cv2.INTER_NEAREST)
+        frame = self._color
+        lo, hi = self._depth_range
+        if self._lut is not None:
+            np.take(self._lut, self._depth, axis=0, out=frame)
+        else:
+            cv2.resize(color, (out_w, out_h), dst=frame, interpolation=cv2.INTER_AREA)
+        if config.show_mask:
+            np.greater_equal(self._depth, lo, out=self._keep)
+            np.logical_and(self._keep, np.less_equal(self._depth, hi), out=self._keep)
+            # Dim everything the depth mask would drop.
+            np.right_shift(frame, 1, out=frame, where=~self._keep[..., None])
+            if config.roi is not None and config.roi[2] > 0 and config.roi[3] > 0:
+                x, y, w, h = (int(round(v * self._scale)) for v in config.roi)
+                cv2.rectangle(frame, (x, y), (x + w - 1, y + h - 1), (0, 255, 0), 1)
+        header = f"P6 {out_w} {out_h} 255\n".encode("ascii")
+        return header + frame.tobytes()
@@ -1,85 +1,244 @@
 from __future__ import annotations
 
+import csv
+import hashlib
+import itertools
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import astuple, dataclass, field, replace
 from pathlib import Path
-from typing import List, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
 import numpy as np
 import open3d as o3d
 
-from kinect_forge.config import ReconstructionConfig
-from kinect_forge.dataset import list_frame_pairs, load_metadata
-from kinect_forge.export import write_mesh
+from kinect_forge.cache import (
+    StageCache,
+    StageCacheStats,
+    StagePoses,
+    VolumeState,
+    clear_volume_state,
+    dataset_fingerprint,
+    load_mesh,
+    load_volume_state,
+    save_mesh,
+    save_volume_state,
+    stage_key,
+    volume_blocks_dir,
+)
+from kinect_forge.config import KinectIntrinsics, ReconstructionConfig
+from kinect_forge.dataset import (
+    CacheStats,
+    DatasetMeta,
+    FrameRecord,
+    FrameSource,
+    FrameStore,
+    append_frames,
+    load_manifest,
+    load_metadata,
+    open_frame_source,
+    prefetch_frames,
+)
+from kinect_forge.export import (
+    GLTF_SUFFIXES,
+    LODLevel,
+    LODTarget,
+    write_lods,
+    write_mesh,
+)
+from kinect_forge.fragments import (
+    FragmentBuilder,
+    FragmentSetup,
+    keyframe_poses,
+    register_fragments,
+    split_fragments,
+)
+from kinect_forge.integration import (
+    BLOCK_BYTES,
+    TSDF_BACKENDS,
+    IntegrationStats,
+    TensorIntegrator,
+    create_integrator,
+)
+from kinect_forge.keyframes import (
+    DepthChangeDetector,
+    depth_thumbnail,
+    load_depth_thumbnails,
+    save_depth_thumbnails,
+    thumbnail_shape,
+)
+from kinect_forge.odometry import (
+    PairResult,
+    ParallelOdometry,
+    chain_poses,
+    odometry_pair,
+    pinhole,
+    rgbd_from_arrays,
+)
+from kinect_forge.registration import CloudCache, icp_levels, refine_chunk, refine_pairs
+from kinect_forge.trajectory import read_trajectory_log
+from kinect_forge.turntable import TurntableMotionModel, fit_turntable
 
+T = TypeVar("T")
 
-def _rgbd_from_paths(
-    color_path: Path,
-    depth_path: Path,
-    depth_scale: float,
-    depth_trunc: float,
-) -> o3d.geometry.RGBDImage:
-    color = o3d.io.read_image(str(color_path))
-    depth = o3d.io.read_image(str(depth_path))
-    return o3d.geometry.RGBDImage.create_from_color_and_depth(
-        color,
-        depth,
-        depth_scale=depth_scale,
-        depth_trunc=depth_trunc,
-        convert_rgb_to_intensity=False,
-    )
+# Below this much headroom a memory budget cannot hold a frame's voxel blocks.
+MIN_BUDGET_HEADROOM_MB = 64
+
+
+@dataclass(frozen=True)
+class ReconstructionStats:
+    frames: int
+    keyframes: int
+    cache: CacheStats
+    odometry: List[PairResult]
+    registration: List[PairResult]
+    # Registration between neighbouring fragments (indexed by fragment).
+    fragments: List[PairResult]
+    turntable: Optional[TurntableMotionModel]
+    integration: IntegrationStats
+    stage_cache: StageCacheStats
+    # Integrated keyframes and their camera-to-world poses.
+    indices: List[int]
+    poses: List[np.ndarray]
+    lods: List[LODLevel] = field(default_factory=list)
+    # Keyframes integrated by `append_mesh` (0 for a full reconstruction).
+    appended: int = 0
 
 
 def _estimate_poses(
-    rgbd_images: List[o3d.geometry.RGBDImage],
+    rgbd_images: Iterable[o3d.geometry.RGBDImage],
+    indices: List[int],
     intrinsic: o3d.camera.PinholeCameraIntrinsic,
-) -> List[np.ndarray]:
-    poses: List[np.ndarray] = [np.eye(4)]
-    odom_jacobian = o3d.pipelines.odometry.RGBDOdometryJacobianFromHybridTerm()
-    for idx in range(1, len(rgbd_images)):
-        success, trans, _ = o3d.pipelines.odometry.compute_rgbd_odometry(
-            rgbd_images[idx - 1],
-            rgbd_images[idx],
-            intrinsic,
-            np.eye(4),
-            odom_jacobian,
-        )
-        if not success:
-            trans = np.eye(4)
-        poses.append(trans @ poses[-1])
-    return poses
+    initials: Optional[List[np.ndarray]] = None,
+) -> Tuple[Optional[o3d.geometry.RGBDImage], List[PairResult]]:
+    """Run consecutive-pair odometry while the images are still being loaded.
+
+    Only the previous image is held, so frames stream through; the last one
+    is returned for a later chain to continue from.
+    """
+    previous: Optional[o3d.geometry.RGBDImage] = None
+    pairs: List[PairResult] = []
+    for pos, rgbd in enumerate(rgbd_images):
+        if previous is not None:
+            initial = None if initials is None else initials[pos - 1]
+            pairs.append(
+                odometry_pair(indices[pos - 1], indices[pos], previous, rgbd, intrinsic, initial)
+            )
+        previous = rgbd
+    return previous, pairs
+
+
+def _keyframe_times(
+    records: Optional[List[FrameRecord]], indices: List[int], period: Optional[float]
+) -> Tuple[List[float], Optional[float]]:
+    """Capture times of the keyframes and the turntable period in the same unit.
+
+    Without usable manifest timestamps, frame indices stand in for time (a
+    steady frame rate) and the rate is fitted instead of taken from `period`.
+    """
+    if records is not None:
+        times = [records[idx].time for idx in indices]
+        if all(later > earlier for earlier, later in zip(times, times[1:])):
+            return times, period
+    return [float(idx) for idx in indices], None
 
 
 def _select_keyframes(
-    pairs: List[Tuple[Path, Path]],
+    load_thumbnail: Callable[[int], np.ndarray],
+    indices: List[int],
     depth_scale: float,
     threshold: float,
-) -> List[Tuple[Path, Path]]:
+    deltas: Optional[List[float]] = None,
+    workers: int = 0,
+    read_ahead: int = 0,
+) -> List[int]:
     if threshold <= 0:
-        return pairs
-
-    selected: List[Tuple[Path, Path]] = []
-    last_depth: np.ndarray | None = None
-    for color_path, depth_path in pairs:
-        depth = o3d.io.read_image(str(depth_path))
-        depth_arr = np.asarray(depth).astype(np.float32) / depth_scale
-        if last_depth is None:
-            selected.append((color_path, depth_path))
-            last_depth = depth_arr
-            continue
-        delta = np.mean(np.abs(depth_arr - last_depth))
-        if delta >= threshold:
-            selected.append((color_path, depth_path))
-            last_depth = depth_arr
+        return indices
+
+    selected: List[int] = []
+    detector = DepthChangeDetector(depth_scale, stride=1)
+    # Heuristic: capture deltas (change against the previous saved frame)
+    # summed since the last keyframe estimate the change from it, and frames
+    # whose estimate is below the threshold are skipped without decoding.
+    # It is not a bound (deltas skip holes and are sampled at the capture
+    # stride), so a skipped frame can occasionally score above the threshold.
+    change_bound = 0.0
+    # Without deltas every frame is scored, so loading can run ahead.
+    prefetched = (
+        prefetch_frames(load_thumbnail, indices, workers, read_ahead) if deltas is None else None
+    )
+    for idx in indices:
+        if detector.has_reference and deltas is not None:
+            change_bound += deltas[idx]
+            if change_bound < threshold:
+                continue
+        thumb = next(prefetched)[1] if prefetched is not None else load_thumbnail(idx)
+        if not detector.has_reference or detector.delta(thumb) >= threshold:
+            selected.append(idx)
+            detector.set_reference(thumb)
+            change_bound = 0.0
     return selected
 
 
-def _assert_depth_frames(pairs: List[Tuple[Path, Path]], depth_scale: float) -> None:
-    sample = pairs[: min(5, len(pairs))]
+def _depth_thumbnails(
+    frames: FrameStore,
+    root: Path,
+    stride: int,
+    shape: Tuple[int, int],
+    fingerprint: str,
+    workers: int = 0,
+    read_ahead: int = 0,
+) -> np.ndarray:
+    """Load the dataset's cached depth thumbnails, building them when the
+    frames changed (by `fingerprint`) or on first use."""
+    cached = load_depth_thumbnails(root, stride, len(frames), shape, fingerprint)
+    if cached is not None:
+        return cached
+    thumbs = np.empty((len(frames), *shape), dtype=np.uint16)
+
+    def load(idx: int) -> np.ndarray:
+        return depth_thumbnail(frames.read_depth(idx), stride)
+
+    for idx, thumb in prefetch_frames(load, range(len(frames)), workers, read_ahead):
+        if thumb.shape != shape:
+            raise RuntimeError("Depth frame size does not match the dataset intrinsics.")
+        thumbs[idx] = thumb
+    save_depth_thumbnails(root, stride, thumbs, fingerprint)
+    return thumbs
+
+
+def _assert_depth_frames(
+    frames: FrameStore,
+    indices: List[int],
+    depth_scale: float,
+    records: Optional[List[FrameRecord]] = None,
+) -> None:
+    sample = indices[: min(5, len(indices))]
     if not sample:
         return
     ratios: List[float] = []
-    for _, depth_path in sample:
-        depth = o3d.io.read_image(str(depth_path))
-        depth_arr = np.asarray(depth).astype(np.float32) / depth_scale
+    for idx in sample:
+        if records is not None:
+            ratios.append(records[idx].valid_ratio)
+            continue
+        depth_arr = frames.read_depth(idx).astype(np.float32) / depth_scale
         if depth_arr.size == 0:
             continue
         ratios.append(float(np.count_nonzero(depth_arr) / depth_arr.size))
@@ -90,46 +249,111 @@ def _assert_depth_frames(pairs: List[Tuple[Path, Path]], depth_scale: float) ->
         )
 
 
-def _rgbd_to_pcd(
-    rgbd: o3d.geometry.RGBDImage,
-    intrinsic: o3d.camera.PinholeCameraIntrinsic,
-    voxel_size: float,
-) -> o3d.geometry.PointCloud:
-    pcd = o3d.geometry.PointCloud.create_from_rgbd_image(rgbd, intrinsic)
-    if voxel_size > 0:
-        pcd = pcd.voxel_down_sample(voxel_size)
-    pcd.estimate_normals()
-    return pcd
+def _sequential_poses(
+    input_dir: Path,
+    intrinsics: KinectIntrinsics,
+    depth_scale: float,
+    depth_trunc: float,
+    config: ReconstructionConfig,
+    frames: FrameStore,
+    indices: List[int],
+    fingerprint: str,
+    head: Tuple[Optional[o3d.geometry.RGBDImage], List[PairResult]],
+    loaded: Iterator[o3d.geometry.RGBDImage],
+    predicted: Optional[List[np.ndarray]],
+) -> Tuple[List[np.ndarray], List[PairResult], List[PairResult]]:
+    """One odometry chain over all keyframes, optionally refined by ICP.
 
+    `head` holds the last image and the pairs already aligned for the turntable
+    fit; `predicted` seeds the remaining pairs and replaces pairs that fail.
+    """
+    head_image, head_pairs = head
+    done = len(head_pairs)
+    rest = None if predicted is None else predicted[done:]
+    if config.odometry_workers > 0 and len(indices) - done > 2:
+        odometry = ParallelOdometry(
+            input_dir,
+            intrinsics,
+            depth_scale,
+            depth_trunc,
+            config.odometry_workers,
+            config.odometry_chunk,
+        )
+        try:
+            # Workers decode their own frames; `loaded` stays unread.
+            odometry.start(indices[done:], rest)
+            pairs = head_pairs + odometry.results()
+        finally:
+            odometry.close()
+    else:
+        # The last aligned image starts the chain of the remaining pairs.
+        first = [] if head_image is None else [head_image]
+        _, tail_pairs = _estimate_poses(
+            itertools.chain(first, loaded), indices[done:], pinhole(intrinsics), rest
+        )
+        pairs = head_pairs + tail_pairs
+    poses = chain_poses(pairs, predicted)
+    registration: List[PairResult] = []
+    if config.icp_refine and len(indices) > 1:
+        cache_root = input_dir if config.icp_cache else None
+        clouds = CloudCache(cache_root, intrinsics, depth_scale, depth_trunc, fingerprint)
+        # Odometry seeds each pair and stands in for pairs ICP cannot align.
+        initials = [np.linalg.inv(poses[k]) @ poses[k - 1] for k in range(1, len(poses))]
+        registration = refine_pairs(
+            indices,
+            initials,
+            icp_levels(config),
+            clouds,
+            frames.read_depth,
+            input_dir,
+            cache_root,
+            config.icp_workers,
+            config.odometry_chunk,
+        )
+        poses = chain_poses(registration, initials)
+    return poses, pairs, registration
 
-def _refine_poses_icp(
-    rgbd_images: List[o3d.geometry.RGBDImage],
-    intrinsic: o3d.camera.PinholeCameraIntrinsic,
-    poses: List[np.ndarray],
-    icp_distance: float,
-    icp_voxel: float,
-    icp_iterations: int,
-) -> List[np.ndarray]:
-    refined: List[np.ndarray] = [poses[0]]
-    pcd_prev = _rgbd_to_pcd(rgbd_images[0], intrinsic, icp_voxel)
-    criteria = o3d.pipelines.registration.ICPConvergenceCriteria(
-        max_iteration=icp_iterations
+
+def _fragment_poses(
+    input_dir: Path,
+    intrinsics: KinectIntrinsics,
+    depth_scale: float,
+    depth_trunc: float,
+    config: ReconstructionConfig,
+    frames: FrameStore,
+    indices: List[int],
+    fingerprint: str,
+    head_pairs: List[PairResult],
+    predicted: Optional[List[np.ndarray]],
+) -> Tuple[List[np.ndarray], List[PairResult], List[PairResult], List[PairResult]]:
+    """Pose overlapping fragments independently, then register neighbouring fragments.
+
+    `head_pairs` (the turntable fit's odometry) are reused by the fragments
+    that cover them.
+    """
+    runs = split_fragments(indices, config.fragment_size, config.fragment_overlap)
+    initials = None if predicted is None else dict(zip(indices[1:], predicted))
+    aligned = {(pair.source, pair.target): pair for pair in head_pairs}
+    setup = FragmentSetup(
+        input_dir, intrinsics, depth_scale, depth_trunc, config, initials, fingerprint, aligned
     )
-    for idx in range(1, len(rgbd_images)):
-        pcd = _rgbd_to_pcd(rgbd_images[idx], intrinsic, icp_voxel)
-        initial = np.linalg.inv(poses[idx - 1]) @ poses[idx]
-        result = o3d.pipelines.registration.registration_icp(
-            pcd,
-            pcd_prev,
-            icp_distance,
-            initial,
-            o3d.pipelines.registration.TransformationEstimationPointToPlane(),
-            criteria,
-        )
-        refined_pose = refined[-1] @ result.transformation
-        refined.append(refined_pose)
-        pcd_prev = pcd
-    return refined
+    builder = FragmentBuilder(setup, config.fragment_workers)
+    try:
+        # Fragments decode their own frames.
+        builder.start(runs)
+        fragments = builder.results(frames)
+    finally:
+        builder.close()
+    origins, fragment_pairs = register_fragments(fragments, icp_levels(config))
+    _, poses = keyframe_poses(fragments, origins)
+    pairs: Dict[Tuple[int, int], PairResult] = {}
+    registration: Dict[Tuple[int, int], PairResult] = {}
+    for fragment in fragments:
+        for pair in fragment.odometry:
+            pairs.setdefault((pair.source, pair.target), pair)
+        for pair in fragment.registration:
+            registration.setdefault((pair.source, pair.target), pair)
+    return poses, list(pairs.values()), list(registration.values()), fragment_pairs
 
 
 def _clean_mesh(mesh: o3d.geometry.TriangleMesh, config: ReconstructionConfig) -> o3d.geometry.TriangleMesh:
@@ -146,57 +370,705 @@ def _clean_mesh(mesh: o3d.geometry.TriangleMesh, config: ReconstructionConfig) -
     return mesh
 
 
-def reconstruct_mesh(input_dir: Path, output_mesh: Path, config: ReconstructionConfig) -> None:
+def peak_rss_mb() -> int:
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    scale = 1 << 20 if sys.platform == "darwin" else 1 << 10
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale)
+
+
+def reset_peak_rss() -> bool:
+    """Restart the peak RSS from the current size (Linux), so a process that
+    runs one job after another can report each job's own peak."""
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        return False
+    return True
+
+
+def _rss_mb() -> int:
+    """Resident size of this process now; its peak where /proc is missing (macOS)."""
+    try:
+        resident = int(Path("/proc/self/statm").read_text().split()[1])
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+    return resident * os.sysconf("SC_PAGE_SIZE") >> 20
+
+
+def _budget_split(config: ReconstructionConfig) -> Tuple[int, int]:
+    """Frame cache MB and resident voxel blocks that fit `memory_budget_mb`.
+
+    The budget covers the whole process, so what is resident now is taken off
+    first (not the lifetime peak: a process reconstructing one dataset after
+    another would see its budget shrink); a quarter of the rest may cache
+    frames and half holds blocks, leaving room for frames in flight and the
+    extracted mesh.
+    """
+    in_use = _rss_mb()
+    available = config.memory_budget_mb - in_use
+    if available < MIN_BUDGET_HEADROOM_MB:
+        raise ValueError(
+            f"memory_budget_mb must leave at least {MIN_BUDGET_HEADROOM_MB} MB above the "
+            f"{in_use} MB already in use"
+        )
+    cache_mb = min(config.cache_mb, available // 4)
+    return cache_mb, (available << 20) // 2 // BLOCK_BYTES
+
+
+def _keyframe_stage(
+    input_dir: Path,
+    config: ReconstructionConfig,
+    meta: DatasetMeta,
+    frames: FrameSource,
+    depth_scale: float,
+    records: Optional[List[FrameRecord]],
+    fingerprint: Optional[str],
+) -> List[int]:
+    """Keyframe indices; `fingerprint` (None with the stage cache off) keys
+    the cached depth thumbnails."""
+    deltas = None
+    if records is not None:
+        # Manifest deltas are meters at the capture depth scale.
+        deltas = [rec.delta * meta.depth_scale / depth_scale for rec in records]
+    stride = config.keyframe_stride
+
+    def decode_thumbnail(idx: int) -> np.ndarray:
+        return depth_thumbnail(frames.read_depth(idx), stride)
+
+    load_thumbnail: Callable[[int], Any] = decode_thumbnail
+    if config.keyframe_threshold > 0 and deltas is None and fingerprint is not None:
+        # Every frame is scored: use cached thumbnails, decoding (uncached)
+        # only when the dataset has none for these frames yet.
+        shape = thumbnail_shape(meta.intrinsics.width, meta.intrinsics.height, stride)
+        thumbs = _depth_thumbnails(
+            frames.frames,
+            input_dir,
+            stride,
+            shape,
+            fingerprint,
+            config.io_workers,
+            config.io_read_ahead,
+        )
+        load_thumbnail = thumbs.__getitem__
+    return _select_keyframes(
+        load_thumbnail,
+        list(range(len(frames))),
+        depth_scale,
+        config.keyframe_threshold,
+        deltas,
+        config.io_workers,
+        config.io_read_ahead,
+    )
+
+
+def _pose_params(
+    config: ReconstructionConfig,
+    fingerprint: str,
+    indices: List[int],
+    depth_scale: float,
+    depth_trunc: float,
+) -> Dict[str, Any]:
+    """Everything the pose stage depends on; worker counts never change its result."""
+    params: Dict[str, Any] = {
+        "dataset": fingerprint,
+        "indices": indices,
+        "depth_scale": depth_scale,
+        "depth_trunc": depth_trunc,
+        "icp_refine": config.icp_refine,
+        "turntable_prior": config.turntable_prior,
+        "turntable_fit_frames": config.turntable_fit_frames,
+        "fragment_size": config.fragment_size,
+    }
+    if config.icp_refine or config.fragment_size > 0:
+        params["icp_levels"] = [list(astuple(level)) for level in icp_levels(config)]
+    if config.fragment_size > 0:
+        # Fragments are registered through their own TSDF volumes.
+        params["fragment_overlap"] = config.fragment_overlap
+        params["voxel_length"] = config.voxel_length
+        params["sdf_trunc"] = config.sdf_trunc
+    return params
+
+
+def _pose_stage(
+    input_dir: Path,
+    config: ReconstructionConfig,
+    meta: DatasetMeta,
+    frames: FrameSource,
+    indices: List[int],
+    depth_scale: float,
+    depth_trunc: float,
+    records: Optional[List[FrameRecord]],
+    fingerprint: str,
+) -> StagePoses:
+    intrinsic = pinhole(meta.intrinsics)
+
+    def load_rgbd(idx: int) -> o3d.geometry.RGBDImage:
+        return rgbd_from_arrays(
+            frames.read_color(idx), frames.read_depth(idx), depth_scale, depth_trunc
+        )
+
+    prefetched = prefetch_frames(load_rgbd, indices, config.io_workers, config.io_read_ahead)
+    loaded = (rgbd for _, rgbd in prefetched)
+    head: Tuple[Optional[o3d.geometry.RGBDImage], List[PairResult]] = (None, [])
+    turntable = None
+    predicted = None
+    fit_frames = config.turntable_fit_frames
+    if config.turntable_prior and meta.turntable_rotation_seconds and len(indices) > fit_frames:
+        # Align the first keyframes unseeded, fit the turntable axis to them,
+        # and predict the motion between every pair of keyframes.
+        times, period = _keyframe_times(records, indices, meta.turntable_rotation_seconds)
+        first = itertools.islice(loaded, fit_frames)
+        head = _estimate_poses(first, indices[:fit_frames], intrinsic)
+        head_poses = chain_poses(head[1])
+        if config.icp_refine:
+            # Odometry alone is often too loose to place the axis; ICP pins it down.
+            cache_root = input_dir if config.icp_cache else None
+            clouds = CloudCache(
+                cache_root, meta.intrinsics, depth_scale, depth_trunc, fingerprint
+            )
+            initials = [
+                np.linalg.inv(head_poses[k]) @ head_poses[k - 1] for k in range(1, fit_frames)
+            ]
+            refined = refine_chunk(
+                indices[:fit_frames], initials, icp_levels(config), clouds, frames.read_depth
+            )
+            head_poses = chain_poses(refined, initials)
+        turntable = fit_turntable(head_poses, times[:fit_frames], period)
+        if turntable is not None:
+            predicted = [
+                turntable.motion(times[k] - times[k - 1]) for k in range(1, len(indices))
+            ]
+    args = (
+        input_dir, meta.intrinsics, depth_scale, depth_trunc, config, frames, indices, fingerprint
+    )
+    fragment_pairs: List[PairResult] = []
+    if config.fragment_size > 0 and len(indices) > config.fragment_size:
+        poses, pairs, registration, fragment_pairs = _fragment_poses(*args, head[1], predicted)
+    else:
+        poses, pairs, registration = _sequential_poses(
+            *args, head, loaded, predicted
+        )
+    # Pool workers leave frames past the head unread; cancel their pending decodes.
+    prefetched.close()
+    return StagePoses(indices, poses, pairs, registration, fragment_pairs, turntable)
+
+
+def _imported_poses(trajectory: Path, frame_count: int) -> StagePoses:
+    indices, poses = read_trajectory_log(trajectory)
+    if not indices:
+        raise RuntimeError(f"Trajectory log has no poses: {trajectory}")
+    if min(indices) < 0 or max(indices) >= frame_count:
+        raise RuntimeError(
+            f"Trajectory log poses frames outside the dataset ({frame_count} frames)."
+        )
+    return StagePoses(indices, poses, [], [], [], None)
+
+
+def _cached_poses(
+    input_dir: Path,
+    config: ReconstructionConfig,
+    meta: DatasetMeta,
+    frames: FrameSource,
+    depth_scale: float,
+    depth_trunc: float,
+    records: Optional[List[FrameRecord]],
+    stage_cache: StageCache,
+    fingerprint: str,
+) -> StagePoses:
+    """Keyframes and poses from the stage cache, computing (and storing) misses."""
+    key = stage_key(
+        "keyframes",
+        {
+            "dataset": fingerprint,
+            "depth_scale": depth_scale,
+            "threshold": config.keyframe_threshold,
+            "stride": config.keyframe_stride,
+        },
+    )
+    indices = stage_cache.load_keyframes(key)
+    if indices is None:
+        indices = _keyframe_stage(
+            input_dir,
+            config,
+            meta,
+            frames,
+            depth_scale,
+            records,
+            fingerprint if stage_cache.enabled else None,
+        )
+        stage_cache.save_keyframes(key, indices)
+    if not indices:
+        raise RuntimeError("Keyframe selection removed all frames.")
+    _assert_depth_frames(frames, indices, depth_scale, records)
+    key = stage_key("poses", _pose_params(config, fingerprint, indices, depth_scale, depth_trunc))
+    estimate = stage_cache.load_poses(key)
+    if estimate is None:
+        estimate = _pose_stage(
+            input_dir,
+            config,
+            meta,
+            frames,
+            indices,
+            depth_scale,
+            depth_trunc,
+            records,
+            fingerprint,
+        )
+        stage_cache.save_poses(key, estimate)
+    return estimate
+
+
+def _check_config(config: ReconstructionConfig) -> None:
+    if config.io_workers < 0:
+        raise ValueError("io_workers must be >= 0")
+    if min(config.odometry_workers, config.icp_workers, config.fragment_workers) < 0:
+        raise ValueError("worker counts must be >= 0")
+    if config.keyframe_stride < 1:
+        raise ValueError("keyframe_stride must be >= 1")
+    if config.tsdf_backend not in TSDF_BACKENDS:
+        raise ValueError(f"tsdf_backend must be one of: {', '.join(TSDF_BACKENDS)}")
+    if config.turntable_fit_frames < 3:
+        raise ValueError("turntable_fit_frames must be >= 3")
+    if config.fragment_size == 1 or config.fragment_size < 0:
+        raise ValueError("fragment_size must be 0 (off) or >= 2")
+    if config.memory_budget_mb < 0:
+        raise ValueError("memory_budget_mb must be >= 0")
+    if config.keep_volume and config.tsdf_backend != "tensor" and config.memory_budget_mb == 0:
+        raise ValueError("keep_volume needs the tensor backend or a memory budget")
+
+
+def _save_volume(root: Path, integrator: TensorIntegrator, state: VolumeState) -> None:
+    # The state goes first and comes back last, so a torn save is never appended to.
+    clear_volume_state(root)
+    integrator.save(volume_blocks_dir(root))
+    save_volume_state(root, state)
+
+
+def _raw_mesh(
+    input_dir: Path, config: ReconstructionConfig, trajectory: Optional[Path]
+) -> Tuple[o3d.geometry.TriangleMesh, ReconstructionStats, Optional[Path]]:
+    """The TSDF mesh before cleanup, and where the stage cache keeps it (if it does).
+
+    With `keep_volume` the tensor volume is also saved in the dataset for
+    `append_mesh`.
+    """
+    _check_config(config)
+    cache_mb, budget_blocks = config.cache_mb, 0
+    if config.memory_budget_mb > 0:
+        cache_mb, budget_blocks = _budget_split(config)
     meta = load_metadata(input_dir)
-    pairs = list_frame_pairs(input_dir)
-    if not pairs:
+    frames = open_frame_source(input_dir, cache_mb << 20)
+    if len(frames) == 0:
         raise RuntimeError("No frames found in the dataset.")
 
     depth_scale = config.depth_scale if config.depth_scale > 0 else meta.depth_scale
     depth_trunc = config.depth_trunc if config.depth_trunc > 0 else meta.depth_trunc
-    pairs = _select_keyframes(pairs, depth_scale, config.keyframe_threshold)
-    if not pairs:
-        raise RuntimeError("Keyframe selection removed all frames.")
-    _assert_depth_frames(pairs, depth_scale)
-
-    intrinsic = o3d.camera.PinholeCameraIntrinsic(
-        meta.intrinsics.width,
-        meta.intrinsics.height,
-        meta.intrinsics.fx,
-        meta.intrinsics.fy,
-        meta.intrinsics.cx,
-        meta.intrinsics.cy,
+    records = load_manifest(input_dir)
+    if records is not None and len(records) != len(frames):
+        records = None
+    stage_cache = StageCache(input_dir, config.stage_cache)
+    # The stage cache and the on-disk ICP clouds are both keyed by the frames.
+    cached = stage_cache.enabled or (config.icp_cache and config.icp_refine)
+    fingerprint = dataset_fingerprint(input_dir) if cached else ""
+    if trajectory is not None:
+        estimate = _imported_poses(trajectory, len(frames))
+    else:
+        estimate = _cached_poses(
+            input_dir,
+            config,
+            meta,
+            frames,
+            depth_scale,
+            depth_trunc,
+            records,
+            stage_cache,
+            fingerprint,
+        )
+    indices, poses = estimate.indices, estimate.poses
+
+    # A memory budget always integrates on the (spilling) tensor grid.
+    backend = "tensor" if budget_blocks > 0 else config.tsdf_backend
+    key = stage_key(
+        "mesh",
+        {
+            "dataset": fingerprint,
+            "indices": indices,
+            "poses": hashlib.sha1(np.asarray(poses, dtype=np.float64).tobytes()).hexdigest(),
+            "depth_scale": depth_scale,
+            "depth_trunc": depth_trunc,
+            "voxel_length": config.voxel_length,
+            "sdf_trunc": config.sdf_trunc,
+            "backend": backend,
+        },
+    )
+    keep_volume = config.keep_volume and backend == "tensor"
+    saved = load_volume_state(input_dir) if keep_volume else None
+    # A cached mesh skips integration only if the saved volume is this run's;
+    # otherwise `append_mesh` would extend whichever run saved it last.
+    stale_volume = keep_volume and (saved is None or saved.key != key)
+    mesh = None if stale_volume else stage_cache.load_mesh(key)
+    integration = IntegrationStats(backend, 0, 0.0)
+    if mesh is None:
+        spill = None
+        if budget_blocks > 0:
+            # Cold regions of the volume go to disk rather than past the budget.
+            spill = (budget_blocks, Path(tempfile.mkdtemp(prefix="kinect-forge-tsdf-")))
+        integrator = create_integrator(config, meta.intrinsics, depth_scale, depth_trunc, spill)
+
+        def load_arrays(idx: int) -> Tuple[np.ndarray, np.ndarray]:
+            return frames.read_color(idx), frames.read_depth(idx)
+
+        try:
+            arrays = prefetch_frames(
+                load_arrays, indices, config.io_workers, config.io_read_ahead
+            )
+            for (_, (color, depth)), pose in zip(arrays, poses):
+                integrator.integrate(color, depth, pose)
+            mesh = integrator.extract_mesh()
+            if keep_volume and isinstance(integrator, TensorIntegrator):
+                state = VolumeState(
+                    len(frames), indices, poses, config.voxel_length, config.sdf_trunc, key
+                )
+                _save_volume(input_dir, integrator, state)
+        finally:
+            integrator.close()
+        integration = integrator.stats()
+        stage_cache.save_mesh(key, mesh)
+    stats = ReconstructionStats(
+        frames=len(frames),
+        keyframes=len(indices),
+        cache=frames.stats(),
+        odometry=estimate.odometry,
+        registration=estimate.registration,
+        fragments=estimate.fragments,
+        turntable=estimate.turntable,
+        integration=integration,
+        stage_cache=stage_cache.stats(),
+        indices=indices,
+        poses=poses,
+    )
+    return mesh, stats, stage_cache.mesh_path(key)
+
+
+def reconstruct_mesh(
+    input_dir: Path,
+    output_mesh: Path,
+    config: ReconstructionConfig,
+    trajectory: Optional[Path] = None,
+) -> ReconstructionStats:
+    """Reconstruct a mesh; `trajectory` (a `.log` file) replaces keyframe
+    selection and pose estimation with its frames and poses."""
+    _check_output(output_mesh, config)
+    mesh, stats, _ = _raw_mesh(input_dir, config, trajectory)
+    return _write_result(mesh, stats, output_mesh, config)
+
+
+def _appended_raw_mesh(
+    input_dir: Path, config: ReconstructionConfig, state: VolumeState
+) -> Tuple[o3d.geometry.TriangleMesh, ReconstructionStats]:
+    cache_mb, budget_blocks = config.cache_mb, 0
+    if config.memory_budget_mb > 0:
+        cache_mb, budget_blocks = _budget_split(config)
+    # The volume fixes the voxel grid; everything else follows the current settings.
+    config = replace(config, voxel_length=state.voxel_length, sdf_trunc=state.sdf_trunc)
+    meta = load_metadata(input_dir)
+    frames = open_frame_source(input_dir, cache_mb << 20)
+    if len(frames) <= state.frames:
+        raise RuntimeError(
+            f"No new frames: the saved volume already covers all {len(frames)} frames."
+        )
+    depth_scale = config.depth_scale if config.depth_scale > 0 else meta.depth_scale
+    depth_trunc = config.depth_trunc if config.depth_trunc > 0 else meta.depth_trunc
+    records = load_manifest(input_dir)
+    deltas = None
+    if records is not None and len(records) == len(frames):
+        deltas = [rec.delta * meta.depth_scale / depth_scale for rec in records]
+    stride = config.keyframe_stride
+
+    def load_thumbnail(idx: int) -> np.ndarray:
+        return depth_thumbnail(frames.read_depth(idx), stride)
+
+    new = _select_keyframes(
+        load_thumbnail,
+        list(range(state.frames, len(frames))),
+        depth_scale,
+        config.keyframe_threshold,
+        deltas,
+        config.io_workers,
+        config.io_read_ahead,
     )
+    # The chain starts at the last integrated keyframe, at its saved pose.
+    chain = [state.indices[-1]] + new
 
-    rgbd_images = [
-        _rgbd_from_paths(color, depth, depth_scale, depth_trunc)
-        for color, depth in pairs
-    ]
-
-    poses = _estimate_poses(rgbd_images, intrinsic)
-    if config.icp_refine and len(rgbd_images) > 1:
-        poses = _refine_poses_icp(
-            rgbd_images,
-            intrinsic,
-            poses,
-            config.icp_distance,
-            config.icp_voxel,
-            config.icp_iterations,
-        )
-
-    volume = o3d.pipelines.integration.ScalableTSDFVolume(
-        voxel_length=config.voxel_length,
-        sdf_trunc=config.sdf_trunc,
-        color_type=o3d.pipelines.integration.TSDFVolumeColorType.RGB8,
+    def load_rgbd(idx: int) -> o3d.geometry.RGBDImage:
+        return rgbd_from_arrays(
+            frames.read_color(idx), frames.read_depth(idx), depth_scale, depth_trunc
+        )
+
+    loaded = (
+        rgbd
+        for _, rgbd in prefetch_frames(load_rgbd, chain, config.io_workers, config.io_read_ahead)
+    )
+    relative, pairs, registration = _sequential_poses(
+        input_dir,
+        meta.intrinsics,
+        depth_scale,
+        depth_trunc,
+        config,
+        frames,
+        chain,
+        dataset_fingerprint(input_dir) if config.icp_cache and config.icp_refine else "",
+        (None, []),
+        loaded,
+        None,
+    )
+    poses = [state.poses[-1] @ pose for pose in relative[1:]]
+
+    spill = None
+    if budget_blocks > 0:
+        spill = (budget_blocks, Path(tempfile.mkdtemp(prefix="kinect-forge-tsdf-")))
+    tensor = replace(config, tsdf_backend="tensor")
+    integrator = create_integrator(tensor, meta.intrinsics, depth_scale, depth_trunc, spill)
+    assert isinstance(integrator, TensorIntegrator)
+    blocks = volume_blocks_dir(input_dir)
+    try:
+        integrator.load(blocks)
+        arrays = prefetch_frames(
+            lambda idx: (frames.read_color(idx), frames.read_depth(idx)),
+            new,
+            config.io_workers,
+            config.io_read_ahead,
+        )
+        for (_, (color, depth)), pose in zip(arrays, poses):
+            integrator.integrate(color, depth, pose)
+        mesh = integrator.extract_mesh()
+        state = VolumeState(
+            len(frames),
+            state.indices + new,
+            state.poses + poses,
+            state.voxel_length,
+            state.sdf_trunc,
+        )
+        _save_volume(input_dir, integrator, state)
+    finally:
+        integrator.close()
+    stats = ReconstructionStats(
+        frames=len(frames),
+        keyframes=len(state.indices),
+        cache=frames.stats(),
+        odometry=pairs,
+        registration=registration,
+        fragments=[],
+        turntable=None,
+        integration=integrator.stats(),
+        stage_cache=StageCacheStats(),
+        indices=state.indices,
+        poses=state.poses,
+        appended=len(new),
     )
+    return mesh, stats
+
+
+def append_mesh(
+    input_dir: Path,
+    output_mesh: Path,
+    config: ReconstructionConfig,
+    source: Optional[Path] = None,
+) -> ReconstructionStats:
+    """Integrate the frames added since the last reconstruction into its saved
+    volume and re-extract the mesh; `source` (a dataset) is first copied onto
+    the end of `input_dir`."""
+    _check_config(config)
+    _check_output(output_mesh, config)
+    state = load_volume_state(input_dir)
+    if state is None:
+        raise RuntimeError(
+            f"No saved TSDF volume in {input_dir}; reconstruct it with --keep-volume and "
+            "--tsdf-backend tensor (or --memory-budget) first."
+        )
+    if source is not None:
+        append_frames(source, input_dir)
+    mesh, stats = _appended_raw_mesh(input_dir, config, state)
+    return _write_result(mesh, stats, output_mesh, config)
+
 
-    for rgbd, pose in zip(rgbd_images, poses):
-        volume.integrate(rgbd, intrinsic, np.linalg.inv(pose))
+def _check_output(output_mesh: Path, config: ReconstructionConfig) -> None:
+    if config.lod_single_file and output_mesh.suffix.lower() not in GLTF_SUFFIXES:
+        raise ValueError("A single-file LOD export needs a .glb or .gltf output")
+    if config.lod_workers < 0:
+        raise ValueError("worker counts must be >= 0")
 
-    mesh = volume.extract_triangle_mesh()
+
+def _write_result(
+    mesh: o3d.geometry.TriangleMesh,
+    stats: ReconstructionStats,
+    output_mesh: Path,
+    config: ReconstructionConfig,
+) -> ReconstructionStats:
     mesh = _clean_mesh(mesh, config)
     if mesh.is_empty():
         raise RuntimeError("Reconstruction produced an empty mesh.")
 
     output_mesh.parent.mkdir(parents=True, exist_ok=True)
-    write_mesh(output_mesh, mesh)
+    if not config.lod_targets:
+        write_mesh(output_mesh, mesh)
+        return stats
+    targets = [LODTarget(*target) for target in config.lod_targets]
+    lods = write_lods(output_mesh, mesh, targets, config.lod_workers, config.lod_single_file)
+    return replace(stats, lods=lods)
+
+
+@dataclass(frozen=True)
+class CleanupVariant:
+    smooth_iterations: int
+    fill_hole_radius: float
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    variant: CleanupVariant
+    path: Path
+    triangles: int
+    watertight: bool
+    seconds: float
+
+
+def parse_sweep_values(text: str, cast: Callable[[str], T]) -> List[T]:
+    """Comma-separated values of one cleanup setting, e.g. `0,5,10`."""
+    values: List[T] = []
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        try:
+            values.append(cast(part.strip()))
+        except ValueError as exc:
+            raise ValueError(f"Invalid sweep value: '{part}'") from exc
+    if not values:
+        raise ValueError("A sweep needs at least one value per setting")
+    return values
+
+
+def cleanup_grid(smooth: Sequence[int], fill: Sequence[float]) -> List[CleanupVariant]:
+    if min(smooth) < 0 or min(fill) < 0:
+        raise ValueError("Sweep values must be >= 0")
+    return [CleanupVariant(int(n), float(r)) for n, r in itertools.product(smooth, fill)]
+
+
+def variant_path(output_mesh: Path, variant: CleanupVariant) -> Path:
+    """`model.ply` -> `model_smooth5_fill8mm.ply`."""
+    radius = f"{variant.fill_hole_radius * 1000:g}".replace(".", "p")
+    return output_mesh.with_name(
+        f"{output_mesh.stem}_smooth{variant.smooth_iterations}_fill{radius}mm{output_mesh.suffix}"
+    )
+
+
+_raw: Optional[o3d.geometry.TriangleMesh] = None
+
+
+def _init_sweep_worker(raw_path: Path) -> None:
+    global _raw
+    _raw = load_mesh(raw_path)
+
+
+def _sweep_worker(
+    config: ReconstructionConfig, variant: CleanupVariant, path: Path
+) -> SweepResult:
+    assert _raw is not None, "worker not initialized"
+    return _clean_variant(_raw, config, variant, path)
+
+
+def _clean_variant(
+    raw: o3d.geometry.TriangleMesh,
+    config: ReconstructionConfig,
+    variant: CleanupVariant,
+    path: Path,
+) -> SweepResult:
+    started = time.perf_counter()
+    config = replace(
+        config,
+        smooth_iterations=variant.smooth_iterations,
+        fill_hole_radius=variant.fill_hole_radius,
+    )
+    mesh = _clean_mesh(o3d.geometry.TriangleMesh(raw), config)
+    if mesh.is_empty():
+        raise RuntimeError(f"Cleanup produced an empty mesh: {path.name}")
+    write_mesh(path, mesh)
+    return SweepResult(
+        variant,
+        path,
+        len(mesh.triangles),
+        bool(mesh.is_watertight()),
+        time.perf_counter() - started,
+    )
+
+
+def reconstruct_sweep(
+    input_dir: Path,
+    output_mesh: Path,
+    config: ReconstructionConfig,
+    variants: Sequence[CleanupVariant],
+    workers: int = 0,
+    trajectory: Optional[Path] = None,
+) -> Tuple[ReconstructionStats, List[SweepResult]]:
+    """Integrate once, then write one cleaned mesh per variant.
+
+    The raw mesh comes from (or goes to) the stage cache, so a later sweep
+    over the same poses and volume skips integration. Variants are cleaned
+    on `workers` spawned processes (0 cleans them here), each loading the
+    raw mesh once. A summary is written to `<stem>_sweep.csv`.
+    """
+    if not variants:
+        raise ValueError("A sweep needs at least one variant")
+    if workers < 0:
+        raise ValueError("worker counts must be >= 0")
+    mesh, stats, raw_path = _raw_mesh(input_dir, config, trajectory)
+    output_mesh.parent.mkdir(parents=True, exist_ok=True)
+    paths = [variant_path(output_mesh, variant) for variant in variants]
+    if workers == 0 or len(variants) < 2:
+        results = [
+            _clean_variant(mesh, config, variant, path) for variant, path in zip(variants, paths)
+        ]
+    else:
+        scratch = None
+        if raw_path is None or not raw_path.is_file():
+            # Without the stage cache the raw mesh only lives for this sweep.
+            scratch = Path(tempfile.mkdtemp(prefix="kinect-forge-sweep-"))
+            raw_path = scratch / "raw.npz"
+            save_mesh(raw_path, mesh)
+        del mesh
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(variants)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_sweep_worker,
+                initargs=(raw_path,),
+            ) as pool:
+                futures: List["Future[SweepResult]"] = [
+                    pool.submit(_sweep_worker, config, variant, path)
+                    for variant, path in zip(variants, paths)
+                ]
+                results = [future.result() for future in futures]
+        finally:
+            if scratch is not None:
+                shutil.rmtree(scratch, ignore_errors=True)
+    write_sweep_summary(output_mesh.with_name(f"{output_mesh.stem}_sweep.csv"), results)
+    return stats, results
+
+
+def write_sweep_summary(path: Path, results: Sequence[SweepResult]) -> None:
+    with path.open("w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(
+            ["smooth_iterations", "fill_hole_radius", "mesh", "triangles", "watertight", "seconds"]
+        )
+        for result in results:
+            writer.writerow(
+                [
+                    result.variant.smooth_iterations,
+                    result.variant.fill_hole_radius,
+                    result.path.name,
+                    result.triangles,
+                    int(result.watertight),
+                    f"{result.seconds:.3f}",
+                ]
+            )
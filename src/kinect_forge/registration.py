@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import open3d as o3d
+
+from kinect_forge.config import KinectIntrinsics, ReconstructionConfig
+from kinect_forge.dataset import FrameStore, open_frames
+from kinect_forge.odometry import PairResult, chunk_pairs, pinhole
+
+CLOUD_CACHE_DIR = Path("cache") / "clouds"
+# Bump when the way clouds are built changes, so stale caches are ignored.
+_CLOUD_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ICPLevel:
+    voxel: float
+    distance: float
+    iterations: int
+
+
+def icp_levels(config: ReconstructionConfig) -> List[ICPLevel]:
+    """The coarse-to-fine ICP schedule; a single level without `icp_schedule`."""
+    if not config.icp_schedule:
+        return [ICPLevel(config.icp_voxel, config.icp_distance, config.icp_iterations)]
+    levels = [ICPLevel(float(v), float(d), int(n)) for v, d, n in config.icp_schedule]
+    return sorted(levels, key=lambda level: level.voxel, reverse=True)
+
+
+def parse_icp_schedule(text: str) -> Tuple[Tuple[float, float, int], ...]:
+    """Parse `voxel:distance:iterations` levels separated by commas."""
+    levels = []
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        fields = part.split(":")
+        if len(fields) != 3:
+            raise ValueError(f"ICP level must be voxel:distance:iterations, got '{part}'")
+        voxel, distance, iterations = float(fields[0]), float(fields[1]), int(fields[2])
+        if voxel <= 0 or distance <= 0 or iterations < 1:
+            raise ValueError(f"Invalid ICP level: '{part}'")
+        levels.append((voxel, distance, iterations))
+    return tuple(levels)
+
+
+def depth_cloud(
+    depth: np.ndarray,
+    intrinsic: o3d.camera.PinholeCameraIntrinsic,
+    depth_scale: float,
+    depth_trunc: float,
+    voxel: float,
+) -> o3d.geometry.PointCloud:
+    """Voxel-downsampled depth points with normals from a radius-bounded search.
+
+    `voxel <= 0` keeps every point and estimates normals from the 30 nearest
+    neighbours instead, since there is no voxel size to bound the radius.
+    """
+    pcd = o3d.geometry.PointCloud.create_from_depth_image(
+        o3d.geometry.Image(np.ascontiguousarray(depth)),
+        intrinsic,
+        depth_scale=depth_scale,
+        depth_trunc=depth_trunc,
+    )
+    if voxel > 0:
+        pcd = pcd.voxel_down_sample(voxel)
+        pcd.estimate_normals(o3d.geometry.KDTreeSearchParamHybrid(radius=2.0 * voxel, max_nn=30))
+    else:
+        pcd.estimate_normals(o3d.geometry.KDTreeSearchParamKNN(30))
+    return pcd
+
+
+class CloudCache:
+    """Per-frame ICP clouds, kept on disk so later runs skip building them.
+
+    Clouds live under `root/cache/clouds/<key>/`, where the key covers the
+    dataset fingerprint (see `kinect_forge.cache`), the intrinsics and depth
+    scaling, so rewritten frames or changed settings never reuse stale clouds.
+    Without a root the cache only lasts for one refinement.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path],
+        intrinsics: KinectIntrinsics,
+        depth_scale: float,
+        depth_trunc: float,
+        fingerprint: str = "",
+    ) -> None:
+        self._params = (intrinsics, depth_scale, depth_trunc, fingerprint)
+        self._dir: Optional[Path] = None
+        if root is not None:
+            params = {
+                "version": _CLOUD_VERSION,
+                "dataset": fingerprint,
+                "intrinsics": asdict(intrinsics),
+                "depth_scale": depth_scale,
+                "depth_trunc": depth_trunc,
+            }
+            key = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+            self._dir = root / CLOUD_CACHE_DIR / key
+        self._intrinsic = pinhole(intrinsics)
+        self._depth_scale = depth_scale
+        self._depth_trunc = depth_trunc
+        self._memory: Dict[Tuple[int, float], o3d.geometry.PointCloud] = {}
+        self.built = 0
+        self.loaded = 0
+
+    @property
+    def params(self) -> Tuple[KinectIntrinsics, float, float, str]:
+        return self._params
+
+    def clouds(
+        self, index: int, levels: Sequence[ICPLevel], read_depth: Callable[[int], np.ndarray]
+    ) -> List[o3d.geometry.PointCloud]:
+        """One cloud per level for frame `index`, decoding depth only if needed."""
+        result: List[o3d.geometry.PointCloud] = []
+        depth: Optional[np.ndarray] = None
+        for level in levels:
+            key = (index, level.voxel)
+            pcd = self._memory.get(key)
+            if pcd is None:
+                pcd = self._load(index, level.voxel)
+            if pcd is None:
+                if depth is None:
+                    depth = read_depth(index)
+                pcd = depth_cloud(
+                    depth, self._intrinsic, self._depth_scale, self._depth_trunc, level.voxel
+                )
+                self._save(index, level.voxel, pcd)
+                self.built += 1
+            self._memory[key] = pcd
+            result.append(pcd)
+        return result
+
+    def forget(self, index: int) -> None:
+        for key in [key for key in self._memory if key[0] == index]:
+            del self._memory[key]
+
+    def _path(self, index: int, voxel: float) -> Optional[Path]:
+        if self._dir is None:
+            return None
+        return self._dir / f"{index:06d}_{int(round(voxel * 1e6))}.npy"
+
+    def _load(self, index: int, voxel: float) -> Optional[o3d.geometry.PointCloud]:
+        path = self._path(index, voxel)
+        if path is None or not path.is_file():
+            return None
+        try:
+            data = np.load(path)
+        except (OSError, ValueError):
+            return None
+        if data.ndim != 2 or data.shape[1] != 6:
+            return None
+        pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(data[:, :3]))
+        pcd.normals = o3d.utility.Vector3dVector(data[:, 3:])
+        self.loaded += 1
+        return pcd
+
+    def _save(self, index: int, voxel: float, pcd: o3d.geometry.PointCloud) -> None:
+        path = self._path(index, voxel)
+        if path is None:
+            return
+        data = np.hstack([np.asarray(pcd.points), np.asarray(pcd.normals)])
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp.open("wb") as handle:
+                np.save(handle, data)
+            tmp.replace(path)
+        except OSError:
+            # Read-only datasets still refine; they just rebuild next time.
+            tmp.unlink(missing_ok=True)
+
+
+def icp_pair(
+    source: int,
+    target: int,
+    source_clouds: Sequence[o3d.geometry.PointCloud],
+    target_clouds: Sequence[o3d.geometry.PointCloud],
+    levels: Sequence[ICPLevel],
+    initial: np.ndarray,
+) -> PairResult:
+    """Coarse-to-fine point-to-plane ICP; fitness and RMSE come from the finest level.
+
+    The target (later) frame is aligned onto the source frame, as refinement
+    always has (it drifts less on turntable arcs), and the result inverted.
+    """
+    trans = np.linalg.inv(initial)
+    result = None
+    for level, src, tgt in zip(levels, source_clouds, target_clouds):
+        result = o3d.pipelines.registration.registration_icp(
+            tgt,
+            src,
+            level.distance,
+            trans,
+            o3d.pipelines.registration.TransformationEstimationPointToPlane(),
+            o3d.pipelines.registration.ICPConvergenceCriteria(max_iteration=level.iterations),
+        )
+        trans = np.asarray(result.transformation)
+    if result is None or result.fitness <= 0:
+        return PairResult(source, target, False, initial, 0.0)
+    return PairResult(
+        source,
+        target,
+        True,
+        np.linalg.inv(trans),
+        float(result.fitness),
+        float(result.inlier_rmse),
+    )
+
+
+def refine_chunk(
+    chunk: Sequence[int],
+    initials: Sequence[np.ndarray],
+    levels: Sequence[ICPLevel],
+    cache: CloudCache,
+    read_depth: Callable[[int], np.ndarray],
+) -> List[PairResult]:
+    """Refine consecutive pairs of `chunk`; `initials[k]` seeds pair k."""
+    results: List[PairResult] = []
+    previous = cache.clouds(chunk[0], levels, read_depth)
+    for pos in range(1, len(chunk)):
+        current = cache.clouds(chunk[pos], levels, read_depth)
+        results.append(
+            icp_pair(chunk[pos - 1], chunk[pos], previous, current, levels, initials[pos - 1])
+        )
+        cache.forget(chunk[pos - 1])
+        previous = current
+    cache.forget(chunk[-1])
+    return results
+
+
+@dataclass(frozen=True)
+class _WorkerSetup:
+    root: Path
+    cache_root: Optional[Path]
+    intrinsics: KinectIntrinsics
+    depth_scale: float
+    depth_trunc: float
+    fingerprint: str
+    levels: Tuple[ICPLevel, ...]
+
+
+_worker: Optional[Tuple[FrameStore, CloudCache, _WorkerSetup]] = None
+
+
+def _init_worker(setup: _WorkerSetup) -> None:
+    global _worker
+    cache = CloudCache(
+        setup.cache_root,
+        setup.intrinsics,
+        setup.depth_scale,
+        setup.depth_trunc,
+        setup.fingerprint,
+    )
+    _worker = (open_frames(setup.root), cache, setup)
+
+
+def _refine_worker(chunk: List[int], initials: List[np.ndarray]) -> List[PairResult]:
+    assert _worker is not None, "worker not initialized"
+    frames, cache, setup = _worker
+    return refine_chunk(chunk, initials, setup.levels, cache, frames.read_depth)
+
+
+def refine_pairs(
+    indices: Sequence[int],
+    initials: Sequence[np.ndarray],
+    levels: Sequence[ICPLevel],
+    cache: CloudCache,
+    read_depth: Callable[[int], np.ndarray],
+    root: Path,
+    cache_root: Optional[Path],
+    workers: int = 0,
+    chunk_size: int = 16,
+) -> List[PairResult]:
+    """ICP for every consecutive keyframe pair, in this process or on a pool.
+
+    Pairs only depend on their initial guesses, so they are refined in chunks
+    on spawned processes (each opening the dataset itself) and collected in
+    order; every pair runs the same `icp_pair` call as the serial path.
+    """
+    if len(indices) < 2:
+        return []
+    chunks = chunk_pairs(indices, chunk_size)
+    starts = [0]
+    for chunk in chunks[:-1]:
+        starts.append(starts[-1] + len(chunk) - 1)
+    if workers <= 0 or len(chunks) < 2:
+        return refine_chunk(indices, initials, levels, cache, read_depth)
+    intrinsics, depth_scale, depth_trunc, fingerprint = cache.params
+    setup = _WorkerSetup(
+        root, cache_root, intrinsics, depth_scale, depth_trunc, fingerprint, tuple(levels)
+    )
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(setup,),
+    ) as pool:
+        futures: List["Future[List[PairResult]]"] = [
+            pool.submit(
+                _refine_worker, chunk, list(initials[start : start + len(chunk) - 1])
+            )
+            for chunk, start in zip(chunks, starts)
+        ]
+        return [pair for future in futures for pair in future.result()]
@@ -1,9 +1,41 @@
-from kinect_forge.sensors.base import RGBDFrame, Sensor
+from pathlib import Path
+from typing import Optional
+
+from kinect_forge.sensors.base import RGBDFrame, Sensor, SensorExhausted
+from kinect_forge.sensors.freenect_async import FreenectAsyncConfig, FreenectAsyncSensor
 from kinect_forge.sensors.freenect_v1 import FreenectV1Config, FreenectV1Sensor
+from kinect_forge.sensors.replay import ReplayConfig, ReplaySensor
+
+SENSOR_BACKENDS = ("freenect", "freenect-async", "replay:<path>")
+
+
+def create_sensor(
+    spec: str, pool_size: int = 4, replay: Optional[ReplayConfig] = None
+) -> Sensor:
+    """Create a sensor backend by name; `pool_size` sizes pooled backends."""
+    name, _, arg = spec.strip().partition(":")
+    name = name.lower()
+    if name == "replay":
+        if not arg:
+            raise ValueError("replay sensor needs a dataset path: replay:<path>")
+        return ReplaySensor(Path(arg), replay)
+    if name == "freenect":
+        return FreenectV1Sensor()
+    if name == "freenect-async":
+        return FreenectAsyncSensor(FreenectAsyncConfig(pool_size=pool_size))
+    raise ValueError(f"sensor must be one of: {', '.join(SENSOR_BACKENDS)}")
+
 
 __all__ = [
-    "RGBDFrame",
-    "Sensor",
+    "SENSOR_BACKENDS",
+    "FreenectAsyncConfig",
+    "FreenectAsyncSensor",
     "FreenectV1Config",
     "FreenectV1Sensor",
+    "RGBDFrame",
+    "ReplayConfig",
+    "ReplaySensor",
+    "Sensor",
+    "SensorExhausted",
+    "create_sensor",
 ]
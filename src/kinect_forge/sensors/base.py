@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Protocol
+from typing import Optional, Protocol
 
 import numpy as np
 
@@ -10,6 +10,12 @@ import numpy as np
 class RGBDFrame:
     color: np.ndarray
     depth: np.ndarray
+    color_timestamp: Optional[int] = None
+    depth_timestamp: Optional[int] = None
+
+
+class SensorExhausted(RuntimeError):
+    """Raised by finite sensors (e.g. replay) when no frames are left."""
 
 
 class Sensor(Protocol):
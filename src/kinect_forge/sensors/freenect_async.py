@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import queue
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+from kinect_forge.sensors.base import RGBDFrame
+
+
+@dataclass
+class FreenectAsyncConfig:
+    depth_format: str = "mm"
+    index: int = 0
+    width: int = 640
+    height: int = 480
+    pool_size: int = 4
+    # Maximum color/depth timestamp gap, in device clock ticks.
+    pair_tolerance: int = 1_000_000
+    timeout: float = 2.0
+
+
+def _tick_diff(a: int, b: int) -> int:
+    """Signed difference of two wrapping 32-bit device timestamps."""
+    diff = (a - b) & 0xFFFFFFFF
+    return diff - (1 << 32) if diff >= (1 << 31) else diff
+
+
+class BufferPool:
+    """Fixed set of preallocated frame buffers handed out and returned by identity."""
+
+    def __init__(self, shape: Tuple[int, ...], dtype: "type[np.generic]", count: int) -> None:
+        self._buffers = [np.zeros(shape, dtype=dtype) for _ in range(count)]
+        self._owned = {id(buf) for buf in self._buffers}
+        self._free = list(self._buffers)
+        self._free_ids = set(self._owned)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    @property
+    def available(self) -> int:
+        with self._lock:
+            return len(self._free)
+
+    def acquire(self) -> Optional[np.ndarray]:
+        with self._lock:
+            if not self._free:
+                return None
+            buf = self._free.pop()
+            self._free_ids.discard(id(buf))
+            return buf
+
+    def release(self, buf: np.ndarray) -> None:
+        key = id(buf)
+        if key not in self._owned:
+            return
+        with self._lock:
+            if key not in self._free_ids:
+                self._free_ids.add(key)
+                self._free.append(buf)
+
+
+class FramePairer:
+    """Pair color and depth frames by device timestamp.
+
+    Each callback copies its frame into a pooled buffer and looks for the
+    closest pending frame of the other stream within `tolerance` ticks. Paired
+    frames go to `ready`; unmatched frames wait in a short backlog. When the
+    pool or `ready` is exhausted the frame is dropped, so nothing is allocated.
+    """
+
+    def __init__(
+        self,
+        color_pool: BufferPool,
+        depth_pool: BufferPool,
+        ready: "queue.Queue[RGBDFrame]",
+        tolerance: int,
+        backlog: int = 2,
+    ) -> None:
+        self._pools = {"color": color_pool, "depth": depth_pool}
+        self._pending: Dict[str, Deque[Tuple[int, np.ndarray]]] = {
+            "color": deque(),
+            "depth": deque(),
+        }
+        self._ready = ready
+        self._tolerance = tolerance
+        self._backlog = max(1, backlog)
+        self.paired = 0
+        self.dropped = 0
+
+    def push_color(self, data: np.ndarray, timestamp: int) -> None:
+        self._push("color", data, int(timestamp))
+
+    def push_depth(self, data: np.ndarray, timestamp: int) -> None:
+        self._push("depth", data, int(timestamp))
+
+    def clear(self) -> None:
+        for kind, pending in self._pending.items():
+            while pending:
+                self._pools[kind].release(pending.popleft()[1])
+
+    def _push(self, kind: str, data: np.ndarray, timestamp: int) -> None:
+        buf = self._pools[kind].acquire()
+        if buf is None:
+            self.dropped += 1
+            return
+        np.copyto(buf, data.reshape(buf.shape), casting="unsafe")
+        other = "depth" if kind == "color" else "color"
+        pending = self._pending[other]
+        match = -1
+        best = self._tolerance + 1
+        for pos, (other_ts, _) in enumerate(pending):
+            gap = abs(_tick_diff(timestamp, other_ts))
+            if gap < best:
+                match, best = pos, gap
+        if match < 0:
+            own = self._pending[kind]
+            own.append((timestamp, buf))
+            if len(own) > self._backlog:
+                self._pools[kind].release(own.popleft()[1])
+                self.dropped += 1
+            return
+        # Older frames of the other stream can no longer be paired.
+        for _ in range(match):
+            self._pools[other].release(pending.popleft()[1])
+            self.dropped += 1
+        other_ts, other_buf = pending.popleft()
+        if kind == "color":
+            frame = RGBDFrame(buf, other_buf, color_timestamp=timestamp, depth_timestamp=other_ts)
+        else:
+            frame = RGBDFrame(other_buf, buf, color_timestamp=other_ts, depth_timestamp=timestamp)
+        try:
+            self._ready.put_nowait(frame)
+            self.paired += 1
+        except queue.Full:
+            self._pools["color"].release(frame.color)
+            self._pools["depth"].release(frame.depth)
+            self.dropped += 1
+
+
+class FreenectAsyncSensor:
+    """Kinect v1 backend running the libfreenect event loop on its own thread.
+
+    Frames are delivered in preallocated buffers; pass each frame back with
+    `release` once it has been consumed so its buffers can be reused.
+    """
+
+    def __init__(
+        self, config: Optional[FreenectAsyncConfig] = None, freenect_module: Any = None
+    ) -> None:
+        self._config = config or FreenectAsyncConfig()
+        if freenect_module is None:
+            try:
+                import freenect  # type: ignore
+            except ImportError as exc:
+                raise RuntimeError(
+                    "freenect not available. Install libfreenect and python3-freenect "
+                    "(Ubuntu: sudo apt install libfreenect-dev python3-freenect)."
+                ) from exc
+            freenect_module = freenect
+        self._freenect = freenect_module
+        cfg = self._config
+        backlog = 2
+        count = cfg.pool_size + backlog + 1
+        self._color_pool = BufferPool((cfg.height, cfg.width, 3), np.uint8, count)
+        self._depth_pool = BufferPool((cfg.height, cfg.width), np.uint16, count)
+        self._ready: "queue.Queue[RGBDFrame]" = queue.Queue(maxsize=max(1, cfg.pool_size))
+        self._pairer = FramePairer(
+            self._color_pool, self._depth_pool, self._ready, cfg.pair_tolerance, backlog
+        )
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def dropped(self) -> int:
+        return self._pairer.dropped
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, name="kinect-forge-freenect", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._pairer.clear()
+        while True:
+            try:
+                self.release(self._ready.get_nowait())
+            except queue.Empty:
+                break
+
+    def get_frame(self) -> RGBDFrame:
+        try:
+            return self._ready.get(timeout=self._config.timeout)
+        except queue.Empty:
+            if self._error is not None:
+                raise RuntimeError(f"Kinect event loop failed: {self._error}") from self._error
+            raise RuntimeError("Timed out waiting for a paired Kinect frame.") from None
+
+    def release(self, frame: RGBDFrame) -> None:
+        self._color_pool.release(frame.color)
+        self._depth_pool.release(frame.depth)
+
+    def _run(self) -> None:
+        fn = self._freenect
+        cfg = self._config
+        ctx = fn.init()
+        if ctx is None:
+            self._error = RuntimeError("Failed to initialize freenect context.")
+            return
+        try:
+            dev = fn.open_device(ctx, cfg.index)
+            if dev is None:
+                raise RuntimeError(f"Failed to open Kinect device {cfg.index}.")
+            depth_mode = fn.DEPTH_11BIT if cfg.depth_format == "11bit" else fn.DEPTH_MM
+            fn.set_depth_mode(dev, fn.RESOLUTION_MEDIUM, depth_mode)
+            fn.set_video_mode(dev, fn.RESOLUTION_MEDIUM, fn.VIDEO_RGB)
+            fn.set_depth_callback(dev, lambda _dev, data, ts: self._pairer.push_depth(data, ts))
+            fn.set_video_callback(dev, lambda _dev, data, ts: self._pairer.push_color(data, ts))
+            fn.start_depth(dev)
+            fn.start_video(dev)
+            try:
+                while not self._stop.is_set():
+                    if fn.process_events(ctx) < 0:
+                        raise RuntimeError("freenect event processing failed.")
+            finally:
+                fn.stop_depth(dev)
+                fn.stop_video(dev)
+                fn.close_device(dev)
+        except BaseException as exc:  # surfaced by get_frame
+            self._error = exc
+        finally:
+            fn.shutdown(ctx)
@@ -33,20 +33,25 @@ class FreenectV1Sensor:
 
     def get_frame(self) -> RGBDFrame:
         freenect = self._freenect
-        color, _ = freenect.sync_get_video(format=freenect.VIDEO_RGB)
+        color, color_ts = freenect.sync_get_video(format=freenect.VIDEO_RGB)
         if color is None:
             raise RuntimeError("Failed to read color frame from Kinect.")
 
         depth_format = freenect.DEPTH_MM
         if self._config.depth_format == "11bit":
             depth_format = freenect.DEPTH_11BIT
-        depth, _ = freenect.sync_get_depth(format=depth_format)
+        depth, depth_ts = freenect.sync_get_depth(format=depth_format)
         if depth is None:
             raise RuntimeError("Failed to read depth frame from Kinect.")
 
         color = np.asarray(color, dtype=np.uint8)
         depth = np.asarray(depth, dtype=np.uint16)
-        return RGBDFrame(color=color, depth=depth)
+        return RGBDFrame(
+            color=color,
+            depth=depth,
+            color_timestamp=int(color_ts),
+            depth_timestamp=int(depth_ts),
+        )
 
 
 def probe_device() -> bool:
@@ -54,6 +59,11 @@ def probe_device() -> bool:
         sensor = FreenectV1Sensor()
     except RuntimeError:
         return False
+    try:
+        _ = sensor.get_frame()
+        return True
+    except RuntimeError:
+        return False
 
 
 def set_tilt_degs(angle: float, index: int = 0) -> None:
@@ -77,8 +87,3 @@ def set_tilt_degs(angle: float, index: int = 0) -> None:
         freenect.close_device(dev)
     finally:
         freenect.shutdown(ctx)
-    try:
-        _ = sensor.get_frame()
-        return True
-    except RuntimeError:
-        return False
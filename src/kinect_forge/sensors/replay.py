@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from kinect_forge.dataset import load_manifest, open_frames
+from kinect_forge.sensors.base import RGBDFrame, SensorExhausted
+
+PACING_MODES = ("fast", "fps", "recorded")
+
+
+@dataclass(frozen=True)
+class ReplayConfig:
+    pacing: str = "fps"
+    fps: float = 30.0
+    loop: bool = False
+    preload: bool = False
+    jitter_ms: float = 0.0
+    drop_rate: float = 0.0
+    seed: int = 0
+
+
+class ReplaySensor:
+    """Replay a recorded dataset (either layout) through the `Sensor` protocol.
+
+    `pacing` is `fast` (no waiting), `fps` (fixed rate) or `recorded` (manifest
+    times, falling back to `fps` without a manifest). Frames are due on an
+    absolute schedule, so slow consumers do not shift later frames. `jitter_ms`
+    delays each delivery by a random extra up to that amount and `drop_rate`
+    loses frames at random, like a congested USB link.
+    """
+
+    def __init__(self, root: Path, config: Optional[ReplayConfig] = None) -> None:
+        self._config = config or ReplayConfig()
+        if self._config.pacing not in PACING_MODES:
+            raise ValueError(f"pacing must be one of: {', '.join(PACING_MODES)}")
+        if not 0.0 <= self._config.drop_rate < 1.0:
+            raise ValueError("drop_rate must be in [0, 1)")
+        self._root = root
+        self._frames = open_frames(root)
+        if len(self._frames) == 0:
+            raise RuntimeError(f"No frames found to replay in {root}")
+        records = load_manifest(root)
+        if records is not None and len(records) != len(self._frames):
+            records = None
+        period = 1.0 / self._config.fps if self._config.fps > 0 else 0.0
+        self._offsets = [idx * period for idx in range(len(self._frames))]
+        self._timestamps: List[Tuple[Optional[int], Optional[int]]] = [
+            (None, None)
+        ] * len(self._frames)
+        if records is not None:
+            self._timestamps = [(rec.color_timestamp, rec.depth_timestamp) for rec in records]
+            if self._config.pacing == "recorded":
+                self._offsets = [rec.time - records[0].time for rec in records]
+        # One extra period separates the last frame of a pass from the next pass.
+        self._pass_length = self._offsets[-1] + period
+        self._cache: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * len(self._frames)
+        self._rng = random.Random(self._config.seed)
+        self._position = 0
+        self._passes = 0
+        self._started: Optional[float] = None
+        self.delivered = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def start(self) -> None:
+        if self._config.preload:
+            for idx in range(len(self._frames)):
+                self._load(idx)
+        self._position = 0
+        self._passes = 0
+        self._started = time.monotonic()
+
+    def stop(self) -> None:
+        self._started = None
+
+    def get_frame(self) -> RGBDFrame:
+        if self._started is None:
+            self.start()
+        config = self._config
+        while True:
+            if self._position >= len(self._frames):
+                if not config.loop:
+                    raise SensorExhausted(f"Replay of {self._root} finished.")
+                self._position = 0
+                self._passes += 1
+            idx = self._position
+            self._position += 1
+            if config.drop_rate > 0 and self._rng.random() < config.drop_rate:
+                self.dropped += 1
+                continue
+            break
+        if config.pacing != "fast":
+            self._wait_until(idx)
+        color, depth = self._load(idx)
+        self.delivered += 1
+        color_ts, depth_ts = self._timestamps[idx]
+        return RGBDFrame(color, depth, color_timestamp=color_ts, depth_timestamp=depth_ts)
+
+    def _wait_until(self, idx: int) -> None:
+        assert self._started is not None
+        due = self._started + self._passes * self._pass_length + self._offsets[idx]
+        if self._config.jitter_ms > 0:
+            due += self._rng.uniform(0.0, self._config.jitter_ms / 1000.0)
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _load(self, idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._cache[idx]
+        if cached is not None:
+            return cached
+        frame = (self._frames.read_color(idx), self._frames.read_depth(idx))
+        if self._config.preload:
+            self._cache[idx] = frame
+        return frame
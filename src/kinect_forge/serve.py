@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timezone
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from kinect_forge.batch import reconstruct_dataset
+from kinect_forge.config import ReconstructionConfig
+from kinect_forge.container import CONTAINER_FILE, INDEX_FILE
+from kinect_forge.dataset import MANIFEST_FILE, load_metadata
+
+STATUS_FILE = "reconstruction.json"
+# States a restart leaves alone; "queued"/"running" mean the daemon stopped mid-job.
+FINISHED_STATES = ("done", "failed")
+# Reconstruction plans within this share of the job memory limit; the rest
+# absorbs Open3D's transient allocations before the hard limit kills the job.
+_BUDGET_SHARE = 0.75
+# Files whose mtimes show that frames are still arriving.
+_ACTIVITY_PATHS = ("metadata.json", MANIFEST_FILE, "color", "depth", CONTAINER_FILE, INDEX_FILE)
+
+
+@dataclass(frozen=True)
+class ServeConfig:
+    watch_dir: Path
+    workers: int = 1
+    poll_seconds: float = 2.0
+    # A dataset must be unchanged this long before it is queued (copies still arriving).
+    settle_seconds: float = 5.0
+    # Per-job limits; 0 = unlimited.
+    job_timeout: float = 0.0
+    job_memory_mb: int = 0
+    mesh_name: str = "model.ply"
+    retry_failed: bool = False
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def read_status(root: Path) -> Optional[Dict[str, Any]]:
+    try:
+        payload: Dict[str, Any] = json.loads((root / STATUS_FILE).read_text())
+    except (OSError, ValueError):
+        return None
+    return payload
+
+
+def write_status(root: Path, payload: Dict[str, Any]) -> None:
+    path = root / STATUS_FILE
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(payload, indent=2))
+    tmp.replace(path)
+
+
+def _metadata_mtime(root: Path) -> int:
+    return (root / "metadata.json").stat().st_mtime_ns
+
+
+def dataset_ready(root: Path, settle_seconds: float) -> bool:
+    """Whether capture finished and no frame data changed for `settle_seconds`.
+
+    Capture writes `manifest.csv` from its start and adds `frames_read` to
+    `metadata.json` when it stops, so a manifest without `frames_read` is a
+    capture still running. Datasets from before the manifest have neither and
+    count as finished once they settle.
+    """
+    try:
+        if load_metadata(root).frames_read is None and (root / MANIFEST_FILE).exists():
+            return False
+        changed = max(
+            (root / name).stat().st_mtime for name in _ACTIVITY_PATHS if (root / name).exists()
+        )
+    except (OSError, ValueError, KeyError):
+        return False
+    return time.time() - changed >= settle_seconds
+
+
+def needs_job(root: Path, retry_failed: bool = False) -> bool:
+    """Whether a dataset has no finished result for its current capture."""
+    status = read_status(root)
+    if status is None or status.get("state") not in FINISHED_STATES:
+        return True
+    try:
+        if status.get("metadata_mtime_ns") != _metadata_mtime(root):
+            # Captured again into the same directory.
+            return True
+    except OSError:
+        return False
+    return retry_failed and status["state"] == "failed"
+
+
+def _rss_mb(pid: int) -> Optional[int]:
+    """Current resident size of a process, where the platform exposes it (Linux)."""
+    try:
+        resident = int(Path(f"/proc/{pid}/statm").read_text().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident * os.sysconf("SC_PAGE_SIZE") >> 20
+
+
+def _run_job(root: Path, mesh_name: str, config: ReconstructionConfig, sender: Connection) -> None:
+    result = reconstruct_dataset(root, mesh_name, config)
+    measurements = result.measurements
+    if not result.ok or measurements is None:
+        sender.send({"state": "failed", "error": result.error, "peak_rss_mb": result.peak_rss_mb})
+        return
+    sender.send(
+        {
+            "state": "done",
+            "mesh": mesh_name,
+            "frames": result.frames,
+            "keyframes": result.keyframes,
+            "measurements": asdict(measurements),
+            "reconstruct_seconds": result.seconds,
+            "peak_rss_mb": result.peak_rss_mb,
+        }
+    )
+
+
+@dataclass
+class _Job:
+    root: Path
+    process: BaseProcess
+    receiver: Connection
+    started: float
+    status: Dict[str, Any]
+
+
+class ReconstructionServer:
+    """Reconstruct and measure datasets dropped into a watched directory.
+
+    Every job runs in its own spawned process, at most `workers` at a time, so
+    a job over its time or memory limit can be killed without touching the
+    others. Status is kept in each dataset's `reconstruction.json`; finished
+    jobs are skipped after a restart and interrupted ones run again.
+    """
+
+    def __init__(
+        self,
+        serve: ServeConfig,
+        config: ReconstructionConfig,
+        report: Optional[Callable[[Path, Dict[str, Any]], None]] = None,
+    ) -> None:
+        if serve.workers < 1:
+            raise ValueError("workers must be >= 1")
+        if not serve.watch_dir.is_dir():
+            raise ValueError(f"Watch directory does not exist: {serve.watch_dir}")
+        self._serve = serve
+        self._config = config
+        if serve.job_memory_mb > 0:
+            self._config = replace(
+                config, memory_budget_mb=int(serve.job_memory_mb * _BUDGET_SHARE)
+            )
+        self._report = report
+        self._queue: List[Path] = []
+        self._jobs: List[_Job] = []
+        # metadata.json mtime of every dataset finished by this server.
+        self._finished: Dict[Path, Optional[int]] = {}
+        self._context = multiprocessing.get_context("spawn")
+
+    def scan(self) -> None:
+        """Queue every ready dataset that has no finished result."""
+        busy = {job.root for job in self._jobs} | set(self._queue)
+        for root in sorted(path for path in self._serve.watch_dir.iterdir() if path.is_dir()):
+            if root in busy or not needs_job(root, self._serve.retry_failed):
+                continue
+            if not dataset_ready(root, self._serve.settle_seconds):
+                continue
+            if root in self._finished and self._finished[root] == _metadata_mtime(root):
+                continue
+            self._queue.append(root)
+            self._update(root, {"state": "queued", "queued_at": _now()})
+
+    def poll(self) -> None:
+        """Collect finished jobs, enforce limits, then start queued jobs."""
+        for job in list(self._jobs):
+            self._check(job)
+        self.scan()
+        while self._queue and len(self._jobs) < self._serve.workers:
+            self._start(self._queue.pop(0))
+
+    def idle(self) -> bool:
+        return not self._queue and not self._jobs
+
+    def run(self, once: bool = False) -> None:
+        """Serve until interrupted; `once` stops when nothing is ready or running."""
+        try:
+            while True:
+                self.poll()
+                if once and self.idle():
+                    return
+                time.sleep(self._serve.poll_seconds)
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Kill running jobs; they stay "running" on disk and rerun on the next start."""
+        for job in self._jobs:
+            job.process.kill()
+            job.process.join()
+            job.receiver.close()
+        self._jobs = []
+        self._queue = []
+
+    def _start(self, root: Path) -> None:
+        status = {
+            "state": "running",
+            "started_at": _now(),
+            "metadata_mtime_ns": _metadata_mtime(root),
+            "preset": self._config.preset,
+        }
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_run_job,
+            args=(root, self._serve.mesh_name, self._config, sender),
+            daemon=True,
+        )
+        process.start()
+        sender.close()
+        self._jobs.append(_Job(root, process, receiver, time.monotonic(), status))
+        self._update(root, status)
+
+    def _check(self, job: _Job) -> None:
+        elapsed = time.monotonic() - job.started
+        error: Optional[str] = None
+        result: Optional[Dict[str, Any]] = None
+        if job.receiver.poll():
+            try:
+                result = job.receiver.recv()
+            except EOFError:
+                job.process.join()
+                error = f"worker exited with code {job.process.exitcode}"
+        elif not job.process.is_alive():
+            error = f"worker exited with code {job.process.exitcode}"
+        elif self._serve.job_timeout > 0 and elapsed > self._serve.job_timeout:
+            error = f"timed out after {self._serve.job_timeout:g}s"
+        elif self._serve.job_memory_mb > 0:
+            rss = _rss_mb(job.process.pid or 0)
+            if rss is not None and rss > self._serve.job_memory_mb:
+                error = f"used {rss} MB, over the {self._serve.job_memory_mb} MB limit"
+        if result is None and error is None:
+            return
+        if job.process.is_alive():
+            job.process.kill()
+            job.process.join()
+        job.receiver.close()
+        self._jobs.remove(job)
+        if result is None:
+            result = {"state": "failed", "error": error}
+        self._update(
+            job.root,
+            {**job.status, **result, "finished_at": _now(), "seconds": elapsed},
+        )
+
+    def _update(self, root: Path, status: Dict[str, Any]) -> None:
+        if status["state"] in FINISHED_STATES:
+            self._finished[root] = status.get("metadata_mtime_ns")
+        try:
+            write_status(root, status)
+        except OSError:
+            # Read-only datasets are still reported; `_finished` keeps them from rerunning.
+            pass
+        if self._report is not None:
+            self._report(root, status)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+def write_trajectory_log(path: Path, frame_ids: Sequence[int], poses: Sequence[np.ndarray]) -> None:
+    """Write camera-to-world poses in the Redwood/Open3D `.log` format."""
+    if len(frame_ids) != len(poses):
+        raise ValueError("frame_ids and poses must have the same length")
+    lines: List[str] = []
+    for frame_id, pose in zip(frame_ids, poses):
+        lines.append(f"{frame_id} {frame_id} {len(frame_ids)}")
+        for row in np.asarray(pose, dtype=np.float64).reshape(4, 4):
+            lines.append(" ".join(f"{value:.9f}" for value in row))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n")
+
+
+def read_trajectory_log(path: Path) -> Tuple[List[int], List[np.ndarray]]:
+    lines = [line.split() for line in path.read_text().splitlines() if line.strip()]
+    if len(lines) % 5 != 0:
+        raise RuntimeError(f"Trajectory log is truncated: {path}")
+    frame_ids: List[int] = []
+    poses: List[np.ndarray] = []
+    for start in range(0, len(lines), 5):
+        frame_ids.append(int(lines[start][0]))
+        poses.append(np.array(lines[start + 1 : start + 5], dtype=np.float64))
+    return frame_ids, poses
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional, Sequence
+
+import cv2
+import numpy as np
 
 
 @dataclass(frozen=True)
@@ -27,3 +31,71 @@ def get_turntable_preset(name: str) -> TurntablePreset:
     if key not in _PRESETS:
         raise ValueError("turntable preset must be one of: vxb-8")
     return _PRESETS[key]
+
+
+@dataclass(frozen=True)
+class TurntableMotionModel:
+    """Scene rotation about a fixed axis, seen from a static camera.
+
+    `axis` (unit length) and `center` (a point on the axis) are in camera
+    coordinates, and `rate` is the rotation about `axis` per time unit.
+    """
+
+    axis: np.ndarray
+    center: np.ndarray
+    rate: float
+
+    def motion(self, elapsed: float) -> np.ndarray:
+        """Transform from the camera at time t into the camera at t + `elapsed`."""
+        rot, _ = cv2.Rodrigues(self.axis * (self.rate * elapsed))
+        trans = np.eye(4)
+        trans[:3, :3] = rot
+        trans[:3, 3] = self.center - rot @ self.center
+        return trans
+
+
+def fit_turntable(
+    poses: Sequence[np.ndarray],
+    times: Sequence[float],
+    period: Optional[float] = None,
+    min_angle: float = math.radians(2.0),
+    max_error: float = math.radians(3.0),
+) -> Optional[TurntableMotionModel]:
+    """Fit the rotation axis to camera-to-world poses of the first frames.
+
+    With `period` (seconds per revolution, `times` in seconds) the rate comes
+    from the turntable; otherwise it is fitted against `times`. Returns None
+    when the frames turn less than `min_angle`, disagree with `period`, or
+    stray from the fitted rotation by more than `max_error` on average.
+    """
+    if len(poses) < 2 or len(times) != len(poses):
+        return None
+    # inv(pose) moves the scene from the first camera into camera k.
+    motions = [np.linalg.inv(pose) for pose in poses[1:]]
+    rotvecs = [cv2.Rodrigues(np.ascontiguousarray(m[:3, :3]))[0].ravel() for m in motions]
+    total = np.sum(rotvecs, axis=0)
+    if np.linalg.norm(rotvecs[-1]) < min_angle:
+        return None
+    axis = total / np.linalg.norm(total)
+    angles = np.array([float(vec @ axis) for vec in rotvecs])
+    elapsed = np.asarray(times[1:], dtype=np.float64) - float(times[0])
+    if np.any(elapsed <= 0):
+        return None
+    observed = float(elapsed @ angles / (elapsed @ elapsed))
+    rate = observed
+    if period is not None and period > 0:
+        rate = math.copysign(2.0 * math.pi / period, observed)
+        if not 0.5 <= observed / rate <= 2.0:
+            return None
+    # Rotation about a point c: t = (I - R) c for every motion.
+    lhs = np.vstack([np.eye(3) - m[:3, :3] for m in motions])
+    rhs = np.concatenate([m[:3, 3] for m in motions])
+    center = np.linalg.lstsq(lhs, rhs, rcond=None)[0]
+    model = TurntableMotionModel(axis, center, rate)
+    errors = [
+        np.linalg.norm(cv2.Rodrigues(np.ascontiguousarray(rot))[0])
+        for rot in (model.motion(t)[:3, :3].T @ m[:3, :3] for t, m in zip(elapsed, motions))
+    ]
+    if float(np.mean(errors)) > max_error:
+        return None
+    return model
@@ -2,9 +2,10 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import numpy as np
 import open3d as o3d
 
-from kinect_forge.dataset import list_frame_pairs, load_metadata
+from kinect_forge.dataset import load_metadata, open_frame_source
 
 
 def view_mesh(mesh_path: Path) -> None:
@@ -17,8 +18,8 @@ def view_mesh(mesh_path: Path) -> None:
 
 def view_dataset(input_dir: Path, every: int = 10) -> None:
     meta = load_metadata(input_dir)
-    pairs = list_frame_pairs(input_dir)
-    if not pairs:
+    frames = open_frame_source(input_dir)
+    if len(frames) == 0:
         raise RuntimeError("No frames found in the dataset.")
 
     intrinsic = o3d.camera.PinholeCameraIntrinsic(
@@ -31,11 +32,11 @@ def view_dataset(input_dir: Path, every: int = 10) -> None:
     )
 
     pcds = []
-    for idx, (color_path, depth_path) in enumerate(pairs):
+    for idx in range(len(frames)):
         if every > 1 and idx % every != 0:
             continue
-        color = o3d.io.read_image(str(color_path))
-        depth = o3d.io.read_image(str(depth_path))
+        color = o3d.geometry.Image(np.ascontiguousarray(frames.read_color(idx)))
+        depth = o3d.geometry.Image(np.ascontiguousarray(frames.read_depth(idx)))
         rgbd = o3d.geometry.RGBDImage.create_from_color_and_depth(
             color,
             depth,
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pytest
+
+from kinect_forge.codec import get_codec
+from kinect_forge.config import KinectIntrinsics
+from kinect_forge.dataset import (
+    DatasetMeta,
+    FrameRecord,
+    ensure_dirs,
+    write_frame_images,
+    write_manifest,
+    write_metadata,
+)
+
+WALL_INTRINSICS = KinectIntrinsics(160, 120, 130.0, 130.0, 79.5, 59.5)
+
+
+def _write_dataset(root: Path, count: int, manifest: bool = True) -> Path:
+    """Tiny 8x8 PNG frames whose color and depth encode the frame index."""
+    color_dir, depth_dir = ensure_dirs(root)
+    records = []
+    for idx in range(count):
+        color = np.full((8, 8, 3), idx, dtype=np.uint8)
+        depth = np.full((8, 8), 800 + idx, dtype=np.uint16)
+        write_frame_images(
+            color_dir, depth_dir, idx, color, depth, get_codec("png"), get_codec("png")
+        )
+        records.append(FrameRecord(idx, idx, float(idx), None, None, None, 1.0, 0.8, 0.0))
+    if manifest:
+        write_manifest(root, records)
+    write_metadata(root, DatasetMeta(KinectIntrinsics(8, 8), 1000.0, 3.0))
+    return root
+
+
+def _write_wall(
+    root: Path,
+    count: int = 3,
+    intrinsics: Optional[KinectIntrinsics] = None,
+    distance_mm: float = 960.0,
+    slope_mm: float = 2.0,
+    step_mm: float = 0.0,
+    turn_mm: float = 0.0,
+) -> Path:
+    """A textured wall `distance_mm` away at the image centre, tilted by
+    `slope_mm` per pixel column. Every frame moves it `step_mm` farther away
+    and tilts it `turn_mm` per column more."""
+    intrinsics = intrinsics or WALL_INTRINSICS
+    color_dir, depth_dir = ensure_dirs(root)
+    rows, cols = np.mgrid[0 : intrinsics.height, 0 : intrinsics.width]
+    color = np.stack([(rows * 2) % 256, (cols * 3) % 256, (rows + cols) % 256], axis=-1)
+    columns = cols - intrinsics.width // 2
+    for idx in range(count):
+        depth = distance_mm + idx * step_mm + columns * (slope_mm + idx * turn_mm)
+        write_frame_images(
+            color_dir,
+            depth_dir,
+            idx,
+            color.astype(np.uint8),
+            depth.astype(np.uint16),
+            get_codec("png"),
+            get_codec("png"),
+        )
+    write_metadata(root, DatasetMeta(intrinsics, 1000.0, 3.0))
+    return root
+
+
+@pytest.fixture
+def write_wall() -> Callable[..., Path]:
+    """Factory writing a PNG wall dataset; see `_write_wall` for the parameters."""
+    return _write_wall
+
+
+@pytest.fixture
+def write_dataset() -> Callable[..., Path]:
+    """Factory writing a tiny PNG dataset; see `_write_dataset` for the parameters."""
+    return _write_dataset
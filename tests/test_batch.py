@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pytest
+
+from kinect_forge import batch
+from kinect_forge.batch import (
+    batch_workers,
+    expand_datasets,
+    reconstruct_batch,
+    reconstruct_dataset,
+    write_batch_report,
+)
+from kinect_forge.config import KinectIntrinsics, ReconstructionConfig
+from kinect_forge.dataset import DatasetMeta, write_metadata
+from kinect_forge.reconstruct import peak_rss_mb, reset_peak_rss
+
+
+def _metadata_only(root: Path) -> Path:
+    root.mkdir(parents=True)
+    write_metadata(root, DatasetMeta(KinectIntrinsics(), 1000.0, 3.0))
+    return root
+
+
+def test_results_report_the_peak_of_their_own_dataset(tmp_path: Path) -> None:
+    if not reset_peak_rss():
+        pytest.skip("peak RSS cannot be reset on this platform")
+    # An earlier dataset on the same worker peaked well above what the next one needs.
+    scratch = np.ones(256 << 17)  # 256 MB
+    del scratch
+    worker_peak = peak_rss_mb()
+
+    result = reconstruct_dataset(tmp_path / "missing", "model.ply", ReconstructionConfig())
+
+    assert not result.ok
+    assert 0 < result.peak_rss_mb < worker_peak - 128
+
+
+def test_globs_keep_only_datasets_in_order_without_duplicates(tmp_path: Path) -> None:
+    b = _metadata_only(tmp_path / "scans" / "b")
+    a = _metadata_only(tmp_path / "scans" / "a")
+    (tmp_path / "scans" / "notes").mkdir()
+    other = _metadata_only(tmp_path / "other")
+    missing = tmp_path / "missing"
+
+    datasets = expand_datasets(
+        [tmp_path / "scans" / "*", b, other, tmp_path / "scans" / "[ab]", missing, other]
+    )
+
+    assert datasets == [a, b, other, missing]
+
+
+@pytest.mark.parametrize(
+    ("datasets", "requested", "memory_mb", "expected"),
+    [
+        (10, 3, 512, (3, "requested")),
+        (2, 6, None, (2, "requested")),
+        (0, 4, None, (1, "requested")),
+        (10, 0, None, (8, "cores")),
+        (3, 0, None, (3, "datasets")),
+        (10, 0, 2500, (2, "memory (1000 MB per job)")),
+        (10, 0, 500, (1, "memory (1000 MB per job)")),
+    ],
+)
+def test_batch_workers_limits(
+    monkeypatch: pytest.MonkeyPatch,
+    datasets: int,
+    requested: int,
+    memory_mb: Optional[int],
+    expected: Tuple[int, str],
+) -> None:
+    monkeypatch.setattr(batch.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(batch, "available_memory_mb", lambda: memory_mb)
+    config = ReconstructionConfig(memory_budget_mb=1000)
+
+    assert batch_workers(datasets, config, requested) == expected
+
+
+def test_default_job_size_without_a_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(batch.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(batch, "available_memory_mb", lambda: 3 * batch.DEFAULT_JOB_MB)
+
+    workers, limit = batch_workers(10, ReconstructionConfig())
+
+    assert workers == 3
+    assert limit == f"memory ({batch.DEFAULT_JOB_MB} MB per job)"
+
+
+def test_batch_goes_on_past_a_broken_dataset(
+    tmp_path: Path, write_wall: Callable[..., Path]
+) -> None:
+    broken = _metadata_only(tmp_path / "broken")
+    good = write_wall(tmp_path / "good")
+    config = ReconstructionConfig(voxel_length=0.01, sdf_trunc=0.04, tsdf_backend="tensor")
+    reported: List[Path] = []
+
+    results = reconstruct_batch(
+        [broken, good], "model.ply", config, 1, lambda result: reported.append(result.dataset)
+    )
+
+    assert sorted(reported) == sorted([broken, good])
+    assert [result.dataset for result in results] == [broken, good]
+    assert [result.ok for result in results] == [False, True]
+    assert results[0].error
+    assert (good / "model.ply").is_file()
+    csv_path, json_path = write_batch_report(tmp_path / "report", results, config, 1)
+    with csv_path.open(newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    assert [(row["status"], bool(row["error"])) for row in rows] == [
+        ("failed", True),
+        ("done", False),
+    ]
+    assert rows[1]["aabb_x"]
+    payload = json.loads(json_path.read_text())
+    assert [entry["status"] for entry in payload["datasets"]] == ["failed", "done"]
+    assert payload["datasets"][0]["error"] == results[0].error
+    assert payload["datasets"][1]["measurements"] is not None
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Callable, List
+
+import numpy as np
+import pytest
+
+from kinect_forge.cache import (
+    STAGE_CACHE_DIR,
+    VOLUME_DIR,
+    cache_usage,
+    clear_cache,
+    dataset_fingerprint,
+)
+from kinect_forge.codec import get_codec
+
+
+@pytest.mark.parametrize("manifest", [True, False])
+def test_fingerprint_changes_when_a_frame_is_rewritten(
+    tmp_path: Path, manifest: bool, write_dataset: Callable[..., Path]
+) -> None:
+    write_dataset(tmp_path, 3, manifest)
+    before = dataset_fingerprint(tmp_path)
+    assert dataset_fingerprint(tmp_path) == before
+
+    # Same manifest, new depth for frame 1 (say, a re-exported or filtered scan).
+    depth_path = tmp_path / "depth" / "depth_000001.png"
+    stat = depth_path.stat()
+    depth = np.random.default_rng(0).integers(500, 900, (8, 8)).astype(np.uint16)
+    depth_path.write_bytes(get_codec("png").encode(depth))
+    os.utime(depth_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert dataset_fingerprint(tmp_path) != before
+
+
+def test_fingerprint_reads_no_frames(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, write_dataset: Callable[..., Path]
+) -> None:
+    write_dataset(tmp_path, 3, manifest=False)
+    read: List[str] = []
+    real_open, real_read_bytes = Path.open, Path.read_bytes
+
+    def tracking_open(self: Path, *args: Any, **kwargs: Any) -> Any:
+        read.append(self.name)
+        return real_open(self, *args, **kwargs)
+
+    def tracking_read_bytes(self: Path) -> bytes:
+        read.append(self.name)
+        return real_read_bytes(self)
+
+    monkeypatch.setattr(Path, "open", tracking_open)
+    monkeypatch.setattr(Path, "read_bytes", tracking_read_bytes)
+
+    dataset_fingerprint(tmp_path)
+
+    assert set(read) == {"metadata.json"}
+
+
+@pytest.mark.parametrize("volume", [False, True])
+def test_clear_cache_keeps_the_saved_volume_unless_asked(
+    tmp_path: Path, volume: bool, write_dataset: Callable[..., Path]
+) -> None:
+    write_dataset(tmp_path, 1)
+    for area in (STAGE_CACHE_DIR / "poses", VOLUME_DIR / "blocks"):
+        (tmp_path / area).mkdir(parents=True)
+        (tmp_path / area / "entry").write_bytes(b"x")
+
+    clear_cache(tmp_path, volume=volume)
+
+    assert not (tmp_path / STAGE_CACHE_DIR).exists()
+    assert (tmp_path / VOLUME_DIR / "blocks" / "entry").exists() is not volume
+    assert [usage.name for usage in cache_usage(tmp_path)] == ([] if volume else ["volume"])
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+
+from kinect_forge.capture import (
+    FramePreprocessor,
+    _apply_color_mask,
+    _apply_depth_mask,
+    _apply_roi,
+    capture_frames,
+)
+from kinect_forge.config import CaptureConfig
+from kinect_forge.dataset import list_frame_pairs
+from kinect_forge.sensors.base import RGBDFrame
+
+
+class _FakeSensor:
+    def __init__(self) -> None:
+        self.read = 0
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def get_frame(self) -> RGBDFrame:
+        self.read += 1
+        depth = np.full((48, 64), 800 + self.read, dtype=np.uint16)
+        color = np.full((48, 64, 3), self.read % 256, dtype=np.uint8)
+        return RGBDFrame(color=color, depth=depth)
+
+
+def test_capture_saves_requested_frames(tmp_path: Path) -> None:
+    config = CaptureConfig(frames=3, fps=0, warmup=0)
+    stats = capture_frames(_FakeSensor(), tmp_path, config)
+    assert stats.frames_saved == 3
+    assert len(list_frame_pairs(tmp_path)) == 3
+
+
+@pytest.mark.parametrize("frames", [0, -1])
+def test_capture_rejects_no_frames(tmp_path: Path, frames: int) -> None:
+    sensor = _FakeSensor()
+    with pytest.raises(ValueError):
+        capture_frames(sensor, tmp_path, CaptureConfig(frames=frames, fps=0, warmup=0))
+    assert sensor.read == 0
+
+
+def test_capture_does_not_load_open3d() -> None:
+    code = "import sys, kinect_forge.capture; print('open3d' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"mask_background": False},
+        {"depth_min": 0.3, "depth_max": 0.7, "roi_x": 10, "roi_y": 5, "roi_w": 40, "roi_h": 30},
+        {"mask_background": False, "roi_x": 50, "roi_y": 40, "roi_w": 30, "roi_h": 20},
+        {"color_mask": True},
+        {"color_mask": True, "mask_background": False, "roi_x": 8, "roi_w": 32, "roi_h": 48},
+        {"depth_min": 1.5, "depth_max": 0.5},
+    ],
+)
+def test_preprocessor_matches_the_masking_steps(options: Dict[str, Any]) -> None:
+    config = CaptureConfig(hsv_lower=(20, 40, 40), hsv_upper=(120, 255, 255), **options)
+    preprocessor = FramePreprocessor(config, slots=2)
+    rng = np.random.default_rng(0)
+    for _ in range(4):
+        color = rng.integers(0, 256, (48, 64, 3), dtype=np.uint8)
+        depth = rng.integers(0, 2000, (48, 64)).astype(np.uint16)
+        expected_color, expected_depth = _apply_depth_mask(
+            color,
+            depth,
+            config.depth_min,
+            config.depth_max,
+            config.depth_scale,
+            config.mask_background,
+        )
+        expected_color, expected_depth = _apply_roi(
+            expected_color,
+            expected_depth,
+            config.roi_x,
+            config.roi_y,
+            config.roi_w,
+            config.roi_h,
+        )
+        if config.color_mask:
+            expected_color, expected_depth = _apply_color_mask(
+                expected_color, expected_depth, config.hsv_lower, config.hsv_upper
+            )
+        masked = preprocessor.process(color, depth)
+        assert np.array_equal(masked.color, expected_color)
+        assert np.array_equal(masked.depth, expected_depth)
+        preprocessor.release(masked)
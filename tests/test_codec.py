@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pytest
+
+from kinect_forge.codec import (
+    COLOR,
+    DEPTH,
+    KfdDepthCodec,
+    PngCodec,
+    ZlibCodec,
+    _varint_decode,
+    _varint_encode,
+    get_codec,
+)
+
+DEPTH_FRAMES: Dict[str, Callable[[], np.ndarray]] = {
+    "zeros": lambda: np.zeros((48, 64), dtype=np.uint16),
+    "full-range": lambda: np.random.default_rng(0).integers(0, 65536, (48, 64), dtype=np.uint16),
+    "extremes": lambda: np.tile(np.array([65535, 0, 1, 65535], dtype=np.uint16), (5, 3)),
+    # Mostly masked background around an object, valid in the first and last pixel.
+    "sparse": lambda: _sparse_depth(),
+    "single-pixel": lambda: np.array([[1234]], dtype=np.uint16),
+}
+
+
+def _sparse_depth() -> np.ndarray:
+    depth = np.zeros((48, 64), dtype=np.uint16)
+    depth[10:30, 20:40] = 800 + np.random.default_rng(0).integers(0, 5, (20, 20), dtype=np.uint16)
+    depth[0, 0] = 700
+    depth[-1, -1] = 2500
+    return depth
+
+
+@pytest.mark.parametrize("spec", ["kfd:0", "kfd:1", "zlib", "png"])
+@pytest.mark.parametrize("frame", sorted(DEPTH_FRAMES))
+def test_depth_codecs_are_lossless(spec: str, frame: str) -> None:
+    codec = get_codec(spec, DEPTH)
+    depth = DEPTH_FRAMES[frame]()
+
+    restored = codec.decode(codec.encode(depth))
+
+    assert restored.dtype == np.uint16
+    assert np.array_equal(restored, depth)
+
+
+# PNG cannot hold an image without pixels.
+@pytest.mark.parametrize("spec", ["kfd:0", "kfd:1", "zlib"])
+@pytest.mark.parametrize("shape", [(0, 0), (0, 64), (48, 0)])
+def test_depth_codecs_round_trip_empty_frames(spec: str, shape: Tuple[int, int]) -> None:
+    codec = get_codec(spec, DEPTH)
+    depth = np.zeros(shape, dtype=np.uint16)
+
+    restored = codec.decode(codec.encode(depth))
+
+    assert restored.shape == shape
+
+
+@pytest.mark.parametrize("spec", ["png", "zlib"])
+def test_color_codecs_are_lossless(spec: str) -> None:
+    codec = get_codec(spec, COLOR)
+    color = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+
+    assert np.array_equal(codec.decode(codec.encode(color)), color)
+
+
+def test_kfd_stores_masked_background_compactly() -> None:
+    depth = _sparse_depth()
+
+    payload = KfdDepthCodec(level=0).encode(depth)
+
+    # About one byte per valid pixel plus a fixed header.
+    assert len(payload) < 2 * np.count_nonzero(depth) + 64
+
+
+def test_varints_round_trip_at_byte_boundaries() -> None:
+    values = np.array(
+        [0, 1, 127, 128, 16383, 16384, (1 << 21) - 1, 1 << 21, (1 << 28) - 1, 1 << 28, 2**32 - 1],
+        dtype=np.uint32,
+    )
+
+    encoded = _varint_encode(values)
+
+    assert len(encoded) == 1 + 1 + 1 + 2 + 2 + 3 + 3 + 4 + 4 + 5 + 5
+    buf = np.frombuffer(encoded, dtype=np.uint8)
+    assert np.array_equal(_varint_decode(buf, values.size), values)
+
+
+def test_truncated_varint_stream_is_rejected() -> None:
+    encoded = np.frombuffer(_varint_encode(np.array([300, 5], dtype=np.uint32)), dtype=np.uint8)
+
+    with pytest.raises(RuntimeError):
+        _varint_decode(encoded[:1], 2)
+
+
+@pytest.mark.parametrize(
+    ("spec", "expected"),
+    [
+        ("png", PngCodec(level=3)),
+        (" PNG:1 ", PngCodec(level=1)),
+        ("kfd", KfdDepthCodec(level=1)),
+        ("kfd:0", KfdDepthCodec(level=0)),
+        ("zlib:9", ZlibCodec(level=9)),
+    ],
+)
+def test_get_codec_parses_specs(spec: str, expected: object) -> None:
+    assert get_codec(spec) == expected
+
+
+@pytest.mark.parametrize(
+    ("spec", "kind"),
+    [
+        ("kfd:x", None),
+        ("kfd:10", None),
+        ("png:-1", None),
+        ("webp", None),
+        ("", None),
+        ("kfd", COLOR),
+        ("jpeg", DEPTH),
+    ],
+)
+def test_get_codec_rejects_bad_specs(spec: str, kind: Optional[str]) -> None:
+    with pytest.raises(ValueError):
+        get_codec(spec, kind)
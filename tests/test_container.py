@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+import pytest
+
+from kinect_forge.container import (
+    _ALIGN,
+    _HEADER_SIZE,
+    _INDEX_DTYPE,
+    _MAGIC,
+    CONTAINER_FILE,
+    INDEX_FILE,
+    ContainerReader,
+    ContainerWriter,
+)
+from kinect_forge.dataset import open_frames
+
+Frame = Tuple[np.ndarray, np.ndarray]
+
+
+def _frames(count: int, seed: int = 0) -> List[Frame]:
+    rng = np.random.default_rng(seed)
+    # Odd sizes, so raw chunks need padding to stay aligned.
+    return [
+        (
+            rng.integers(0, 256, (7, 9, 3), dtype=np.uint8),
+            rng.integers(0, 4000, (7, 9)).astype(np.uint16),
+        )
+        for _ in range(count)
+    ]
+
+
+def _write(root: Path, frames: List[Frame], codecs: Tuple[str, str] = ("raw", "raw")) -> None:
+    with ContainerWriter(root, 9, 7, *codecs) as writer:
+        for color, depth in frames:
+            writer.append(color, depth)
+
+
+def _assert_frames(root: Path, frames: List[Frame]) -> None:
+    reader = ContainerReader(root)
+    assert len(reader) == len(frames)
+    for idx, (color, depth) in enumerate(frames):
+        assert np.array_equal(reader.read_color(idx), color)
+        assert np.array_equal(reader.read_depth(idx), depth)
+    reader.close()
+
+
+@pytest.mark.parametrize("codecs", [("raw", "raw"), ("png", "kfd"), ("zlib", "zlib")])
+def test_frames_round_trip(tmp_path: Path, codecs: Tuple[str, str]) -> None:
+    frames = _frames(4)
+    _write(tmp_path, frames, codecs)
+
+    _assert_frames(tmp_path, frames)
+    names = ContainerReader(tmp_path).codecs
+    assert tuple(name.split(":")[0] for name in names) == codecs
+
+
+def test_header_and_chunks_are_aligned(tmp_path: Path) -> None:
+    _write(tmp_path, _frames(3))
+
+    data = (tmp_path / CONTAINER_FILE).read_bytes()
+    index = np.frombuffer((tmp_path / INDEX_FILE).read_bytes(), dtype=_INDEX_DTYPE)
+    assert data.startswith(_MAGIC)
+    assert index["offset"][0] == _HEADER_SIZE
+    assert all(offset % _ALIGN == 0 for offset in index["offset"])
+    assert list(index["color_size"]) == [7 * 9 * 3] * 3
+    assert list(index["depth_size"]) == [7 * 9 * 2] * 3
+
+
+def test_raw_frames_are_read_only_views(tmp_path: Path) -> None:
+    _write(tmp_path, _frames(1))
+    reader = ContainerReader(tmp_path)
+
+    depth = reader.read_depth(0)
+
+    assert not depth.flags.owndata
+    assert not depth.flags.writeable
+    with pytest.raises(ValueError):
+        depth[0, 0] = 1
+
+
+def test_torn_index_entry_is_dropped_and_overwritten(tmp_path: Path) -> None:
+    frames = _frames(3)
+    _write(tmp_path, frames)
+    index_path = tmp_path / INDEX_FILE
+    index_path.write_bytes(index_path.read_bytes()[: -_INDEX_DTYPE.itemsize // 2])
+
+    _assert_frames(tmp_path, frames[:2])
+
+    extra = _frames(1, seed=1)
+    _write(tmp_path, extra)
+    assert index_path.stat().st_size == 3 * _INDEX_DTYPE.itemsize
+    _assert_frames(tmp_path, frames[:2] + extra)
+
+
+def test_entries_past_the_data_file_are_dropped(tmp_path: Path) -> None:
+    frames = _frames(2)
+    _write(tmp_path, frames)
+    data_path = tmp_path / CONTAINER_FILE
+    data_path.write_bytes(data_path.read_bytes()[:-1])
+
+    _assert_frames(tmp_path, frames[:1])
+
+
+def test_reopened_container_appends(tmp_path: Path) -> None:
+    first, second = _frames(2), _frames(3, seed=1)
+    _write(tmp_path, first, ("png", "kfd"))
+
+    with ContainerWriter(tmp_path, 9, 7, "png", "kfd") as writer:
+        assert len(writer) == 2
+        for color, depth in second:
+            assert writer.append(color, depth) == len(writer) - 1
+
+    _assert_frames(tmp_path, first + second)
+
+
+def test_reopening_with_another_layout_fails(tmp_path: Path) -> None:
+    _write(tmp_path, _frames(1))
+
+    with pytest.raises(RuntimeError):
+        ContainerWriter(tmp_path, 9, 7, "raw", "kfd")
+    with pytest.raises(RuntimeError):
+        ContainerWriter(tmp_path, 8, 7)
+
+
+def test_mismatched_frames_are_rejected(tmp_path: Path) -> None:
+    color, depth = _frames(1)[0]
+    with ContainerWriter(tmp_path, 9, 7) as writer:
+        with pytest.raises(ValueError):
+            writer.append(color[:, :8], depth)
+        with pytest.raises(ValueError):
+            writer.append(color, depth[:6])
+        assert len(writer) == 0
+
+
+def test_header_is_on_disk_before_the_first_frame(tmp_path: Path) -> None:
+    writer = ContainerWriter(tmp_path, 9, 7)
+    try:
+        # A capture killed here leaves an empty but readable container.
+        assert (tmp_path / CONTAINER_FILE).stat().st_size == _HEADER_SIZE
+        assert len(ContainerReader(tmp_path)) == 0
+    finally:
+        writer.close()
+
+
+@pytest.mark.parametrize("size", [0, _HEADER_SIZE - 1])
+def test_truncated_header_is_reported(tmp_path: Path, size: int) -> None:
+    _write(tmp_path, _frames(1))
+    data_path = tmp_path / CONTAINER_FILE
+    data_path.write_bytes(data_path.read_bytes()[:size])
+
+    with pytest.raises(RuntimeError, match="truncated"):
+        open_frames(tmp_path)
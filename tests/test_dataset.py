@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from kinect_forge.dataset import list_frame_pairs
+
+
+def test_frame_pairs_follow_the_manifest(
+    tmp_path: Path, write_dataset: Callable[..., Path]
+) -> None:
+    write_dataset(tmp_path, 3)
+    pairs = list_frame_pairs(tmp_path)
+    assert [color.name for color, _ in pairs] == [
+        "color_000000.png",
+        "color_000001.png",
+        "color_000002.png",
+    ]
+
+
+def test_frame_pairs_skip_frames_deleted_after_capture(
+    tmp_path: Path, write_dataset: Callable[..., Path]
+) -> None:
+    write_dataset(tmp_path, 3)
+    (tmp_path / "depth" / "depth_000001.png").unlink()
+    pairs = list_frame_pairs(tmp_path)
+    assert [color.name for color, _ in pairs] == ["color_000000.png", "color_000002.png"]
+
+
+def test_frame_pairs_do_not_stat_every_frame(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, write_dataset: Callable[..., Path]
+) -> None:
+    write_dataset(tmp_path, 3)
+
+    def no_stat(path: Path) -> bool:
+        raise AssertionError(f"stat of {path.name}")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Path, "exists", no_stat)
+        pairs = list_frame_pairs(tmp_path)
+    assert len(pairs) == 3
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import struct
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import open3d as o3d
+import pytest
+
+from kinect_forge.export import LODTarget, decimate, lod_error, parse_lod_targets, write_lods
+
+
+def _sphere() -> o3d.geometry.TriangleMesh:
+    mesh = o3d.geometry.TriangleMesh.create_sphere(radius=0.1, resolution=30)
+    mesh.vertex_colors = o3d.utility.Vector3dVector(np.asarray(mesh.vertices) * 5 + 0.5)
+    return mesh
+
+
+def _glb_json(path: Path) -> Dict[str, Any]:
+    data = path.read_bytes()
+    length, kind = struct.unpack_from("<II", data, 12)
+    assert kind == 0x4E4F534A  # "JSON"
+    return json.loads(data[20 : 20 + length])
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("50000", ((50000, 0.0),)),
+        ("1mm", ((0, 0.001),)),
+        ("0.002m", ((0, 0.002),)),
+        (" 2000, 0.5MM ,, 100 ", ((2000, 0.0), (0, 0.0005), (100, 0.0))),
+        ("", ()),
+    ],
+)
+def test_parse_lod_targets(text: str, expected: Tuple[Tuple[int, float], ...]) -> None:
+    parsed = parse_lod_targets(text)
+
+    assert [count for count, _ in parsed] == [count for count, _ in expected]
+    assert [error for _, error in parsed] == pytest.approx([error for _, error in expected])
+
+
+@pytest.mark.parametrize("text", ["many", "1cm", "mm", "-5", "-1mm", "0", "0mm", "1.5"])
+def test_parse_lod_targets_rejects_bad_specs(text: str) -> None:
+    with pytest.raises(ValueError):
+        parse_lod_targets(text)
+
+
+def test_decimate_to_a_triangle_count() -> None:
+    mesh = _sphere()
+
+    lod, error = decimate(mesh, LODTarget(triangles=500))
+
+    assert 0 < len(lod.triangles) <= 500
+    assert lod.has_vertex_colors()
+    assert 0.0 < error < 0.01
+
+
+def test_decimate_to_an_error_bound() -> None:
+    mesh = _sphere()
+    reference = o3d.core.Tensor(np.asarray(mesh.vertices, dtype=np.float32))
+
+    fine, fine_error = decimate(mesh, LODTarget(max_error=0.0005))
+    coarse, coarse_error = decimate(mesh, LODTarget(max_error=0.002))
+
+    assert fine_error <= 0.0005
+    assert coarse_error <= 0.002
+    assert len(coarse.triangles) < len(fine.triangles) < len(mesh.triangles)
+    assert lod_error(reference, coarse) == pytest.approx(coarse_error)
+
+
+def test_single_file_lods_are_nodes_of_one_gltf(tmp_path: Path) -> None:
+    path = tmp_path / "model.glb"
+
+    levels = write_lods(
+        path, _sphere(), [LODTarget(triangles=200), LODTarget(triangles=1000)], single_file=True
+    )
+
+    assert [level.node for level in levels] == ["lod0", "lod1", "lod2"]
+    assert all(level.path == path for level in levels)
+    assert [level.triangles for level in levels] == sorted(
+        (level.triangles for level in levels), reverse=True
+    )
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["model.glb", "model_lods.json"]
+    tree = _glb_json(path)
+    assert sorted(node["name"] for node in tree["nodes"]) == ["lod0", "lod1", "lod2"]
+    assert [entry["node"] for entry in tree["extras"]["lods"]] == ["lod0", "lod1", "lod2"]
+    manifest = json.loads((tmp_path / "model_lods.json").read_text())
+    assert manifest["levels"] == tree["extras"]["lods"]
+
+
+def test_separate_lod_files(tmp_path: Path) -> None:
+    levels = write_lods(tmp_path / "model.ply", _sphere(), [LODTarget(triangles=300)])
+
+    assert [level.path.name for level in levels] == ["model.ply", "model_lod1.ply"]
+    assert all(level.node is None for level in levels)
+    assert all(level.path.is_file() for level in levels)
+
+
+def test_single_file_needs_gltf(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        write_lods(tmp_path / "model.ply", _sphere(), [LODTarget(triangles=300)], single_file=True)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+import pytest
+
+from kinect_forge import fragments
+from kinect_forge.config import ReconstructionConfig
+from kinect_forge.dataset import load_metadata, open_frames
+from kinect_forge.fragments import FragmentSetup, build_fragment, split_fragments
+from kinect_forge.odometry import PairResult
+
+
+@pytest.mark.parametrize(
+    ("indices", "size", "overlap", "expected"),
+    [
+        # Runs that end exactly at the last keyframe.
+        (list(range(10)), 4, 1, [[0, 1, 2, 3], [3, 4, 5, 6], [6, 7, 8, 9]]),
+        (list(range(4)), 4, 1, [[0, 1, 2, 3]]),
+        ([0, 5, 9, 14, 20], 3, 1, [[0, 5, 9], [9, 14, 20]]),
+        # A tail of overlap + 1 frames is folded into the previous run.
+        (list(range(8)), 4, 1, [[0, 1, 2, 3], [3, 4, 5, 6, 7]]),
+        (list(range(4)), 2, 1, [[0, 1], [1, 2, 3]]),
+        (list(range(9)), 5, 2, [[0, 1, 2, 3, 4], [3, 4, 5, 6, 7, 8]]),
+        # A longer tail stays its own run.
+        (list(range(9)), 4, 1, [[0, 1, 2, 3], [3, 4, 5, 6], [6, 7, 8]]),
+        (list(range(10)), 5, 2, [[0, 1, 2, 3, 4], [3, 4, 5, 6, 7], [6, 7, 8, 9]]),
+        # Overlap is clamped to 1 .. size - 1.
+        (list(range(5)), 3, 0, [[0, 1, 2], [2, 3, 4]]),
+        (list(range(5)), 3, 3, [[0, 1, 2], [1, 2, 3, 4]]),
+        (list(range(5)), 3, 10, [[0, 1, 2], [1, 2, 3, 4]]),
+        # Fewer keyframes than one fragment.
+        ([0, 1], 4, 1, [[0, 1]]),
+        ([7], 4, 1, [[7]]),
+    ],
+)
+def test_split_fragments(
+    indices: List[int], size: int, overlap: int, expected: List[List[int]]
+) -> None:
+    assert split_fragments(indices, size, overlap) == expected
+
+
+@pytest.mark.parametrize("size", [-1, 0, 1])
+def test_fragment_size_below_two_is_rejected(size: int) -> None:
+    with pytest.raises(ValueError):
+        split_fragments(list(range(10)), size, 1)
+
+
+def test_fragment_reuses_aligned_pairs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, write_wall: Callable[..., Path]
+) -> None:
+    root = write_wall(tmp_path / "scan")
+    known = PairResult(0, 1, True, np.eye(4), 0.9)
+    computed: List[int] = []
+    odometry_pair = fragments.odometry_pair
+
+    def counting_pair(source: int, *args: object) -> PairResult:
+        computed.append(source)
+        return odometry_pair(source, *args)
+
+    monkeypatch.setattr(fragments, "odometry_pair", counting_pair)
+    config = ReconstructionConfig(voxel_length=0.01, sdf_trunc=0.04, icp_refine=False)
+    setup = FragmentSetup(
+        root,
+        load_metadata(root).intrinsics,
+        1000.0,
+        3.0,
+        config,
+        aligned={(known.source, known.target): known},
+    )
+
+    fragment = build_fragment(open_frames(root), [0, 1, 2], setup)
+
+    assert fragment.odometry[0] is known
+    assert (fragment.odometry[1].source, fragment.odometry[1].target) == (1, 2)
+    assert computed == [1]
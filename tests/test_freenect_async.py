@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from kinect_forge.sensors.freenect_async import (
+    FreenectAsyncConfig,
+    FreenectAsyncSensor,
+    _tick_diff,
+)
+
+WIDTH, HEIGHT = 8, 6
+# (stream, value filling the frame, device timestamp)
+Event = Tuple[str, int, int]
+
+
+class _FakeFreenect:
+    """Stands in for the freenect module: every `process_events` call
+    delivers the next scripted callback, about one per millisecond."""
+
+    DEPTH_MM = 0
+    DEPTH_11BIT = 1
+    RESOLUTION_MEDIUM = 1
+    VIDEO_RGB = 0
+
+    def __init__(self, events: Iterable[Event]) -> None:
+        self._events = iter(events)
+        self._callbacks: dict[str, Any] = {}
+
+    def init(self) -> object:
+        return object()
+
+    def open_device(self, ctx: object, index: int) -> object:
+        return object()
+
+    def set_depth_mode(self, dev: object, resolution: int, mode: int) -> None:
+        pass
+
+    def set_video_mode(self, dev: object, resolution: int, mode: int) -> None:
+        pass
+
+    def set_depth_callback(self, dev: object, callback: Any) -> None:
+        self._callbacks["depth"] = callback
+
+    def set_video_callback(self, dev: object, callback: Any) -> None:
+        self._callbacks["video"] = callback
+
+    def process_events(self, ctx: object) -> int:
+        event = next(self._events, None)
+        if event is None:
+            time.sleep(0.001)
+            return 0
+        time.sleep(0.001)
+        stream, value, timestamp = event
+        if stream == "depth":
+            data = np.full((HEIGHT, WIDTH), value, dtype=np.uint16)
+        else:
+            data = np.full((HEIGHT, WIDTH, 3), value, dtype=np.uint8)
+        self._callbacks[stream](None, data, timestamp)
+        return 0
+
+    def start_depth(self, dev: object) -> None:
+        pass
+
+    def start_video(self, dev: object) -> None:
+        pass
+
+    def stop_depth(self, dev: object) -> None:
+        pass
+
+    def stop_video(self, dev: object) -> None:
+        pass
+
+    def close_device(self, dev: object) -> None:
+        pass
+
+    def shutdown(self, ctx: object) -> None:
+        pass
+
+
+def _sensor(events: Iterable[Event], pool_size: int = 4) -> FreenectAsyncSensor:
+    config = FreenectAsyncConfig(width=WIDTH, height=HEIGHT, pool_size=pool_size, timeout=2.0)
+    return FreenectAsyncSensor(config, freenect_module=_FakeFreenect(events))
+
+
+def _pairs(sensor: FreenectAsyncSensor, count: int) -> List[Tuple[int, int, int, int]]:
+    """(color value, depth value, color timestamp, depth timestamp) of `count` frames."""
+    pairs = []
+    for _ in range(count):
+        frame = sensor.get_frame()
+        assert frame.color_timestamp is not None and frame.depth_timestamp is not None
+        pairs.append(
+            (
+                int(frame.color[0, 0, 0]),
+                int(frame.depth[0, 0]),
+                frame.color_timestamp,
+                frame.depth_timestamp,
+            )
+        )
+        sensor.release(frame)
+    return pairs
+
+
+def test_pairs_out_of_order_callbacks_by_timestamp() -> None:
+    events = [
+        ("depth", 11, 1_000),
+        ("depth", 12, 3_000_000),
+        ("video", 1, 1_200),
+        ("video", 2, 2_999_800),
+        ("video", 3, 6_000_000),
+        ("depth", 13, 6_000_300),
+    ]
+    sensor = _sensor(events)
+    sensor.start()
+    try:
+        pairs = _pairs(sensor, 3)
+    finally:
+        sensor.stop()
+    assert pairs == [
+        (1, 11, 1_200, 1_000),
+        (2, 12, 2_999_800, 3_000_000),
+        (3, 13, 6_000_000, 6_000_300),
+    ]
+    assert sensor.dropped == 0
+
+
+def test_pairs_across_timestamp_wraparound() -> None:
+    assert _tick_diff(0x40, 0xFFFFFF00) == 0x140
+    assert _tick_diff(0xFFFFFF00, 0x40) == -0x140
+    events = [("depth", 11, 0xFFFFFF00), ("video", 1, 0x40)]
+    sensor = _sensor(events)
+    sensor.start()
+    try:
+        pairs = _pairs(sensor, 1)
+    finally:
+        sensor.stop()
+    assert pairs == [(1, 11, 0x40, 0xFFFFFF00)]
+
+
+def _stream() -> Iterator[Event]:
+    idx = 0
+    while True:
+        idx += 1
+        yield "video", idx % 250, idx * 33_000
+        yield "depth", idx % 250, idx * 33_000 + 100
+
+
+def test_held_frame_is_not_overwritten() -> None:
+    sensor = _sensor(_stream(), pool_size=1)
+    sensor.start()
+    try:
+        held = sensor.get_frame()
+        color, depth = held.color.copy(), held.depth.copy()
+        later = set()
+        for _ in range(10):
+            frame = sensor.get_frame()
+            later.add(int(frame.depth[0, 0]))
+            assert frame.color is not held.color and frame.depth is not held.depth
+            sensor.release(frame)
+        np.testing.assert_array_equal(held.color, color)
+        np.testing.assert_array_equal(held.depth, depth)
+        assert len(later) > 1
+        sensor.release(held)
+    finally:
+        sensor.stop()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+import numpy as np
+import pytest
+
+from kinect_forge.config import ReconstructionConfig
+from kinect_forge.keyframes import DepthChangeDetector, depth_thumbnail
+from kinect_forge.reconstruct import _select_keyframes
+
+
+def _frame(value: int) -> np.ndarray:
+    return np.full((48, 64), value, dtype=np.uint16)
+
+
+def test_delta_is_mean_change_in_meters() -> None:
+    detector = DepthChangeDetector(1000.0, stride=1)
+    detector.set_reference(_frame(800))
+    assert detector.delta(_frame(810)) == pytest.approx(0.010)
+
+
+def test_delta_ignores_holes() -> None:
+    detector = DepthChangeDetector(1000.0, stride=2)
+    reference = _frame(800)
+    reference[:10, :10] = 0
+    detector.set_reference(reference)
+    frame = _frame(805)
+    # Dropouts in the new frame, and real depth where the reference had holes.
+    frame[20:30, 20:40] = 0
+    frame[:10, :10] = 1500
+    assert detector.delta(frame) == pytest.approx(0.005)
+
+
+def test_delta_is_not_diluted_by_the_roi() -> None:
+    roi = (16, 8, 32, 24)
+    detector = DepthChangeDetector(1000.0, stride=2, roi=roi)
+    reference = np.zeros((48, 64), dtype=np.uint16)
+    reference[8:32, 16:48] = 800
+    detector.set_reference(reference)
+    frame = reference.copy()
+    frame[8:32, 16:48] = 820
+    assert detector.delta(frame) == pytest.approx(0.020)
+
+
+def test_delta_without_common_depth_is_zero() -> None:
+    detector = DepthChangeDetector(1000.0, stride=1)
+    detector.set_reference(_frame(0))
+    assert detector.delta(_frame(900)) == 0.0
+
+
+def _orbit(count: int = 40, dropouts: float = 0.03) -> List[np.ndarray]:
+    """An ellipsoid moving unevenly in front of a wall, with noise and dropouts."""
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:120, 0:160].astype(np.float64)
+    frames = []
+    for k in range(count):
+        cx = 30 + 2.5 * k + 10 * np.sin(k / 5)
+        cy = 60 + 8 * np.sin(k / 7)
+        r2 = ((xx - cx) / 28) ** 2 + ((yy - cy) / 22) ** 2
+        depth = np.where(r2 < 1, 900 - 250 * np.sqrt(np.clip(1 - r2, 0, 1)), 1500)
+        depth += rng.normal(0, 1.5, depth.shape)
+        depth[rng.random(depth.shape) < dropouts] = 0
+        frames.append(depth.astype(np.uint16))
+    return frames
+
+
+def _keyframes(
+    frames: List[np.ndarray],
+    stride: int,
+    threshold: float,
+    deltas: Optional[List[float]] = None,
+) -> List[int]:
+    return _select_keyframes(
+        lambda idx: depth_thumbnail(frames[idx], stride),
+        list(range(len(frames))),
+        1000.0,
+        threshold,
+        deltas,
+    )
+
+
+def _float_keyframes(frames: List[np.ndarray], threshold: float) -> List[int]:
+    """Selection before thumbnails: float32 mean over every pixel."""
+    selected: List[int] = []
+    last: Optional[np.ndarray] = None
+    for idx, frame in enumerate(frames):
+        depth = frame.astype(np.float32) / 1000.0
+        if last is None or np.mean(np.abs(depth - last)) >= threshold:
+            selected.append(idx)
+            last = depth
+    return selected
+
+
+def _capture_deltas(frames: List[np.ndarray]) -> List[float]:
+    """Manifest deltas as a continuous capture records them."""
+    detector = DepthChangeDetector(1000.0)
+    deltas = []
+    for frame in frames:
+        deltas.append(detector.delta(frame))
+        detector.set_reference(frame)
+    return deltas
+
+
+def _assert_close_selection(reference: List[int], other: List[int]) -> None:
+    """Within 10% as many keyframes, and at least 90% of the reference
+    keyframes have one within a frame of them."""
+    others = set(other)
+    assert abs(len(others) - len(reference)) <= 0.1 * len(reference)
+    near = [idx for idx in reference if others & {idx - 1, idx, idx + 1}]
+    assert len(near) >= 0.9 * len(reference)
+
+
+@pytest.mark.parametrize("threshold", [0.01, 0.02])
+def test_default_stride_matches_full_resolution_selection(threshold: float) -> None:
+    frames = _orbit()
+    stride = ReconstructionConfig().keyframe_stride
+    _assert_close_selection(_keyframes(frames, 1, threshold), _keyframes(frames, stride, threshold))
+
+
+@pytest.mark.parametrize("threshold", [0.01, 0.02])
+def test_thumbnail_selection_matches_the_float_selection(threshold: float) -> None:
+    """Without dropouts the integer scorer reproduces the old selection, and
+    the default stride stays close."""
+    frames = _orbit(dropouts=0.0)
+    before = _float_keyframes(frames, threshold)
+    assert _keyframes(frames, 1, threshold) == before
+    stride = ReconstructionConfig().keyframe_stride
+    _assert_close_selection(before, _keyframes(frames, stride, threshold))
+
+
+@pytest.mark.parametrize("dropouts", [0.01, 0.03])
+@pytest.mark.parametrize("threshold", [0.01, 0.02])
+def test_dropouts_no_longer_count_as_change(dropouts: float, threshold: float) -> None:
+    """The float mean counted every hole that opened or closed as change, so a
+    few percent of dropouts made every frame a keyframe. The integer scorer
+    keeps the selection it makes on the same motion without holes."""
+    clean = _keyframes(_orbit(dropouts=0.0), 1, threshold)
+    frames = _orbit(dropouts=dropouts)
+
+    assert _float_keyframes(frames, threshold) == list(range(len(frames)))
+    assert len(clean) < len(frames)
+    _assert_close_selection(clean, _keyframes(frames, 1, threshold))
+    stride = ReconstructionConfig().keyframe_stride
+    _assert_close_selection(clean, _keyframes(frames, stride, threshold))
+
+
+@pytest.mark.parametrize("threshold", [0.005, 0.01, 0.02])
+def test_manifest_skip_matches_scoring_every_frame(threshold: float) -> None:
+    frames = _orbit()
+    stride = ReconstructionConfig().keyframe_stride
+    _assert_close_selection(
+        _keyframes(frames, stride, threshold),
+        _keyframes(frames, stride, threshold, _capture_deltas(frames)),
+    )
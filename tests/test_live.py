@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, List
+
+from kinect_forge.capture import capture_frames
+from kinect_forge.config import CaptureConfig, KinectIntrinsics, ReconstructionConfig
+from kinect_forge.dataset import load_metadata
+from kinect_forge.live import LiveReconstructor, LiveResult
+from kinect_forge.sensors.replay import ReplayConfig, ReplaySensor
+from kinect_forge.serve import dataset_ready
+
+_INTRINSICS = KinectIntrinsics()
+
+
+def _read_rate(source: Path, output: Path, live: LiveReconstructor | None = None) -> float:
+    sensor = ReplaySensor(source, ReplayConfig(pacing="fps", fps=30.0, preload=True))
+    # Raw container frames keep the capture itself well below one core.
+    config = CaptureConfig(frames=len(sensor), fps=0, warmup=0, depth_max=3.0, storage="container")
+    stats = capture_frames(sensor, output, config, intrinsics=_INTRINSICS, live=live)
+    if live is not None:
+        assert stats.live is not None
+        assert stats.live.frames_integrated >= 1
+        assert stats.live.frames_integrated + stats.live.frames_skipped == stats.frames_saved
+    return stats.frames_read / stats.elapsed_seconds
+
+
+def test_live_reconstruction_keeps_the_capture_read_rate(
+    tmp_path: Path, write_wall: Callable[..., Path]
+) -> None:
+    # Full-size frames of a wall that tilts a little every frame.
+    source = write_wall(
+        tmp_path / "source", 45, _INTRINSICS, distance_mm=900, slope_mm=0.2, turn_mm=0.01
+    )
+    baseline = _read_rate(source, tmp_path / "plain")
+
+    config = ReconstructionConfig(voxel_length=0.01, sdf_trunc=0.04, keyframe_threshold=0.0)
+    live = LiveReconstructor(_INTRINSICS, config)
+    live_rate = _read_rate(source, tmp_path / "live", live)
+
+    assert live_rate >= 0.9 * baseline
+
+
+def test_capture_is_finished_only_after_the_live_outputs(
+    tmp_path: Path, write_wall: Callable[..., Path]
+) -> None:
+    source = write_wall(tmp_path / "source", 4)
+    output = tmp_path / "scan"
+    ready_during_finish: List[bool] = []
+
+    class _Checking(LiveReconstructor):
+        def finish(self, output_dir: Path) -> LiveResult:
+            ready_during_finish.append(dataset_ready(output_dir, settle_seconds=0.0))
+            return super().finish(output_dir)
+
+    intrinsics = load_metadata(source).intrinsics
+    sensor = ReplaySensor(source, ReplayConfig(pacing="fast"))
+    config = CaptureConfig(frames=4, fps=0, warmup=0, depth_max=3.0)
+    live = _Checking(intrinsics, ReconstructionConfig(voxel_length=0.01, sdf_trunc=0.04))
+    stats = capture_frames(sensor, output, config, intrinsics=intrinsics, live=live)
+
+    assert ready_during_finish == [False]
+    assert stats.live is not None
+    assert dataset_ready(output, settle_seconds=0.0)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from kinect_forge.codec import get_codec
+from kinect_forge.config import KinectIntrinsics
+from kinect_forge.dataset import (
+    DatasetMeta,
+    ensure_dirs,
+    open_frames,
+    write_frame_images,
+    write_metadata,
+)
+from kinect_forge.odometry import (
+    PairResult,
+    ParallelOdometry,
+    chain_poses,
+    pinhole,
+    rgbd_from_arrays,
+)
+from kinect_forge.reconstruct import _estimate_poses
+
+_INTRINSICS = KinectIntrinsics(160, 120, 130.0, 130.0, 79.5, 59.5)
+
+
+def _motion(angle: float, offset: tuple[float, float, float]) -> np.ndarray:
+    cos, sin = np.cos(angle), np.sin(angle)
+    matrix = np.eye(4)
+    matrix[:3, :3] = [[cos, -sin, 0.0], [sin, cos, 0.0], [0.0, 0.0, 1.0]]
+    matrix[:3, 3] = offset
+    return matrix
+
+
+def test_chained_poses_map_each_camera_into_the_world() -> None:
+    # Camera-to-world poses of three keyframes; the first camera is the world.
+    world = [np.eye(4), _motion(0.3, (0.1, 0.0, 0.02)), _motion(0.7, (0.15, -0.05, 0.0))]
+    # Odometry maps points of the previous camera into the next one.
+    pairs = [
+        PairResult(k - 1, k, True, np.linalg.inv(world[k]) @ world[k - 1], 1.0)
+        for k in range(1, 3)
+    ]
+
+    poses = chain_poses(pairs)
+
+    assert len(poses) == 3
+    for pose, expected in zip(poses, world):
+        np.testing.assert_allclose(pose, expected, atol=1e-12)
+    # Each camera's view of one world point maps back onto that point.
+    point = np.array([0.2, 0.1, 0.9, 1.0])
+    for pose, camera in zip(poses, world):
+        np.testing.assert_allclose(pose @ (np.linalg.inv(camera) @ point), point, atol=1e-12)
+
+
+def test_failed_pairs_fall_back_to_the_given_motion() -> None:
+    motion = _motion(0.2, (0.05, 0.0, 0.0))
+    failed = PairResult(0, 1, False, np.eye(4), 0.0)
+
+    assert np.allclose(chain_poses([failed])[1], np.eye(4))
+    np.testing.assert_allclose(chain_poses([failed], [motion])[1], np.linalg.inv(motion))
+
+
+def _write_pan(root: Path, count: int) -> None:
+    """A textured, curved wall panning past the camera."""
+    color_dir, depth_dir = ensure_dirs(root)
+    rows, cols = np.mgrid[0:120, 0:160]
+    for idx in range(count):
+        x = cols + 3 * idx
+        color = np.stack(
+            [
+                128 + 100 * np.sin(x / 7.0) * np.cos(rows / 9.0),
+                128 + 100 * np.cos(x / 11.0),
+                128 + 100 * np.sin((x + rows) / 13.0),
+            ],
+            axis=-1,
+        ).astype(np.uint8)
+        depth = (900 + 150 * np.sin(x / 25.0) + rows).astype(np.uint16)
+        write_frame_images(
+            color_dir, depth_dir, idx, color, depth, get_codec("png"), get_codec("png")
+        )
+    write_metadata(root, DatasetMeta(_INTRINSICS, 1000.0, 3.0))
+
+
+def test_parallel_odometry_matches_the_serial_chain(tmp_path: Path) -> None:
+    _write_pan(tmp_path, 8)
+    indices = list(range(8))
+    frames = open_frames(tmp_path)
+    images = (
+        rgbd_from_arrays(frames.read_color(idx), frames.read_depth(idx), 1000.0, 3.0)
+        for idx in indices
+    )
+    _, serial = _estimate_poses(images, indices, pinhole(_INTRINSICS))
+
+    odometry = ParallelOdometry(tmp_path, _INTRINSICS, 1000.0, 3.0, workers=2, chunk_size=2)
+    odometry.start(indices)
+    parallel = odometry.results()
+
+    assert [(pair.source, pair.target) for pair in parallel] == [
+        (pair.source, pair.target) for pair in serial
+    ]
+    assert [pair.success for pair in parallel] == [pair.success for pair in serial]
+    assert all(pair.success for pair in serial)
+    assert not np.allclose(serial[-1].transformation, np.eye(4))
+    for ours, theirs in zip(parallel, serial):
+        assert np.array_equal(ours.transformation, theirs.transformation)
+        assert ours.fitness == theirs.fitness
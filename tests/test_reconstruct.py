@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+from kinect_forge.cache import dataset_fingerprint, load_volume_state
+from kinect_forge.config import ReconstructionConfig
+from kinect_forge.dataset import load_metadata, open_frame_source
+from kinect_forge.reconstruct import (
+    MIN_BUDGET_HEADROOM_MB,
+    _budget_split,
+    _keyframe_stage,
+    _rss_mb,
+    reconstruct_mesh,
+)
+
+
+def test_saved_volume_follows_the_last_reconstruction(
+    tmp_path: Path, write_wall: Callable[..., Path]
+) -> None:
+    write_wall(tmp_path)
+    fine = ReconstructionConfig(
+        voxel_length=0.01, sdf_trunc=0.04, tsdf_backend="tensor", keep_volume=True
+    )
+    coarse = replace(fine, voxel_length=0.02)
+
+    reconstruct_mesh(tmp_path, tmp_path / "fine.ply", fine)
+    reconstruct_mesh(tmp_path, tmp_path / "coarse.ply", coarse)
+    # The fine mesh comes from the stage cache; the volume must still be the fine one.
+    stats = reconstruct_mesh(tmp_path, tmp_path / "fine.ply", fine)
+
+    state = load_volume_state(tmp_path)
+    assert state is not None
+    assert state.voxel_length == fine.voxel_length
+    assert state.indices == stats.indices
+
+
+def test_volume_is_saved_only_when_kept(tmp_path: Path, write_wall: Callable[..., Path]) -> None:
+    write_wall(tmp_path)
+    config = ReconstructionConfig(voxel_length=0.01, sdf_trunc=0.04, tsdf_backend="tensor")
+
+    reconstruct_mesh(tmp_path, tmp_path / "mesh.ply", config)
+
+    assert load_volume_state(tmp_path) is None
+    assert not (tmp_path / "cache" / "volume").exists()
+
+
+def _keyframes(root: Path, config: ReconstructionConfig) -> List[int]:
+    frames = open_frame_source(root)
+    return _keyframe_stage(
+        root, config, load_metadata(root), frames, 1000.0, None, dataset_fingerprint(root)
+    )
+
+
+def test_rewritten_frames_rebuild_the_depth_thumbnails(
+    tmp_path: Path, write_wall: Callable[..., Path]
+) -> None:
+    config = ReconstructionConfig(voxel_length=0.01, sdf_trunc=0.04, keyframe_threshold=0.05)
+    write_wall(tmp_path, 6)
+    assert _keyframes(tmp_path, config) == [0]
+
+    # Same frame count and size, new depth: the cached thumbnails no longer apply.
+    write_wall(tmp_path, 6, step_mm=100)
+
+    assert _keyframes(tmp_path, config) == list(range(6))
+
+
+def test_memory_budget_ignores_memory_already_released() -> None:
+    # A transient allocation raises the process's peak RSS but not what it holds now.
+    scratch = np.ones(128 << 17)  # 128 MB
+    del scratch
+    config = ReconstructionConfig(memory_budget_mb=_rss_mb() + 2 * MIN_BUDGET_HEADROOM_MB)
+
+    cache_mb, blocks = _budget_split(config)
+
+    assert cache_mb > 0 and blocks > 0
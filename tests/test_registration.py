@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from kinect_forge.config import KinectIntrinsics
+from kinect_forge.odometry import pinhole
+from kinect_forge.registration import CloudCache, ICPLevel, depth_cloud
+
+
+def _read_depth(index: int) -> np.ndarray:
+    return np.full((60, 80), 800 + 10 * index, dtype=np.uint16)
+
+
+def test_cloud_cache_is_keyed_by_the_dataset_fingerprint(tmp_path: Path) -> None:
+    intrinsics = KinectIntrinsics(80, 60, 70.0, 70.0, 39.5, 29.5)
+    levels = [ICPLevel(0.02, 0.05, 10)]
+
+    first = CloudCache(tmp_path, intrinsics, 1000.0, 3.0, "before")
+    first.clouds(0, levels, _read_depth)
+    again = CloudCache(tmp_path, intrinsics, 1000.0, 3.0, "before")
+    again.clouds(0, levels, _read_depth)
+    # Rewritten frames change the fingerprint; their clouds are built afresh.
+    rewritten = CloudCache(tmp_path, intrinsics, 1000.0, 3.0, "after")
+    rewritten.clouds(0, levels, _read_depth)
+
+    assert (first.built, again.loaded, again.built) == (1, 1, 0)
+    assert (rewritten.loaded, rewritten.built) == (0, 1)
+
+
+@pytest.mark.parametrize("voxel", [0.0, 0.02])
+def test_depth_cloud_normals_follow_a_tilted_wall(voxel: float) -> None:
+    intrinsics = KinectIntrinsics(80, 60, 70.0, 70.0, 39.5, 29.5)
+    cols = np.arange(80)[None, :].repeat(60, axis=0)
+    # Depth grows 4 mm per column: the wall faces about 19 degrees off the optical axis.
+    depth = (800 + 4 * cols).astype(np.uint16)
+
+    cloud = depth_cloud(depth, pinhole(intrinsics), 1000.0, 3.0, voxel)
+
+    normals = np.abs(np.asarray(cloud.normals))
+    assert np.median(normals[:, 0]) > 0.2
+    assert np.median(normals[:, 1]) < 0.05
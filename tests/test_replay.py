@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+import pytest
+
+from kinect_forge.capture import CaptureStats, capture_frames
+from kinect_forge.config import CaptureConfig
+from kinect_forge.dataset import open_frames
+from kinect_forge.sensors.base import RGBDFrame, SensorExhausted
+from kinect_forge.sensors.replay import ReplayConfig, ReplaySensor
+
+FRAMES = 6
+FAST = ReplayConfig(pacing="fast")
+
+
+class _CountingSensor:
+    """Frames whose depth encodes their read order."""
+
+    def __init__(self) -> None:
+        self.read = 0
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def get_frame(self) -> RGBDFrame:
+        self.read += 1
+        depth = np.full((12, 16), 800 + self.read, dtype=np.uint16)
+        color = np.full((12, 16, 3), self.read, dtype=np.uint8)
+        return RGBDFrame(color=color, depth=depth)
+
+
+@pytest.fixture(params=["png", "container"])
+def source(request: pytest.FixtureRequest, tmp_path: Path) -> Path:
+    root = tmp_path / "source"
+    config = CaptureConfig(frames=FRAMES, fps=0, warmup=0, storage=request.param)
+    capture_frames(_CountingSensor(), root, config)
+    return root
+
+
+def _depths(root: Path) -> List[int]:
+    frames = open_frames(root)
+    return [int(frames.read_depth(idx)[0, 0]) for idx in range(len(frames))]
+
+
+def _replay(
+    source: Path,
+    output: Path,
+    frames: int,
+    replay: ReplayConfig = FAST,
+    writer_workers: int = 0,
+) -> Tuple[ReplaySensor, CaptureStats]:
+    sensor = ReplaySensor(source, replay)
+    config = CaptureConfig(frames=frames, fps=0, warmup=0, writer_workers=writer_workers)
+    return sensor, capture_frames(sensor, output, config)
+
+
+@pytest.mark.parametrize("writer_workers", [0, 2])
+def test_replay_capture_copies_the_dataset(
+    source: Path, tmp_path: Path, writer_workers: int
+) -> None:
+    # Asking for more frames than recorded: the replay ends the capture.
+    sensor, stats = _replay(source, tmp_path / "out", FRAMES + 4, writer_workers=writer_workers)
+
+    assert (stats.frames_read, stats.frames_saved) == (FRAMES, FRAMES)
+    assert sensor.delivered == FRAMES
+    assert _depths(tmp_path / "out") == _depths(source)
+
+
+def test_exhausted_replay_raises(source: Path) -> None:
+    sensor = ReplaySensor(source, FAST)
+    for _ in range(FRAMES):
+        sensor.get_frame()
+
+    with pytest.raises(SensorExhausted):
+        sensor.get_frame()
+
+
+def test_seeded_drops_are_counted_and_repeatable(source: Path, tmp_path: Path) -> None:
+    sensor, stats = _replay(source, tmp_path / "a", FRAMES, replace(FAST, drop_rate=0.4, seed=3))
+    again, _ = _replay(source, tmp_path / "b", FRAMES, replace(FAST, drop_rate=0.4, seed=3))
+
+    assert 0 < sensor.dropped < FRAMES
+    assert sensor.dropped + sensor.delivered == FRAMES
+    assert stats.frames_saved == sensor.delivered
+    assert again.dropped == sensor.dropped
+    assert _depths(tmp_path / "a") == _depths(tmp_path / "b")
+
+
+def test_loop_restarts_the_replay(source: Path, tmp_path: Path) -> None:
+    _, stats = _replay(source, tmp_path / "out", 2 * FRAMES + 2, replace(FAST, loop=True))
+
+    recorded = _depths(source)
+    assert stats.frames_saved == 2 * FRAMES + 2
+    assert _depths(tmp_path / "out") == recorded + recorded + recorded[:2]
+
+
+def test_fps_pacing_holds_the_frame_rate(source: Path) -> None:
+    sensor = ReplaySensor(source, ReplayConfig(pacing="fps", fps=100.0))
+    started = time.monotonic()
+    for _ in range(FRAMES):
+        sensor.get_frame()
+
+    # Frame k is due k periods after the first.
+    assert time.monotonic() - started >= (FRAMES - 1) / 100.0
+
+
+def test_replay_rejects_bad_settings(source: Path) -> None:
+    with pytest.raises(ValueError):
+        ReplaySensor(source, ReplayConfig(pacing="slow"))
+    with pytest.raises(ValueError):
+        ReplaySensor(source, ReplayConfig(drop_rate=1.0))
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import os
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pytest
+
+from kinect_forge.codec import get_codec
+from kinect_forge.config import KinectIntrinsics, ReconstructionConfig
+from kinect_forge.dataset import (
+    MANIFEST_FILE,
+    DatasetMeta,
+    ensure_dirs,
+    write_frame_images,
+    write_metadata,
+)
+from kinect_forge.serve import (
+    ReconstructionServer,
+    ServeConfig,
+    _metadata_mtime,
+    dataset_ready,
+    needs_job,
+    read_status,
+    write_status,
+)
+
+_META = DatasetMeta(KinectIntrinsics(16, 12, 14.0, 14.0, 7.5, 5.5), 1000.0, 3.0)
+
+
+def _dataset(root: Path, frames_read: Optional[int] = 1, manifest: bool = True) -> Path:
+    color_dir, depth_dir = ensure_dirs(root)
+    write_frame_images(
+        color_dir,
+        depth_dir,
+        0,
+        np.zeros((12, 16, 3), dtype=np.uint8),
+        np.full((12, 16), 800, dtype=np.uint16),
+        get_codec("png"),
+        get_codec("png"),
+    )
+    if manifest:
+        (root / MANIFEST_FILE).write_text("index\n")
+    write_metadata(root, replace(_META, frames_read=frames_read))
+    return root
+
+
+def _set_state(root: Path, state: str) -> None:
+    write_status(root, {"state": state, "metadata_mtime_ns": _metadata_mtime(root)})
+
+
+def test_finished_capture_is_ready(tmp_path: Path) -> None:
+    root = _dataset(tmp_path / "scan")
+
+    assert dataset_ready(root, settle_seconds=0.0)
+    assert not dataset_ready(root, settle_seconds=60.0)
+
+
+def test_running_capture_is_not_ready(tmp_path: Path) -> None:
+    root = _dataset(tmp_path / "scan", frames_read=None)
+
+    assert not dataset_ready(root, settle_seconds=0.0)
+
+
+def test_dataset_from_before_the_manifest_is_ready(tmp_path: Path) -> None:
+    root = _dataset(tmp_path / "scan", frames_read=None, manifest=False)
+
+    assert dataset_ready(root, settle_seconds=0.0)
+
+
+def test_directory_without_metadata_is_not_ready(tmp_path: Path) -> None:
+    assert not dataset_ready(tmp_path, settle_seconds=0.0)
+
+
+@pytest.mark.parametrize(
+    ("state", "retry_failed", "expected"),
+    [
+        (None, False, True),
+        ("done", False, False),
+        ("done", True, False),
+        ("failed", False, False),
+        ("failed", True, True),
+        ("queued", False, True),
+        ("running", False, True),
+    ],
+)
+def test_needs_job(
+    tmp_path: Path, state: Optional[str], retry_failed: bool, expected: bool
+) -> None:
+    root = _dataset(tmp_path / "scan")
+    if state is not None:
+        _set_state(root, state)
+
+    assert needs_job(root, retry_failed) is expected
+
+
+@pytest.mark.parametrize("state", ["done", "failed"])
+def test_recaptured_dataset_needs_a_job(tmp_path: Path, state: str) -> None:
+    root = _dataset(tmp_path / "scan")
+    _set_state(root, state)
+    stat = (root / "metadata.json").stat()
+    os.utime(root / "metadata.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert needs_job(root)
+
+
+def test_restart_requeues_running_datasets(tmp_path: Path) -> None:
+    running = _dataset(tmp_path / "running")
+    done = _dataset(tmp_path / "done")
+    legacy = _dataset(tmp_path / "legacy", frames_read=None, manifest=False)
+    capturing = _dataset(tmp_path / "capturing", frames_read=None)
+    # A server stopped mid-job leaves its dataset "running" on disk.
+    _set_state(running, "running")
+    _set_state(done, "done")
+    reports: List[Tuple[str, Dict[str, Any]]] = []
+    server = ReconstructionServer(
+        ServeConfig(watch_dir=tmp_path, settle_seconds=0.0),
+        ReconstructionConfig(),
+        lambda root, status: reports.append((root.name, status)),
+    )
+
+    server.scan()
+
+    assert [name for name, status in reports] == ["legacy", "running"]
+    assert all(status["state"] == "queued" for _, status in reports)
+    assert (read_status(running) or {})["state"] == "queued"
+    assert (read_status(done) or {})["state"] == "done"
+    assert read_status(legacy) is not None
+    assert read_status(capturing) is None